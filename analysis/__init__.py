@@ -0,0 +1,6 @@
+from .cfg import CFG, classify
+from .hazard_analyzer import analyze, HazardReport, InstrInfo, BasicBlock, Loop
+from .stack_distance import AccessTrace, MissCurve, SweepPoint, miss_curve, sweep
+
+__all__ = ["CFG", "classify", "analyze", "HazardReport", "InstrInfo", "BasicBlock", "Loop",
+           "AccessTrace", "MissCurve", "SweepPoint", "miss_curve", "sweep"]
@@ -0,0 +1,171 @@
+# analysis/cfg.py
+"""Control-flow graph over a loaded program image.
+
+Blocks are found with a single pass over the raw words that classifies
+control transfers by their opcode/funct bits, so plain instructions are
+never decoded; only branches and jumps go through `decode()` for their
+targets. The PC-to-block table is an `array` with one entry per
+instruction, which keeps a 1M-instruction image to a few seconds to build
+and a few megabytes to hold.
+"""
+from array import array
+from typing import List, Optional, Set, Tuple
+
+from decoder.decoder import decode
+
+# Control-transfer kinds returned by classify()
+PLAIN, BRANCH, JUMP, INDIRECT = 0, 1, 2, 3
+
+BRANCH_OPCODES = frozenset((0x04, 0x05, 0x06, 0x07, 0x10, 0x11, 0x12, 0x13))
+JUMP_OPCODES = frozenset((0x02, 0x03))      # J, JAL
+INDIRECT_FUNCTS = frozenset((0x08, 0x09))   # JR, JALR (R-type)
+
+
+def classify(word: int) -> int:
+    """Control-transfer kind of an instruction word, from its opcode bits only."""
+    opcode = word >> 26
+    if opcode in BRANCH_OPCODES:
+        return BRANCH
+    if opcode in JUMP_OPCODES:
+        return JUMP
+    if opcode == 0 and word & 0x3F in INDIRECT_FUNCTS:
+        return INDIRECT
+    return PLAIN
+
+
+class CFG:
+    """Basic blocks, edges, back edges and loop headers of a program image.
+
+    Block `b` covers instruction indices [starts[b], ends[b]); `succs[b]` and
+    `preds[b]` hold block indices (a register jump has no known successor and
+    a jump never falls through). `kinds[b]` is the classify() kind of the
+    block's last instruction and `targets[b]` its decoded target index, or
+    -1. Back edges are the edges to a block still on the DFS stack; their
+    destinations are the loop headers.
+    """
+
+    def __init__(self, words: List[int], base: int = 0):
+        if base % 4 != 0:
+            raise ValueError('Program base must be word-aligned')
+        self.base = base
+        self.count = count = len(words)
+
+        # Pass 1: leaders and control-transfer targets
+        is_leader = bytearray(count + 1)
+        is_leader[0] = 1
+        transfers: List[Tuple[int, int, int]] = []  # (index, kind, target index or -1)
+        for i, word in enumerate(words):
+            kind = classify(word)
+            if kind == PLAIN:
+                continue
+            target = -1
+            if kind != INDIRECT:
+                dec_target = decode(word, pc=base + 4 * i).target
+                index = (dec_target - base) >> 2
+                if 0 <= index < count:
+                    target = index
+                    is_leader[index] = 1
+            is_leader[i + 1] = 1
+            transfers.append((i, kind, target))
+
+        starts = [i for i in range(count) if is_leader[i]] if count else []
+        self.starts: List[int] = starts
+        self.ends: List[int] = starts[1:] + [count] if starts else []
+
+        # PC-to-block table (one entry per instruction)
+        block_of = array('i', bytes(4 * count))
+        for b, start in enumerate(starts):
+            block_of[start:self.ends[b]] = array('i', [b]) * (self.ends[b] - start)
+        self.block_of = block_of
+
+        # Pass 2: edges
+        blocks = len(starts)
+        self.kinds = [PLAIN] * blocks
+        self.targets = [-1] * blocks
+        for i, kind, target in transfers:
+            b = block_of[i]
+            self.kinds[b] = kind
+            self.targets[b] = target
+        self.succs: List[List[int]] = [[] for _ in range(blocks)]
+        self.preds: List[List[int]] = [[] for _ in range(blocks)]
+        for b in range(blocks):
+            kind = self.kinds[b]
+            if kind in (PLAIN, BRANCH) and self.ends[b] < count:
+                self._add_edge(b, b + 1)
+            if self.targets[b] >= 0:
+                self._add_edge(b, block_of[self.targets[b]])
+
+        self.back_edges: List[Tuple[int, int]] = self._find_back_edges()
+        self.loop_headers: Set[int] = {dst for _, dst in self.back_edges}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _add_edge(self, src: int, dst: int):
+        if dst not in self.succs[src]:
+            self.succs[src].append(dst)
+            self.preds[dst].append(src)
+
+    def _find_back_edges(self) -> List[Tuple[int, int]]:
+        # Iterative DFS (deep programs would overflow the recursion limit);
+        # state 1 = on the stack, 2 = finished. Unreachable code is searched too.
+        state = bytearray(len(self.starts))
+        back_edges = []
+        for root in range(len(self.starts)):
+            if state[root]:
+                continue
+            state[root] = 1
+            stack = [(root, 0)]
+            while stack:
+                b, next_edge = stack[-1]
+                succs = self.succs[b]
+                if next_edge < len(succs):
+                    stack[-1] = (b, next_edge + 1)
+                    s = succs[next_edge]
+                    if state[s] == 1:
+                        back_edges.append((b, s))
+                    elif not state[s]:
+                        state[s] = 1
+                        stack.append((s, 0))
+                else:
+                    state[b] = 2
+                    stack.pop()
+        return back_edges
+
+    def block_at(self, pc: int) -> Optional[int]:
+        """Index of the block containing `pc`, or None outside the image."""
+        index = (pc - self.base) >> 2
+        if pc & 3 or not 0 <= index < self.count:
+            return None
+        return self.block_of[index]
+
+    def block_pc(self, b: int) -> Tuple[int, int]:
+        """Byte range [start, end) of block `b`."""
+        return self.base + 4 * self.starts[b], self.base + 4 * self.ends[b]
+
+    def loop_blocks(self, header: int, latch: int) -> List[int]:
+        """Blocks of the natural loop of back edge latch -> header, in order."""
+        body = {header, latch}
+        work = [latch] if latch != header else []
+        while work:
+            b = work.pop()
+            for p in self.preds[b]:
+                if p not in body:
+                    body.add(p)
+                    work.append(p)
+        return sorted(body)
+
+    def to_dot(self, name: str = 'cfg') -> str:
+        """Graphviz DOT source; back edges are dashed and loop headers doubled."""
+        back = set(self.back_edges)
+        lines = [f'digraph {name} {{', '  node [shape=box, fontname="monospace"];']
+        for b in range(len(self.starts)):
+            start, end = self.block_pc(b)
+            shape = ', peripheries=2' if b in self.loop_headers else ''
+            lines.append(f'  b{b} [label="B{b}\\n0x{start:04x}-0x{end - 4:04x}"{shape}];')
+        for b, succs in enumerate(self.succs):
+            for s in succs:
+                style = ' [style=dashed]' if (b, s) in back else ''
+                lines.append(f'  b{b} -> b{s}{style};')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
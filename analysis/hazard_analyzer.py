@@ -0,0 +1,197 @@
+# analysis/hazard_analyzer.py
+"""Static hazard analysis for the 5-stage pipeline.
+
+Predicts, without simulating, the load-use stalls and branch flush penalties
+`pipeline.pipeline.Pipeline` incurs for an assembled program:
+
+- a load (or TAS) followed immediately by an instruction that reads its
+  destination stalls that instruction for LOAD_USE_STALL cycle (the
+  scoreboard forwards loaded values from the next cycle on, so a gap of one
+  instruction is enough);
+- a multiply or divide result (including HI/LO for MFHI/MFLO) is consumable
+  only once the `execute.muldiv_unit.MulDivUnit` completes it, and a
+  multiply/divide meeting a busy unit waits for it;
+- a taken branch or jump is resolved in EX and flushes the two younger
+  instructions, costing BRANCH_PENALTY cycles. The two bubbles also hide any
+  load-use hazard across the taken edge.
+
+A straight-line run of n instructions with s stalls therefore finishes its
+last writeback in n + s + 4 cycles, and a single-path loop costs its body
+length plus stalls plus BRANCH_PENALTY per iteration. Loops containing a
+multiply or divide are not predicted, since their results may be consumed
+across the back edge. Blocks, edges and loops come from `analysis.cfg.CFG`.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from decoder.decoder import decode
+from execute.muldiv_unit import MulDivUnit, MULDIV_OPS, DIV_OPS
+from pipeline.hazards import MEM_RESULT_OPS
+from .cfg import CFG, PLAIN
+
+LOAD_USE_STALL = 1
+BRANCH_PENALTY = 2
+PIPELINE_FILL = 4  # cycles from the last instruction's IF to its WB
+
+
+@dataclass
+class InstrInfo:
+    index: int
+    pc: int
+    op: str
+    block: int = 0
+    stall: int = 0                  # load-use stall cycles on the fall-through path
+    flush: int = 0                  # penalty paid when this branch/jump is taken
+    sources: Dict[int, Optional[int]] = field(default_factory=dict)  # reg -> defining index in block (None = live-in)
+    uses: List[int] = field(default_factory=list)  # later instructions in the block reading this result
+
+
+@dataclass
+class BasicBlock:
+    index: int
+    start: int                      # first instruction index
+    end: int                        # one past the last instruction index
+    successors: List[int] = field(default_factory=list)  # block indices (unknown targets omitted)
+    stalls: int = 0
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+
+@dataclass
+class Loop:
+    header: int                     # block index of the loop header
+    latch: int                      # block index at the source of the back edge
+    branch: int                     # instruction index ending the latch (-1 if it falls through)
+    blocks: List[int] = field(default_factory=list)
+    single_path: bool = True        # every iteration follows the same blocks
+    cycles_per_iteration: int = 0   # only computed for single-path loops without multiply/divide
+
+
+@dataclass
+class HazardReport:
+    instructions: List[InstrInfo]
+    blocks: List[BasicBlock]
+    loops: List[Loop]
+
+    @property
+    def stalls(self) -> int:
+        return sum(info.stall for info in self.instructions)
+
+    def straight_line_cycles(self) -> int:
+        """Cycles until the last instruction writes back, if no branch is taken."""
+        return len(self.instructions) + self.stalls + PIPELINE_FILL
+
+    def block_cycles(self, block: BasicBlock, taken: bool = False) -> int:
+        """Issue cycles of one pass through `block` entered by fall-through.
+
+        With `taken`, the block's final branch is taken and its flush penalty
+        is added.
+        """
+        cycles = block.size + block.stalls
+        if taken:
+            cycles += self.instructions[block.end - 1].flush
+        return cycles
+
+
+def analyze(words: List[int], base: int = 0, cfg: Optional[CFG] = None,
+            muldiv: Optional[MulDivUnit] = None) -> HazardReport:
+    """Analyze machine words laid out from byte address `base`.
+
+    Pass `cfg` to reuse a graph already built for the same image, and
+    `muldiv` for the multiply/divide timing of the simulated pipeline (the
+    `MulDivUnit` defaults otherwise; only its latencies are read).
+    """
+    if muldiv is None:
+        muldiv = MulDivUnit()
+    if cfg is None:
+        cfg = CFG(words, base)
+    decoded = [decode(word, pc=base + 4 * i) for i, word in enumerate(words)]
+    infos = [InstrInfo(index=i, pc=base + 4 * i, op=dec.op, block=cfg.block_of[i])
+             for i, dec in enumerate(decoded)]
+    blocks = [BasicBlock(index=b, start=cfg.starts[b], end=cfg.ends[b], successors=list(cfg.succs[b]))
+              for b in range(len(cfg))]
+
+    for block in blocks:
+        if cfg.kinds[block.index] != PLAIN:
+            infos[block.end - 1].flush = BRANCH_PENALTY
+
+        # Def-use chains within the block
+        last_def: Dict[int, int] = {}
+        for i in range(block.start, block.end):
+            dec = decoded[i]
+            reads = dec.reads
+            while reads:
+                bit = reads & -reads
+                reads ^= bit
+                reg = bit.bit_length() - 1
+                producer = last_def.get(reg)
+                infos[i].sources[reg] = producer
+                if producer is not None:
+                    infos[producer].uses.append(i)
+            writes = dec.writes
+            while writes:
+                bit = writes & -writes
+                writes ^= bit
+                last_def[bit.bit_length() - 1] = i
+
+    # Stalls on fall-through edges (a load never ends a taken path): issue
+    # each instruction in EX one cycle after the previous one, or once its
+    # sources are consumable and the multiply/divide unit is free
+    ready: Dict[int, int] = {}      # reg -> first cycle its newest value can be consumed
+    busy_until = 0
+    issue = -1
+    for i, dec in enumerate(decoded):
+        start = issue + 1
+        reads = dec.reads
+        while reads:
+            bit = reads & -reads
+            reads ^= bit
+            start = max(start, ready.get(bit.bit_length() - 1, 0))
+        if dec.op in MULDIV_OPS:
+            start = max(start, busy_until)
+            done = start + (muldiv.div_latency if dec.op in DIV_OPS else muldiv.mul_latency) - 1
+            if dec.op in DIV_OPS or not muldiv.pipelined:
+                busy_until = done + 1
+            available = done + 1
+        elif dec.op in MEM_RESULT_OPS:
+            available = start + 1 + LOAD_USE_STALL
+        else:
+            available = start + 1
+        writes = dec.writes
+        while writes:
+            bit = writes & -writes
+            writes ^= bit
+            ready[bit.bit_length() - 1] = available
+        stall = start - issue - 1
+        infos[i].stall = stall
+        blocks[infos[i].block].stalls += stall
+        issue = start
+
+    # Loops: one per CFG back edge. A loop is single-path when every body
+    # block has exactly one successor inside the body; its iteration then
+    # pays the flush of each taken edge, and a block entered through a taken
+    # edge has its fall-through stall hidden by the bubbles.
+    loops: List[Loop] = []
+    for latch, header in cfg.back_edges:
+        body = cfg.loop_blocks(header, latch)
+        in_body = set(body)
+        branch = cfg.ends[latch] - 1 if cfg.kinds[latch] != PLAIN else -1
+        loop = Loop(header=header, latch=latch, branch=branch, blocks=body)
+        cycles = 0
+        for b in body:
+            nexts = [s for s in cfg.succs[b] if s in in_body]
+            if len(nexts) != 1:
+                loop.single_path = False
+                break
+            cycles += blocks[b].size + blocks[b].stalls
+            target = cfg.targets[b]
+            if target >= 0 and cfg.block_of[target] == nexts[0]:  # stays in the loop by a taken edge
+                cycles += infos[cfg.ends[b] - 1].flush - infos[target].stall
+        muldiv_in_body = any(decoded[i].op in MULDIV_OPS for b in body for i in range(cfg.starts[b], cfg.ends[b]))
+        if loop.single_path and not muldiv_in_body:
+            loop.cycles_per_iteration = cycles
+        loops.append(loop)
+
+    return HazardReport(instructions=infos, blocks=blocks, loops=loops)
@@ -26,7 +26,11 @@ class DecodedInstruction:
         # Immediate / addressing
         imm=None,           # Sign/zero-extended immediate
         address=None,       # Raw jump address field
-        target=None         # Fully resolved PC-relative/absolute target
+        target=None,        # Fully resolved PC-relative/absolute target
+
+        # Register usage bitmasks (bit n = $n; $0 never appears)
+        reads=0,            # Registers read as operands
+        writes=0            # Registers written back
     ):
         self.op = op
         self.type = instr_type
@@ -42,6 +46,9 @@ class DecodedInstruction:
         self.address = address
         self.target = target
 
+        self.reads = reads
+        self.writes = writes
+
     def __repr__(self):
     
         #Full visibility of decoded word for debugging pipelines.
@@ -78,6 +85,25 @@ def sign_extend_16_zero(v: int) -> int:
     return v & 0xFFFF
 
 
+# ============================================================
+# Register usage masks
+# ============================================================
+
+# HI/LO, written by the multiply/divide unit, are numbered after the 32 GPRs
+HI = 32
+LO = 33
+
+
+def reg_mask(*regs) -> int:
+    # Bitmask of the given register numbers; None and $0 are skipped
+    # because $0 never carries a dependence.
+    mask = 0
+    for reg in regs:
+        if reg:
+            mask |= 1 << reg
+    return mask
+
+
 # ============================================================
 # Decoder
 # ============================================================
@@ -118,19 +144,68 @@ def decode(instruction: int, pc: int = 0) -> DecodedInstruction:
             # Control
             0x08: "JR",
             0x09: "JALR",
+
+            # Multiply/divide (results in HI/LO)
+            0x10: "MFHI",
+            0x12: "MFLO",
+            0x18: "MULT",
+            0x19: "MULTU",
+            0x1A: "DIV",
+            0x1B: "DIVU",
         }
 
         if funct not in r_type_map:
             raise ValueError(f"Illegal R-type funct {funct}")
 
+        op = r_type_map[funct]
+        if op in ("SLL", "SRL", "SRA"):
+            reads, writes = reg_mask(rt), reg_mask(rd)
+        elif op == "JR":
+            reads, writes = reg_mask(rs), 0
+        elif op == "JALR":
+            reads, writes = reg_mask(rs), reg_mask(rd)
+        elif op in ("MULT", "MULTU", "DIV", "DIVU"):
+            reads, writes = reg_mask(rs, rt), reg_mask(HI, LO)
+        elif op in ("MFHI", "MFLO"):
+            # The source is HI/LO, presented to the pipeline as rs
+            rs = HI if op == "MFHI" else LO
+            reads, writes = reg_mask(rs), reg_mask(rd)
+        else:
+            reads, writes = reg_mask(rs, rt), reg_mask(rd)
+
         return DecodedInstruction(
-            op=r_type_map[funct],
+            op=op,
             instr_type="R",
             rs=rs,
             rt=rt,
             rd=rd,
             shamt=shamt,
-            funct=funct
+            funct=funct,
+            reads=reads,
+            writes=writes
+        )
+
+    # ========================================================
+    # SPECIAL2 (opcode = 0x1C): three-operand MUL
+    # ========================================================
+    elif opcode == 0x1C:
+        rs = (instruction >> 21) & 0x1F
+        rt = (instruction >> 16) & 0x1F
+        rd = (instruction >> 11) & 0x1F
+        funct = instruction & 0x3F
+        if funct != 0x02:
+            raise ValueError(f"Illegal SPECIAL2 funct {funct}")
+
+        return DecodedInstruction(
+            op="MUL",
+            instr_type="R",
+            rs=rs,
+            rt=rt,
+            rd=rd,
+            shamt=0,
+            funct=funct,
+            reads=reg_mask(rs, rt),
+            writes=reg_mask(rd)
         )
 
     # ========================================================
@@ -144,7 +219,8 @@ def decode(instruction: int, pc: int = 0) -> DecodedInstruction:
         0x23,  # LW
         0x28,  # SB
         0x29,  # SH
-        0x2B   # SW
+        0x2B,  # SW
+        0x38   # TAS (atomic test-and-set)
     ):
         rs = (instruction >> 21) & 0x1F
         rt = (instruction >> 16) & 0x1F
@@ -159,14 +235,23 @@ def decode(instruction: int, pc: int = 0) -> DecodedInstruction:
             0x28: "SB",
             0x29: "SH",
             0x2B: "SW",
+            0x38: "TAS",
         }
 
+        # Stores read the value in rt; loads and TAS write it
+        if opcode in (0x28, 0x29, 0x2B):
+            reads, writes = reg_mask(rs, rt), 0
+        else:
+            reads, writes = reg_mask(rs), reg_mask(rt)
+
         return DecodedInstruction(
             op=op_map[opcode],
             instr_type="I",
             rs=rs,
             rt=rt,
-            imm=imm
+            imm=imm,
+            reads=reads,
+            writes=writes
         )
 
     # ========================================================
@@ -198,13 +283,17 @@ def decode(instruction: int, pc: int = 0) -> DecodedInstruction:
             0x13: "BGT",     # > (pseudo)
         }
 
+        # BLEZ/BGTZ compare rs against zero
+        reads = reg_mask(rs) if opcode in (0x06, 0x07) else reg_mask(rs, rt)
+
         return DecodedInstruction(
             op=branch_map[opcode],
             instr_type="I",
             rs=rs,
             rt=rt,
             imm=imm,
-            target=target
+            target=target,
+            reads=reads
         )
 
     # ========================================================
@@ -240,7 +329,9 @@ def decode(instruction: int, pc: int = 0) -> DecodedInstruction:
             instr_type="I",
             rs=rs,
             rt=rt,
-            imm=imm_func(imm_raw)
+            imm=imm_func(imm_raw),
+            reads=reg_mask(rs),
+            writes=reg_mask(rt)
         )
 
     # ========================================================
@@ -254,7 +345,8 @@ def decode(instruction: int, pc: int = 0) -> DecodedInstruction:
             op="J" if opcode == 0x02 else "JAL",
             instr_type="J",
             address=address,
-            target=target
+            target=target,
+            writes=reg_mask(31) if opcode == 0x03 else 0  # JAL links $31
         )
 
     # ========================================================
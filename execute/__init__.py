@@ -1,6 +1,7 @@
 #execute/__init__.py
-from .alu import alu
+from .alu import alu, muldiv
 from .branch_unit import branch
 from .load_store_unit import load_store
+from .muldiv_unit import MulDivUnit
 
-__all__ = ["alu", "branch", "load_store"]
\ No newline at end of file
+__all__ = ["alu", "muldiv", "branch", "load_store", "MulDivUnit"]
\ No newline at end of file
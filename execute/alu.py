@@ -1,14 +1,18 @@
 #execute/alu.py
+from typing import Tuple
+
+from state.registers import wrap32
 
 
 def alu(op: str, a: int, b: int, shamt: int = 0) -> int:
     """
     Arithmetic Logic Unit (ALU).
     Executes R-type and I-type arithmetic/logic instructions.
+    ADD/SUB wrap to signed 32-bit like the register file they feed.
     """
-    if op == "ADD": return a + b
+    if op == "ADD": return wrap32(a + b)
     if op == "ADDU": return (a + b) & 0xFFFFFFFF
-    if op == "SUB": return a - b
+    if op == "SUB": return wrap32(a - b)
     if op == "SUBU": return (a - b) & 0xFFFFFFFF
     if op == "AND": return a & b
     if op == "OR":  return a | b
@@ -19,4 +23,31 @@ def alu(op: str, a: int, b: int, shamt: int = 0) -> int:
     if op == "SLL": return (b << shamt) & 0xFFFFFFFF
     if op == "SRL": return (b & 0xFFFFFFFF) >> shamt
     if op == "SRA": return b >> shamt
-    raise ValueError(f"Unsupported ALU op {op}")
\ No newline at end of file
+    if op == "MUL": return muldiv("MULT", a, b)[1]
+    raise ValueError(f"Unsupported ALU op {op}")
+
+
+def muldiv(op: str, a: int, b: int) -> Tuple[int, int]:
+    """
+    Multiply/divide for the HI/LO register pair; returns (hi, lo) as signed 32-bit values.
+    MULT/MULTU: HI:LO = 64-bit product. DIV/DIVU: LO = quotient (truncated
+    toward zero), HI = remainder (sign of the dividend). Division by zero
+    leaves quotient -1 and remainder a (the architecture leaves it undefined).
+    """
+    if op in ("MULTU", "DIVU"):
+        a &= 0xFFFFFFFF
+        b &= 0xFFFFFFFF
+    else:
+        a = wrap32(a)
+        b = wrap32(b)
+    if op in ("MULT", "MULTU"):
+        product = a * b
+        return wrap32(product >> 32), wrap32(product)
+    if op in ("DIV", "DIVU"):
+        if b == 0:
+            return wrap32(a), -1
+        quotient = abs(a) // abs(b)
+        if (a < 0) != (b < 0):
+            quotient = -quotient
+        return wrap32(a - quotient * b), wrap32(quotient)
+    raise ValueError(f"Unsupported multiply/divide op {op}")
\ No newline at end of file
@@ -11,7 +11,8 @@ def _sign_extend(value: int, bits: int) -> int:
 # Load/Store Unit.
 # Executes memory access instructions. Returns the loaded value for loads,
 # and None for stores.
-# Supported ops: LW, SW, LB, LBU, LH, LHU, SB, SH
+# Supported ops: LW, SW, LB, LBU, LH, LHU, SB, SH, and TAS (returns the old
+# word and sets it to 1 in one access)
 def load_store(op: str, memory, addr: int, rt_val: Optional[int] = None) -> Optional[int]:
     # Validate that store operations include a value for rt_val
     if op in ('SW', 'SB', 'SH') and rt_val is None:
@@ -47,5 +48,11 @@ def load_store(op: str, memory, addr: int, rt_val: Optional[int] = None) -> Opti
         memory.store_half(addr, rt_val)
         return None
 
+    # Atomic test-and-set
+    if op == 'TAS':
+        val = memory.load_word(addr)
+        memory.store_word(addr, 1)
+        return val
+
     # Extend later: other memory ops
     raise ValueError(f'Unsupported memory op {op}')
\ No newline at end of file
@@ -0,0 +1,49 @@
+#execute/muldiv_unit.py
+
+MUL_OPS = ('MULT', 'MULTU', 'MUL')
+DIV_OPS = ('DIV', 'DIVU')
+MULDIV_OPS = MUL_OPS + DIV_OPS
+
+
+class MulDivUnit:
+    """Timing of the multiply/divide unit next to the ALU.
+
+    Values are computed in EX like any other result (`execute.alu.muldiv`);
+    this unit only decides when they can be consumed. A multiply started in
+    cycle c completes in cycle c + mul_latency - 1, a divide in
+    c + div_latency - 1, and `Pipeline` records that cycle in the scoreboard
+    so dependent instructions stall in the hazard unit.
+
+    The multiplier is pipelined (a new multiply may start every cycle) unless
+    `pipelined=False`; the divider is iterative and occupies the unit until
+    it completes. A MULT/DIV meeting a busy unit waits in ID/EX (a
+    structural stall, counted in `busy_stalls`).
+    """
+
+    def __init__(self, mul_latency: int = 4, div_latency: int = 12, pipelined: bool = True):
+        if mul_latency < 1 or div_latency < 1:
+            raise ValueError('Multiply and divide latencies must be at least 1 cycle')
+        self.mul_latency = mul_latency
+        self.div_latency = div_latency
+        self.pipelined = pipelined
+        self.busy_until = 0  # first cycle a new operation may start
+
+        self.multiplies = 0
+        self.divides = 0
+        self.busy_stalls = 0
+
+    def can_issue(self, cycle: int) -> bool:
+        return cycle >= self.busy_until
+
+    def issue(self, op: str, cycle: int) -> int:
+        """Start `op` in `cycle`; return the cycle its result is computed."""
+        if op in DIV_OPS:
+            self.divides += 1
+            done = cycle + self.div_latency - 1
+            self.busy_until = done + 1
+        else:
+            self.multiplies += 1
+            done = cycle + self.mul_latency - 1
+            if not self.pipelined:
+                self.busy_until = done + 1
+        return done
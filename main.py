@@ -25,8 +25,25 @@ from pathlib import Path
 from parser.lexer import Lexer
 from parser.asm_parser import Parser
 from parser.assembler import Assembler
+from parser.scheduler import schedule, fill_delay_slots
 from state.cpu_state import CPUstate
+from state.watchpoints import Watchpoints
+from state.cache import Cache, POLICIES
+from state.prefetcher import StridePrefetcher
+from state.store_buffer import StoreBuffer
+from state.memory_latency import MemoryLatency
+from state.memory_system import MemorySystem
+from state.registers import NUM_REGS
+from decoder.decoder import HI, LO
+from execute.muldiv_unit import MulDivUnit
 from pipeline.pipeline import Pipeline
+from pipeline.superscalar import DualIssuePipeline, PAIR_FAILURES
+from pipeline.tomasulo import TomasuloPipeline
+from pipeline.multithread import MultithreadedPipeline, make_threads
+from pipeline.multicore import Multicore
+from state.coherence import TRANSACTIONS
+from analysis.stack_distance import AccessTrace, sweep
+from pipeline.branch_predictor import PREDICTORS, make_predictor, ReturnAddressStack
 from utils.logger import print_pipeline_state, print_pipeline_summary
 
 
@@ -54,7 +71,7 @@ def load_assembly_file(filepath):
         sys.exit(1)
 
 
-def assemble_program(asm_source):
+def assemble_program(asm_source, schedule_code=False, delay_slots=False):
     """Assemble DLX assembly code into machine instructions.
     
     The assembly pipeline is:
@@ -68,6 +85,14 @@ def assemble_program(asm_source):
        - Tracks label definitions and their positions
        - Example: → Instruction(mnemonic='ADDI', operands=['$1', '$0', '5'], label=None)
     
+    2b. Scheduler (only with schedule_code=True): reorder independent
+       instructions within basic blocks to hide load-use stalls, printing the
+       stalls removed per block (see parser/scheduler.py)
+    
+    2c. Delay-slot filler (only with delay_slots=True): give every branch a
+       delay slot, moving an independent earlier instruction into it or
+       inserting a NOP
+    
     3. Assembler: Convert Instruction objects to 32-bit machine code
        - Maps mnemonics to opcodes/functs from OPCODES/FUNCTS tables
        - Encodes register fields, immediates, addresses
@@ -77,6 +102,8 @@ def assemble_program(asm_source):
     
     Args:
         asm_source (str): Assembly code as string
+        schedule_code (bool): Run the load-use scheduling pass before assembling
+        delay_slots (bool): Lay the program out for delay-slot execution
         
     Returns:
         tuple: (machine_code: List[int], has_halt: bool)
@@ -96,6 +123,23 @@ def assemble_program(asm_source):
         parser = Parser(tokens)
         instructions = parser.parse()
         
+        # Optional: hide load-use stalls by reordering within basic blocks
+        if schedule_code:
+            instructions, blocks = schedule(instructions)
+            for block in blocks:
+                if block.stalls_removed:
+                    print(f"  Scheduled block {block.start}-{block.end - 1}: "
+                          f"{block.stalls_removed} stall(s) removed "
+                          f"({block.stalls_before} -> {block.stalls_after})")
+            total = sum(block.stalls_removed for block in blocks)
+            print(f"  Scheduler removed {total} load-use stall(s) in {len(blocks)} block(s)")
+        
+        # Optional: fill branch delay slots
+        if delay_slots:
+            instructions, slots = fill_delay_slots(instructions)
+            filled = sum(slot.filler is not None for slot in slots)
+            print(f"  Filled {filled} of {len(slots)} delay slot(s) ({len(slots) - filled} NOP(s) inserted)")
+        
         # Step 3: Assemble instructions to machine code
         assembler = Assembler(instructions)
         machine_code = assembler.assemble()
@@ -113,7 +157,62 @@ def assemble_program(asm_source):
         sys.exit(1)
 
 
-def run_simulation(machine_code, num_cycles, verbose, halt_on_zero, has_halt):
+def make_pipeline(args, trace=None, **overrides):
+    """Build the pipeline the command line selects.
+    
+    Every call builds fresh predictor, cache and multiply/divide state, so
+    comparison runs do not share statistics with the main run.
+    
+    Args:
+        args (argparse.Namespace): Parsed command line (see main())
+        trace (AccessTrace): Record fetch and data addresses for a cache sweep
+        **overrides: `Pipeline` arguments replacing those taken from `args`
+            (the scalar pipeline only; e.g. fetch_queue=0 for the unqueued run)
+    
+    Returns:
+        Pipeline: a `TomasuloPipeline` for --ooo, a `DualIssuePipeline` for
+        --dual-issue, otherwise the scalar pipeline
+    """
+    predictor = make_predictor(args.predictor) if args.predictor else None
+    muldiv = MulDivUnit(mul_latency=args.mul_latency, div_latency=args.div_latency,
+                        pipelined=not args.iterative_mul)
+    if args.ooo:
+        return TomasuloPipeline(rob_size=args.rob_size, rs_size=args.rs_size, width=args.ooo_width,
+                                alu_units=args.ooo_width, cdb_width=args.ooo_width,
+                                predictor=predictor, muldiv=muldiv)
+    ras = ReturnAddressStack(args.ras_depth) if args.ras_depth else None
+    if args.dual_issue:
+        return DualIssuePipeline(predictor=predictor, ras=ras, muldiv=muldiv, memory_ports=args.memory_ports)
+    icache, dcache = cache_options(args)
+    l1d = Cache(name='L1D', **dcache) if dcache else None
+    memory_latency = None
+    if args.mem_latency != 1 or args.mem_region:
+        memory_latency = MemoryLatency(args.mem_latency)
+        for start, end, read_cycles, write_cycles in args.mem_region:
+            memory_latency.add_region(start, end, read_cycles, write_cycles)
+    memory_system = MemorySystem(
+        icache=Cache(name='L1I', **icache) if icache else None,
+        dcache=l1d,
+        prefetcher=(StridePrefetcher(l1d, degree=args.prefetch_degree, distance=args.prefetch_distance)
+                    if args.prefetch_degree else None),
+        store_buffer=StoreBuffer(args.store_buffer) if args.store_buffer else None,
+        memory_latency=memory_latency)
+    options = dict(early_branch=args.early_branch, predictor=predictor, ras=ras, delay_slot=args.delay_slot,
+                   memory_system=memory_system, trace=trace, muldiv=muldiv,
+                   fetch_queue=args.fetch_queue, fetch_width=args.fetch_width)
+    return Pipeline(**dict(options, **overrides))
+
+
+def cache_options(args):
+    """Return the `state.cache.Cache` arguments for the L1 I- and D-caches (None when not requested)."""
+    timing = dict(hit_latency=args.hit_latency, miss_latency=args.miss_latency)
+    icache = dict(args.icache, **timing) if args.icache else None
+    dcache = dict(args.dcache, write_back=not args.write_through, **timing) if args.dcache else None
+    return icache, dcache
+
+
+def run_simulation(machine_code, pipeline, num_cycles, verbose, halt_on_zero, has_halt, unified_memory=False,
+                   watches=()):
     """Execute the pipeline simulation with support for HALT instruction flushing.
     
     Simulation Flow:
@@ -136,26 +235,43 @@ def run_simulation(machine_code, num_cycles, verbose, halt_on_zero, has_halt):
     - PC goes out of bounds and has_halt=True, plus 5 flush cycles (normal completion)
     - --halt-on-zero flag set and $31 (return register) == 0
     
+    The out-of-order model commits in program order, so its run ends when the
+    committed PC leaves the program and no flush cycles are needed.
+    
     Args:
         machine_code (list): List of 32-bit instruction words
+        pipeline (Pipeline): Pipeline to run (see make_pipeline())
         num_cycles (int): Maximum cycles to run before halt (not counting flush cycles)
         verbose (bool): Print detailed pipeline state each cycle
         halt_on_zero (bool): Stop if $31 becomes 0
         has_halt (bool): True if program contains HALT instruction (enables 5-cycle flush)
+        unified_memory (bool): Fetch from data memory instead of the predecoded
+            instruction store (needed to observe self-modifying code the slow way)
+        watches (list): (start, end, kind) memory ranges; the run stops on the
+            first matching access (see state/watchpoints.py)
+        
+    Cache misses make some pipeline steps cover several cycles, so the cycle
+    count is taken from `pipeline.cycle` rather than from the number of steps.
+    A store buffer is drained when the run ends.
         
     Returns:
         tuple: (cycle_count, halt_reason, cpu_state, pipeline)
     """
     # Initialize CPU state
     cpu = CPUstate()
-    pipeline = Pipeline()
     
     # Load machine code into memory at address 0x0
-    # Each instruction is 4 bytes (word-aligned)
-    for idx, instruction in enumerate(machine_code):
-        addr = idx * 4
-        # Store as 32-bit word (byte order: big-endian by convention)
-        cpu.memory.store_word(addr, instruction)
+    # Each instruction is 4 bytes (word-aligned, big-endian). Unless unified
+    # memory is requested, IF/ID read predecoded records from cpu.imem.
+    cpu.load_program(machine_code, base=0, predecode=not unified_memory)
+    
+    # Watchpoints are installed only when requested, so normal runs keep the
+    # unwatched memory fast path
+    watchpoints = None
+    if watches:
+        watchpoints = Watchpoints(cpu.memory, pipeline)
+        for start, end, kind in watches:
+            watchpoints.add(start, end, kind, stop=True)
     
     halt_reason = None
     cycle_count = 0
@@ -163,12 +279,11 @@ def run_simulation(machine_code, num_cycles, verbose, halt_on_zero, has_halt):
     
     # Simulation loop: run until halt condition or max cycles reached
     try:
-        for cycle in range(num_cycles):
-            cycle_count = cycle + 1
-            
-            # Run one pipeline cycle
+        while pipeline.cycle < num_cycles:
+            # Run one pipeline cycle (more than one if a D-cache miss froze the pipeline)
             # This executes all 5 stages, detects hazards, applies forwarding, flushes on branch
             pipeline.step(cpu)
+            cycle_count = pipeline.cycle
             
             # Log pipeline state each cycle (if verbose mode enabled)
             # Passes previous CPU state so logger can show register deltas
@@ -181,17 +296,37 @@ def run_simulation(machine_code, num_cycles, verbose, halt_on_zero, has_halt):
             prev_cpu_state = copy(cpu)
             prev_cpu_state.registers = copy(cpu.registers)
             
+            # Check watchpoints: stop on the first hit
+            if watchpoints is not None and watchpoints.triggered is not None:
+                hit = watchpoints.triggered
+                halt_reason = (f"watchpoint ({'read' if hit.kind == 'r' else 'write'} "
+                               f"[0x{hit.address:04x}] = {hit.value} by PC 0x{hit.pc:04x} "
+                               f"in cycle {hit.cycle})")
+                break
+            
             # Check halt condition: $31 (return address register) == 0
             if halt_on_zero and cpu.registers.read(31) == 0:
                 halt_reason = "halt-on-zero ($31 == 0)"
                 break
             
+            # Out-of-order: done once every instruction up to the end has committed
+            if isinstance(pipeline, TomasuloPipeline):
+                if pipeline.arch_pc == len(machine_code) * 4:
+                    halt_reason = ("halt-complete (all instructions committed)" if has_halt
+                                   else "program-counter-end (normal completion)")
+                    break
+                if 0 <= pipeline.arch_pc < len(machine_code) * 4:
+                    continue
+                halt_reason = f"invalid-pc ({pipeline.arch_pc:#x})"
+                break
+            
             # Check PC bounds: if PC points outside program, halt
             if cpu.pc < 0 or cpu.pc >= len(machine_code) * 4:
                 # PC is out of bounds = we've tried to fetch beyond the program
-                if cpu.pc == len(machine_code) * 4:
-                    # Normal case: PC is exactly at end of program
+                if cpu.pc < (len(machine_code) + max(pipeline.width, pipeline.fetch_width)) * 4:
+                    # Normal case: PC is at end of program
                     # This happens when last instruction's fetch incremented PC
+                    # (a wide pipeline or fetch group may fetch past it in the same cycle)
                     if has_halt:
                         # HALT instruction present: run 5 more cycles to flush pipeline
                         halt_reason = "reached-halt (flushing pipeline)"
@@ -216,16 +351,36 @@ def run_simulation(machine_code, num_cycles, verbose, halt_on_zero, has_halt):
             print("PIPELINE FLUSH PHASE: Running 5 additional cycles")
             print("(All in-flight instructions will complete their WB stage)")
             print("="*70)
-        for flush_cycle in range(5):
-            cycle_count += 1
+        # Stalled steps (e.g., waiting on a long divide) do not advance the pipeline
+        flush_steps = 5
+        while flush_steps:
+            stalls = pipeline.stalls
+            # Fetch may have run ahead of decode: program instructions still queued
+            queued = pipeline.fetch_queue and any(if_id.pc < len(machine_code) * 4
+                                                  for if_id in pipeline.fetch_queue)
             pipeline.step(cpu)
+            cycle_count = pipeline.cycle
+            if pipeline.stalls == stalls:
+                flush_steps -= 1
             if verbose:
                 print_pipeline_state(pipeline, cpu, cycle_count, prev_cpu_state=prev_cpu_state, detailed=False)
                 from copy import copy
                 prev_cpu_state = copy(cpu)
                 prev_cpu_state.registers = copy(cpu.registers)
+            if cpu.pc < len(machine_code) * 4 and pipeline.cycle < num_cycles:
+                # A branch still in flight sent fetch back into the program
+                # (the HALT was fetched on the wrong path): keep running
+                flush_steps = 5
+            elif queued and pipeline.cycle < num_cycles:
+                # The flush starts once the last of them has left the queue
+                flush_steps = 5
         halt_reason = "halt-complete (pipeline flushed)"
     
+    # Stores still in the store buffer reach memory before the final state is shown
+    if pipeline.memory_system.store_buffer is not None:
+        pipeline.drain_stores(cpu)
+        cycle_count = pipeline.cycle
+    
     # If no halt reason set, we hit max cycles
     if halt_reason is None:
         halt_reason = f"max-cycles-reached ({num_cycles})"
@@ -233,6 +388,58 @@ def run_simulation(machine_code, num_cycles, verbose, halt_on_zero, has_halt):
     return cycle_count, halt_reason, cpu, pipeline
 
 
+def parse_watch(spec):
+    """Parse a --watch value of the form START:END[:r|w|rw] (END exclusive)."""
+    parts = spec.split(':')
+    if len(parts) not in (2, 3):
+        raise argparse.ArgumentTypeError(f"expected START:END[:r|w|rw], got {spec!r}")
+    try:
+        start, end = int(parts[0], 0), int(parts[1], 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid address range: {spec!r}")
+    kind = parts[2] if len(parts) == 3 else 'rw'
+    if kind not in ('r', 'w', 'rw'):
+        raise argparse.ArgumentTypeError(f"invalid watch kind {kind!r} (use r, w or rw)")
+    if end <= start:
+        raise argparse.ArgumentTypeError(f"empty address range: {spec!r}")
+    return start, end, kind
+
+
+def parse_mem_region(spec):
+    """Parse a --mem-region value of the form START:END:CYCLES[:WRITE_CYCLES] (END exclusive)."""
+    parts = spec.split(':')
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError(f"expected START:END:CYCLES[:WRITE_CYCLES], got {spec!r}")
+    try:
+        start, end, read_cycles = (int(part, 0) for part in parts[:3])
+        write_cycles = int(parts[3], 0) if len(parts) == 4 else read_cycles
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid memory region: {spec!r}")
+    if end <= start:
+        raise argparse.ArgumentTypeError(f"empty address range: {spec!r}")
+    if read_cycles < 1 or write_cycles < 1:
+        raise argparse.ArgumentTypeError(f"latency must be at least 1 cycle: {spec!r}")
+    return start, end, read_cycles, write_cycles
+
+
+def parse_cache(spec):
+    """Parse a --icache/--dcache value of the form SIZE:LINE:WAYS[:lru|fifo|random]."""
+    parts = spec.split(':')
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError(f"expected SIZE:LINE:WAYS[:POLICY], got {spec!r}")
+    try:
+        size, line_size, assoc = (int(part, 0) for part in parts[:3])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid cache geometry: {spec!r}")
+    policy = parts[3] if len(parts) == 4 else 'lru'
+    config = dict(size=size, line_size=line_size, assoc=assoc, policy=policy)
+    try:
+        Cache(**config)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return config
+
+
 def print_final_state(cpu, cycle_count, halt_reason):
     """Print final register and memory state.
     
@@ -254,7 +461,7 @@ def print_final_state(cpu, cycle_count, halt_reason):
     # Print non-zero registers
     print("\nRegisters (non-zero):")
     has_nonzero_regs = False
-    for reg_idx in range(32):
+    for reg_idx in range(NUM_REGS):
         value = cpu.registers.read(reg_idx)
         if value != 0:
             reg_name = f"${reg_idx}"
@@ -262,7 +469,11 @@ def print_final_state(cpu, cycle_count, halt_reason):
                 reg_name = "$zero"
             elif reg_idx == 31:
                 reg_name = "$31 (RA)"
-            print(f"  {reg_name:10s} = 0x{value:08x} ({value})")
+            elif reg_idx == HI:
+                reg_name = "HI"
+            elif reg_idx == LO:
+                reg_name = "LO"
+            print(f"  {reg_name:10s} = 0x{value & 0xFFFFFFFF:08x} ({value})")
             has_nonzero_regs = True
     if not has_nonzero_regs:
         print("  (all registers are zero)")
@@ -271,7 +482,7 @@ def print_final_state(cpu, cycle_count, halt_reason):
     print("\nMemory (non-zero):")
     has_nonzero_mem = False
     # Memory is a byte array; check word-aligned locations
-    for addr in range(0, len(cpu.memory.mem), 4):
+    for addr in range(0, cpu.memory.size, 4):
         # Read as word (4 bytes)
         try:
             value = cpu.memory.load_word(addr)
@@ -286,6 +497,292 @@ def print_final_state(cpu, cycle_count, halt_reason):
     print("\n" + "="*60)
 
 
+def print_branch_stats(pipeline, cycle_count):
+    """Print predictor accuracy, mispredictions and CPI for a finished run."""
+    predictor = pipeline.predictor
+    cpi = cycle_count / pipeline.retired if pipeline.retired else 0.0
+    if predictor is not None:
+        print(f"\nBranch predictor: {predictor.name}")
+        print(f"  Branches:    {predictor.branches}")
+        print(f"  Mispredicts: {predictor.mispredicts}")
+        print(f"  Accuracy:    {predictor.accuracy:.1%}")
+    ras = pipeline.ras
+    if ras is not None:
+        print(f"\nReturn address stack (depth {ras.depth}):")
+        print(f"  Returns:     {ras.returns}")
+        print(f"  Mispredicts: {ras.mispredicts}")
+        print(f"  Accuracy:    {ras.accuracy:.1%}")
+    print(f"  CPI:         {cpi:.3f} ({pipeline.retired} instructions retired)")
+
+
+def print_cache_stats(pipeline):
+    """Print hit/miss statistics of each cache and the PCs that miss most."""
+    memory_system = pipeline.memory_system
+    for cache, stalls, label in ((memory_system.icache, pipeline.fetch_stalls, 'fetch bubbles'),
+                                 (memory_system.dcache, pipeline.memory_stalls, 'frozen cycles')):
+        if cache is None:
+            continue
+        write = ''
+        if cache is memory_system.dcache:
+            write = ', write-back' if cache.write_back else ', write-through'
+        print(f"\n{cache.name} cache ({cache.size} B, {cache.line_size} B lines, {cache.assoc}-way, "
+              f"{cache.policy}{write}):")
+        print(f"  Accesses:    {cache.accesses}")
+        print(f"  Hits:        {cache.hits}")
+        print(f"  Misses:      {cache.misses} ({cache.miss_rate:.1%})")
+        if cache is memory_system.dcache:
+            if cache.write_back:
+                print(f"  Writebacks:  {cache.writebacks}")
+            else:
+                print(f"  Mem writes:  {cache.memory_writes}")
+        print(f"  Stalls:      {stalls} ({label})")
+        prefetcher = memory_system.prefetcher
+        if cache is memory_system.dcache and prefetcher is not None:
+            print(f"  Prefetcher:  stride, degree {prefetcher.degree}, distance {prefetcher.distance}")
+            print(f"    Issued:      {prefetcher.issued}")
+            print(f"    Useful:      {prefetcher.useful} ({prefetcher.late} late)")
+            print(f"    Coverage:    {prefetcher.coverage:.1%}")
+            print(f"    Accuracy:    {prefetcher.accuracy:.1%}")
+            print(f"    Timeliness:  {prefetcher.timeliness:.1%}")
+            print(f"    Stall cycles saved: {prefetcher.cycles_saved}")
+        for pc, accesses, misses in cache.worst_pcs():
+            print(f"    PC 0x{pc:04x}: {misses} miss(es) in {accesses} access(es)")
+
+
+def print_cache_sweep(trace, line_sizes=(8, 16, 32), sizes=(64, 128, 256, 512, 1024, 2048),
+                      assocs=(1, 2, 4, 8)):
+    """Print LRU miss rates of every cache configuration for the recorded trace."""
+    for label, addresses in (('Instruction', trace.fetches), ('Data', trace.data)):
+        print(f"\n{label} cache sweep (LRU, {len(addresses)} accesses):")
+        if not addresses:
+            continue
+        points = sweep(addresses, line_sizes, sizes, assocs)
+        print(f"  {'size':>6} {'line':>5} " + ' '.join(f"{f'{a}-way':>7}" for a in assocs))
+        rows = {}
+        for point in points:
+            rows.setdefault((point.size, point.line_size), {})[point.assoc] = point.miss_rate
+        for (size, line_size), rates in rows.items():
+            cells = ' '.join(f"{rates[a]:7.1%}" if a in rates else f"{'-':>7}" for a in assocs)
+            print(f"  {size:>6} {line_size:>5} {cells}")
+
+
+def print_store_buffer_stats(store_buffer):
+    """Print store buffer occupancy, forwarding and full-buffer stalls."""
+    print(f"\nStore buffer ({store_buffer.entries} entries):")
+    print(f"  Stores:      {store_buffer.stores}")
+    print(f"  Occupancy:   {store_buffer.average_occupancy:.2f} average, {store_buffer.max_occupancy} max")
+    print(f"  Forwarded:   {store_buffer.forwarded} of {store_buffer.loads_searched} load(s) "
+          f"issued while stores were buffered")
+    print(f"  Full stalls: {store_buffer.full_stalls} cycle(s)")
+
+
+def print_memory_latency_stats(memory_latency, memory_stalls):
+    """Print accesses and wait cycles per memory latency region."""
+    print(f"\nMemory latency regions ({memory_stalls} cycle(s) frozen on data memory):")
+    for region in memory_latency.regions:
+        latency = (f"{region.read_latency}" if region.read_latency == region.write_latency
+                   else f"{region.read_latency}/{region.write_latency}")
+        print(f"  [0x{region.start:04x}, 0x{region.end:04x}) {latency:>5} cycle(s): "
+              f"{region.accesses} access(es), {region.wait_cycles} wait cycle(s)")
+    print(f"  default          {memory_latency.default:>5} cycle(s): "
+          f"{memory_latency.default_accesses} access(es), {memory_latency.default_wait_cycles} wait cycle(s)")
+
+
+def print_fetch_stats(pipeline, cycle_count, unqueued):
+    """Print fetch queue occupancy and fetch stalls against the same run without a queue."""
+    print(f"\nFetch queue ({pipeline.fetch_queue_depth} entries, "
+          f"{pipeline.fetch_width} instruction(s) fetched per cycle):")
+    print(f"  Occupancy:          {pipeline.average_queue_occupancy:.2f} average, "
+          f"{pipeline.max_queue_occupancy} max")
+    print(f"  Fetch blocked:      {pipeline.fetch_blocked} cycles (IF/ID and queue full)")
+    print(f"  I-cache bubbles:    {pipeline.fetch_stalls} cycles")
+    print(f"  Without the queue:  {unqueued.cycle} cycles, fetch blocked {unqueued.fetch_blocked}, "
+          f"I-cache bubbles {unqueued.fetch_stalls}")
+    print(f"  Cycles saved:       {unqueued.cycle - cycle_count}")
+
+
+def print_issue_stats(pipeline, cycle_count, scalar_cycles, scalar_retired):
+    """Print IPC, pairing rate and pair failures of a dual-issue run against the scalar pipeline."""
+    scalar_ipc = scalar_retired / scalar_cycles if scalar_cycles else 0.0
+    ipc = pipeline.retired / cycle_count if cycle_count else 0.0
+    print(f"\nDual issue ({pipeline.memory_ports} memory port(s)):")
+    print(f"  IPC:          {ipc:.3f} ({pipeline.retired} instructions in {cycle_count} cycles)")
+    print(f"  Scalar IPC:   {scalar_ipc:.3f} ({scalar_retired} instructions in {scalar_cycles} cycles)")
+    if cycle_count:
+        print(f"  Speedup:      {scalar_cycles / cycle_count:.2f}x")
+    print(f"  Pairing rate: {pipeline.pairing_rate:.1%} ({pipeline.dual_issues} of "
+          f"{pipeline.issue_cycles} issuing cycles)")
+    failures = sum(pipeline.pair_failures.values())
+    for reason, count in pipeline.pair_failures.most_common():
+        print(f"    {count:6d} ({count / failures:5.1%}) {reason}: {PAIR_FAILURES[reason]}")
+
+
+def run_inorder(machine_code, retired, max_cycles, unified_memory=False, predictor=None, muldiv=None):
+    """Run the in-order pipeline until it has retired `retired` instructions; return it.
+
+    Used as the reference for the out-of-order model, whose run ends when
+    the last instruction commits rather than after fixed flush cycles.
+    """
+    cpu = CPUstate()
+    cpu.load_program(machine_code, base=0, predecode=not unified_memory)
+    pipeline = Pipeline(predictor=make_predictor(predictor) if predictor else None,
+                        muldiv=MulDivUnit(**muldiv) if muldiv else None)
+    while pipeline.retired < retired and pipeline.cycle < max_cycles:
+        pipeline.step(cpu)
+    return pipeline
+
+
+def run_multithreaded(machine_code, threads, num_cycles, unified_memory=False, predictor=None, muldiv=None):
+    """Run the program in `threads` hardware threads sharing memory.
+
+    Every thread starts at address 0 with zeroed registers; the run ends when
+    each has fetched past the program and written back its last instruction.
+
+    Returns:
+        tuple: (cycle_count, halt_reason, thread CPUs, pipeline)
+    """
+    cpu = CPUstate()
+    cpu.load_program(machine_code, base=0, predecode=not unified_memory)
+    cpus = make_threads(cpu, threads)
+    pipeline = MultithreadedPipeline(threads, predictor=make_predictor(predictor) if predictor else None,
+                                     muldiv=MulDivUnit(**muldiv) if muldiv else None,
+                                     end_pc=len(machine_code) * 4)
+    halt_reason = None
+    try:
+        while pipeline.cycle < num_cycles:
+            pipeline.step(cpus)
+            if all(pipeline.finished(context, cpus[context.tid]) for context in pipeline.contexts):
+                halt_reason = "halt-complete (all threads finished)"
+                break
+    except Exception as e:
+        halt_reason = f"error: {e}"
+        print(f"ERROR during simulation: {e}", file=sys.stderr)
+    if halt_reason is None:
+        halt_reason = f"max-cycles-reached ({num_cycles})"
+    return pipeline.cycle, halt_reason, cpus, pipeline
+
+
+def run_multicore(machine_code, cores, num_cycles, unified_memory=False, predictor=None, muldiv=None,
+                  dcache=None, id_register=None):
+    """Run the program on `cores` cores sharing memory, with MSI-coherent L1 data caches if `dcache`.
+
+    Returns:
+        tuple: (cycle_count, halt_reason, Multicore)
+    """
+    system = Multicore(cores, dcache=dcache, id_register=id_register, end_pc=len(machine_code) * 4,
+                       predictor=predictor, muldiv=muldiv)
+    system.load_program(machine_code, base=0, predecode=not unified_memory)
+    halt_reason = None
+    try:
+        while system.cycle < num_cycles:
+            if system.step() is None:
+                halt_reason = "halt-complete (all cores finished)"
+                break
+    except Exception as e:
+        halt_reason = f"error: {e}"
+        print(f"ERROR during simulation: {e}", file=sys.stderr)
+    if halt_reason is None:
+        halt_reason = f"max-cycles-reached ({num_cycles})"
+    return system.cycle, halt_reason, system
+
+
+def print_core_stats(system):
+    """Print per-core CPI and cache behaviour, and the coherence traffic on the bus."""
+    print(f"\nMulticore ({len(system.cores)} cores):")
+    for core in system.cores:
+        pipeline = core.pipeline
+        line = (f"  Core {core.cid}: CPI {core.cpi:.3f} ({pipeline.retired} instructions in "
+                f"{pipeline.cycle} cycles), final PC 0x{core.cpu.pc:04x}")
+        l1d = pipeline.memory_system.dcache
+        if l1d is not None:
+            line += (f", L1D {l1d.hits} hits / {l1d.misses} misses, {l1d.upgrades} upgrades, "
+                     f"{l1d.invalidations} lines invalidated")
+        print(line)
+    bus = system.bus
+    if bus is None:
+        return
+    print(f"\nCoherence traffic (MSI snooping bus):")
+    for kind, count in bus.transactions.items():
+        print(f"  {kind:8s} {count:6d}  {TRANSACTIONS[kind]}")
+    print(f"  Invalidations: {bus.invalidations}")
+    print(f"  Snoop flushes: {bus.flushes} (Modified lines written back for another core)")
+    print(f"  Total traffic: {bus.traffic}")
+
+
+def print_thread_stats(pipeline, cpus, cycle_count, single):
+    """Print per-thread and aggregate IPC of a multithreaded run against one thread on the scalar pipeline."""
+    print(f"\nFine-grained multithreading ({len(pipeline.contexts)} threads):")
+    for context in pipeline.contexts:
+        print(f"  Thread {context.tid}: IPC {pipeline.thread_ipc(context.tid):.3f} "
+              f"({context.retired} instructions), {context.stalls} stall cycles, "
+              f"{context.flushes} flushes, final PC 0x{cpus[context.tid].pc:04x}")
+    ipc = pipeline.retired / cycle_count if cycle_count else 0.0
+    print(f"  Aggregate IPC:     {ipc:.3f} ({pipeline.retired} instructions in {cycle_count} cycles)")
+    print(f"  Single-thread IPC: {single.ipc:.3f} ({single.retired} instructions in {single.cycle} cycles)")
+    if single.ipc:
+        print(f"  Throughput gain:   {ipc / single.ipc:.2f}x")
+    print(f"  Stall cycles hidden by another thread: {pipeline.hidden_stalls}")
+    print(f"  Cycles with no thread ready to issue:  {pipeline.stalls}")
+
+
+def print_ooo_stats(pipeline, cycle_count, inorder):
+    """Print IPC, ROB occupancy and stall causes of an out-of-order run against the in-order pipeline."""
+    ipc = pipeline.retired / cycle_count if cycle_count else 0.0
+    inorder_cycles = inorder.cycle
+    inorder_ipc = inorder.ipc
+    print(f"\nOut-of-order core (ROB {pipeline.rob_size}, {pipeline.rs_size} stations per class, "
+          f"width {pipeline.width}):")
+    print(f"  IPC:             {ipc:.3f} ({pipeline.retired} instructions in {cycle_count} cycles)")
+    print(f"  In-order IPC:    {inorder_ipc:.3f} ({inorder.retired} instructions in {inorder_cycles} cycles)")
+    stall_cycles = inorder.stalls + inorder.memory_stalls + inorder.fetch_stalls
+    if stall_cycles:
+        hidden = max(0, min(inorder_cycles - cycle_count, stall_cycles))
+        print(f"  Stalls hidden:   {hidden} of {stall_cycles} in-order stall cycles ({hidden / stall_cycles:.1%})")
+    print(f"  ROB occupancy:   {pipeline.average_occupancy:.1f} average, {pipeline.max_occupancy} max")
+    print(f"  Mispredictions:  {pipeline.flushes} ({pipeline.squashed} instructions squashed)")
+    print(f"  CDB conflicts:   {pipeline.cdb_conflicts}")
+    print(f"  Load waits:      {pipeline.memory_order_waits} (older store unresolved or overlapping)")
+    print("  Dispatch stalls: " + (", ".join(f"{cause} {count}" for cause, count
+                                            in pipeline.dispatch_stalls.most_common()) or "none"))
+    print("  Commit stalls:   " + (", ".join(f"{cause} {count}" for cause, count
+                                            in pipeline.commit_stalls.most_common()) or "none"))
+
+
+def print_muldiv_stats(muldiv):
+    """Print operations and structural stalls of the multiply/divide unit."""
+    kind = 'pipelined' if muldiv.pipelined else 'iterative'
+    print(f"\nMultiply/divide unit ({kind} multiply {muldiv.mul_latency} cycle(s), "
+          f"iterative divide {muldiv.div_latency} cycle(s)):")
+    print(f"  Multiplies:        {muldiv.multiplies}")
+    print(f"  Divides:           {muldiv.divides}")
+    print(f"  Busy stall cycles: {muldiv.busy_stalls}")
+
+
+# Options only the scalar pipeline implements in full (argparse dests)
+SCALAR_OPTIONS = ('verbose', 'early_branch', 'delay_slot', 'ras_depth', 'icache', 'dcache',
+                  'prefetch_degree', 'store_buffer', 'mem_latency', 'mem_region', 'fetch_queue',
+                  'cache_sweep', 'watch', 'halt_on_zero')
+
+# The other simulation modes and which of SCALAR_OPTIONS each supports; all
+# of them take --predictor and the multiply/divide options
+MODE_OPTIONS = {
+    'dual_issue': ('ras_depth', 'watch', 'halt_on_zero'),
+    'ooo': ('watch', 'halt_on_zero'),
+    'threads': (),
+    'cores': ('dcache',),
+}
+
+
+def flag(dest):
+    """Return the command-line flag of an argparse dest."""
+    return '--' + dest.replace('_', '-')
+
+
+def args_set(parser, args, dest):
+    """True if the command line changed option `dest` from its default."""
+    return getattr(args, dest) != parser.get_default(dest)
+
+
 def main():
     """Main entry point: parse CLI args and run simulator."""
     parser = argparse.ArgumentParser(
@@ -323,7 +820,285 @@ Examples:
         help='Stop simulation when $31 (return address) becomes 0'
     )
     
+    parser.add_argument(
+        '--unified-memory',
+        action='store_true',
+        help='Fetch instructions from data memory instead of the predecoded instruction store'
+    )
+    
+    parser.add_argument(
+        '--early-branch',
+        action='store_true',
+        help='Resolve branches and jumps in ID (1-cycle taken-branch penalty, extra operand stalls)'
+    )
+    
+    parser.add_argument(
+        '--predictor',
+        choices=list(PREDICTORS),
+        default=None,
+        help='Branch predictor consulted in fetch, with a BTB (default: none, static not-taken)'
+    )
+    
+    parser.add_argument(
+        '--ras-depth',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Predict JR $31 with an N-entry return address stack (default: 0, off)'
+    )
+    
+    parser.add_argument(
+        '--delay-slot',
+        action='store_true',
+        help='MIPS-style branch delay slots, filled by the assembler (not with --predictor/--ras-depth)'
+    )
+    
+    parser.add_argument(
+        '--icache',
+        type=parse_cache,
+        default=None,
+        metavar='SIZE:LINE:WAYS[:POLICY]',
+        help=f"L1 instruction cache geometry in bytes; POLICY is {'/'.join(POLICIES)} (default: lru)"
+    )
+    
+    parser.add_argument(
+        '--dcache',
+        type=parse_cache,
+        default=None,
+        metavar='SIZE:LINE:WAYS[:POLICY]',
+        help='L1 data cache geometry in bytes (default: no caches, every access takes one cycle)'
+    )
+    
+    parser.add_argument(
+        '--write-through',
+        action='store_true',
+        help='Make the data cache write-through/no-write-allocate (default: write-back)'
+    )
+    
+    parser.add_argument(
+        '--hit-latency',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Cache hit latency in cycles (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--miss-latency',
+        type=int,
+        default=10,
+        metavar='N',
+        help='Extra cycles to fill a line from memory (default: 10)'
+    )
+    
+    parser.add_argument(
+        '--prefetch-degree',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Per-PC stride prefetcher on the data cache issuing N lines per trigger (default: 0, off)'
+    )
+    
+    parser.add_argument(
+        '--prefetch-distance',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Strides ahead of the triggering load to start prefetching (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--store-buffer',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Retire stores into an N-entry FIFO that drains to memory in the background (default: 0, off)'
+    )
+    
+    parser.add_argument(
+        '--mem-latency',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Data memory latency in cycles outside any --mem-region (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--mem-region',
+        type=parse_mem_region,
+        action='append',
+        default=[],
+        metavar='START:END:CYCLES[:WRITE]',
+        help='Latency of loads (and stores) to bytes [START, END), e.g. slow DRAM (repeatable)'
+    )
+    
+    parser.add_argument(
+        '--mul-latency',
+        type=int,
+        default=4,
+        metavar='N',
+        help='Cycles until a MULT/MULTU/MUL result can be used (default: 4)'
+    )
+    
+    parser.add_argument(
+        '--div-latency',
+        type=int,
+        default=12,
+        metavar='N',
+        help='Cycles of the iterative divider for DIV/DIVU (default: 12)'
+    )
+    
+    parser.add_argument(
+        '--iterative-mul',
+        action='store_true',
+        help='Multiplier accepts a new operation only after the previous one finishes'
+    )
+    
+    parser.add_argument(
+        '--dual-issue',
+        action='store_true',
+        help='Fetch and issue up to two instructions per cycle and compare IPC with the scalar pipeline'
+    )
+    
+    parser.add_argument(
+        '--memory-ports',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Loads/stores allowed in one dual-issue pair (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--fetch-queue',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Fetch queue entries between IF and ID; fetch continues while the back end stalls (default: 0)'
+    )
+    
+    parser.add_argument(
+        '--fetch-width',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Instructions fetched per cycle into the fetch queue (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Run the program in N hardware threads on a fine-grained multithreaded pipeline (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--cores',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Run the program on N cores sharing memory; with --dcache each gets a private MSI-coherent L1D (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--core-id-reg',
+        type=int,
+        metavar='R',
+        help='With --cores, start core i with i in register $R'
+    )
+    
+    parser.add_argument(
+        '--ooo',
+        action='store_true',
+        help='Run the out-of-order (Tomasulo + reorder buffer) model and compare it with the in-order pipeline'
+    )
+    
+    parser.add_argument(
+        '--rob-size',
+        type=int,
+        default=16,
+        metavar='N',
+        help='Reorder buffer entries for --ooo (default: 16)'
+    )
+    
+    parser.add_argument(
+        '--rs-size',
+        type=int,
+        default=4,
+        metavar='N',
+        help='Reservation stations per unit class (ALU, memory, multiply/divide) for --ooo (default: 4)'
+    )
+    
+    parser.add_argument(
+        '--ooo-width',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Instructions fetched, dispatched and committed per cycle for --ooo; also ALUs and CDB buses (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--cache-sweep',
+        action='store_true',
+        help='Record the address stream and print LRU miss rates for a range of cache geometries'
+    )
+    
+    parser.add_argument(
+        '--schedule',
+        action='store_true',
+        help='Reorder independent instructions within basic blocks to hide load-use stalls'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        type=parse_watch,
+        action='append',
+        default=[],
+        metavar='START:END[:r|w|rw]',
+        help='Stop when a load/store touches the byte range [START, END) (repeatable)'
+    )
+    
     args = parser.parse_args()
+    if args.delay_slot and (args.predictor or args.ras_depth):
+        parser.error('--delay-slot cannot be combined with --predictor or --ras-depth')
+    if args.hit_latency < 1 or args.miss_latency < 0:
+        parser.error('--hit-latency must be at least 1 and --miss-latency non-negative')
+    if args.prefetch_degree and not args.dcache:
+        parser.error('--prefetch-degree needs a data cache (--dcache)')
+    if args.mem_latency < 1:
+        parser.error('--mem-latency must be at least 1')
+    if args.mul_latency < 1 or args.div_latency < 1:
+        parser.error('--mul-latency and --div-latency must be at least 1')
+    modes = [mode for mode in MODE_OPTIONS if args_set(parser, args, mode)]
+    if len(modes) > 1:
+        parser.error(f"{' and '.join(flag(mode) for mode in modes)} cannot be combined")
+    for mode in modes:
+        unsupported = [flag(option) for option in SCALAR_OPTIONS
+                       if option not in MODE_OPTIONS[mode] and args_set(parser, args, option)]
+        if unsupported:
+            parser.error(f"{flag(mode)} does not support {', '.join(unsupported)}")
+    if args.threads < 1:
+        parser.error('--threads must be at least 1')
+    if args.fetch_queue and args.delay_slot:
+        parser.error('--fetch-queue cannot be combined with --delay-slot')
+    if args.fetch_queue < 0 or args.fetch_width < 1:
+        parser.error('--fetch-queue must be non-negative and --fetch-width at least 1')
+    if args.fetch_width > 1 and not args.fetch_queue:
+        parser.error('--fetch-width needs a fetch queue (--fetch-queue)')
+    if args.cores > 1 and args.write_through:
+        parser.error('--cores keeps caches coherent with MSI, which needs write-back caches')
+    if args.cores < 1:
+        parser.error('--cores must be at least 1')
+    if args.core_id_reg is not None and not 1 <= args.core_id_reg <= 31:
+        parser.error('--core-id-reg must name a register from 1 to 31')
+    if min(args.rob_size, args.rs_size, args.ooo_width) < 1:
+        parser.error('--rob-size, --rs-size and --ooo-width must be at least 1')
+    if args.memory_ports not in (1, 2):
+        parser.error('--memory-ports must be 1 or 2')
+    if args.store_buffer < 0:
+        parser.error('--store-buffer must be non-negative')
+    if args.prefetch_degree < 0 or args.prefetch_distance < 1:
+        parser.error('--prefetch-degree must be non-negative and --prefetch-distance at least 1')
     
     # Step 1: Load assembly file
     print(f"Loading assembly file: {args.assembly_file}")
@@ -332,7 +1107,8 @@ Examples:
     
     # Step 2: Assemble into machine code
     print(f"Assembling...")
-    machine_code, has_halt = assemble_program(asm_source)
+    machine_code, has_halt = assemble_program(asm_source, schedule_code=args.schedule,
+                                              delay_slots=args.delay_slot)
     print(f"  Assembled {len(machine_code)} instructions")
     
     # Step 3: Run simulation
@@ -340,16 +1116,70 @@ Examples:
     if args.verbose:
         print(f"  Verbose mode enabled\n")
     
+    _, dcache = cache_options(args)
+    
+    muldiv = dict(mul_latency=args.mul_latency, div_latency=args.div_latency,
+                  pipelined=not args.iterative_mul)
+    if args.cores > 1:
+        cycle_count, halt_reason, system = run_multicore(
+            machine_code, args.cores, args.cycles, unified_memory=args.unified_memory,
+            predictor=args.predictor, muldiv=muldiv, dcache=dcache, id_register=args.core_id_reg)
+        # Core 0's registers and the shared memory
+        print_final_state(system.cores[0].cpu, cycle_count, halt_reason)
+        print_core_stats(system)
+        return
+    if args.threads > 1:
+        cycle_count, halt_reason, cpus, pipeline = run_multithreaded(
+            machine_code, args.threads, args.cycles, unified_memory=args.unified_memory,
+            predictor=args.predictor, muldiv=muldiv)
+        print_final_state(cpus[0], cycle_count, halt_reason)
+        if pipeline.predictor is not None:
+            print_branch_stats(pipeline, cycle_count)
+        # One thread's work on the scalar pipeline, for the throughput comparison
+        single = run_inorder(machine_code, pipeline.contexts[0].retired, 2 * args.cycles + cycle_count,
+                             unified_memory=args.unified_memory, predictor=args.predictor, muldiv=muldiv)
+        print_thread_stats(pipeline, cpus, cycle_count, single)
+        if pipeline.muldiv.multiplies or pipeline.muldiv.divides:
+            print_muldiv_stats(pipeline.muldiv)
+        return
+    pipeline = make_pipeline(args, trace=AccessTrace() if args.cache_sweep else None)
     cycle_count, halt_reason, cpu, pipeline = run_simulation(
-        machine_code,
-        args.cycles,
-        args.verbose,
-        args.halt_on_zero,
-        has_halt
-    )
+        machine_code, pipeline, args.cycles, args.verbose, args.halt_on_zero, has_halt,
+        unified_memory=args.unified_memory, watches=args.watch)
     
     # Step 4: Print results
     print_final_state(cpu, cycle_count, halt_reason)
+    if pipeline.predictor is not None or pipeline.ras is not None:
+        print_branch_stats(pipeline, cycle_count)
+    memory_system = pipeline.memory_system
+    if memory_system.icache is not None or memory_system.dcache is not None:
+        print_cache_stats(pipeline)
+    if memory_system.store_buffer is not None:
+        print_store_buffer_stats(memory_system.store_buffer)
+    if memory_system.memory_latency is not None:
+        print_memory_latency_stats(memory_system.memory_latency, pipeline.memory_stalls)
+    if args.dual_issue:
+        # The same program on the scalar pipeline, for the IPC comparison
+        scalar_cycles, _, _, scalar = run_simulation(
+            machine_code, Pipeline(predictor=make_predictor(args.predictor) if args.predictor else None,
+                                   ras=ReturnAddressStack(args.ras_depth) if args.ras_depth else None,
+                                   muldiv=MulDivUnit(**muldiv)),
+            args.cycles, False, args.halt_on_zero, has_halt, unified_memory=args.unified_memory)
+        print_issue_stats(pipeline, cycle_count, scalar_cycles, scalar.retired)
+    if args.fetch_queue:
+        # The same run with IF writing IF/ID directly
+        _, _, _, unqueued = run_simulation(machine_code, make_pipeline(args, fetch_queue=0, fetch_width=1),
+                                           args.cycles, False, args.halt_on_zero, has_halt,
+                                           unified_memory=args.unified_memory)
+        print_fetch_stats(pipeline, cycle_count, unqueued)
+    if args.ooo:
+        inorder = run_inorder(machine_code, pipeline.retired, 2 * args.cycles + cycle_count,
+                              unified_memory=args.unified_memory, predictor=args.predictor, muldiv=muldiv)
+        print_ooo_stats(pipeline, cycle_count, inorder)
+    if pipeline.muldiv.multiplies or pipeline.muldiv.divides:
+        print_muldiv_stats(pipeline.muldiv)
+    if pipeline.trace is not None:
+        print_cache_sweep(pipeline.trace)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,7 @@
 from .lexer import Lexer, Token
 from .asm_parser import Parser, Instruction
 from .assembler import Assembler
+from .scheduler import schedule, BlockSchedule, fill_delay_slots, DelaySlot
 
-__all__ = ["Lexer", "Token", "Parser", "Instruction", "Assembler"]
\ No newline at end of file
+__all__ = ["Lexer", "Token", "Parser", "Instruction", "Assembler", "schedule", "BlockSchedule",
+           "fill_delay_slots", "DelaySlot"]
\ No newline at end of file
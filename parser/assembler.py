@@ -19,6 +19,7 @@ OPCODES = {
     'SB': 0x28,
     'SH': 0x29,
     'SW': 0x2B,
+    'TAS': 0x38,  # atomic test-and-set: rt = MEM[imm(rs)], MEM[imm(rs)] = 1
     'BEQ': 0x04,
     'BNE': 0x05,
     'BLEZ': 0x06,
@@ -46,6 +47,18 @@ FUNCTS = {
     'SRA': 0x03,
     'JR': 0x08,
     'JALR': 0x09,
+    'MFHI': 0x10,
+    'MFLO': 0x12,
+    'MULT': 0x18,
+    'MULTU': 0x19,
+    'DIV': 0x1A,
+    'DIVU': 0x1B,
+}
+
+# SPECIAL2 (opcode 0x1C) R-format instructions
+SPECIAL2_OPCODE = 0x1C
+SPECIAL2_FUNCTS = {
+    'MUL': 0x02,
 }
 
 
@@ -106,6 +119,15 @@ class Assembler:
                         rs = reg_num(instr.operands[0])
                         rd = 31
                     word = (0 << 26) | (rs << 21) | (0 << 16) | (rd << 11) | (0 << 6) | FUNCTS[op]
+                elif op in ('MULT', 'MULTU', 'DIV', 'DIVU'):
+                    # syntax: MULT rs, rt (result in HI/LO)
+                    rs = reg_num(instr.operands[0])
+                    rt = reg_num(instr.operands[1])
+                    word = (0 << 26) | (rs << 21) | (rt << 16) | (0 << 11) | (0 << 6) | FUNCTS[op]
+                elif op in ('MFHI', 'MFLO'):
+                    # syntax: MFHI rd
+                    rd = reg_num(instr.operands[0])
+                    word = (0 << 26) | (0 << 21) | (0 << 16) | (rd << 11) | (0 << 6) | FUNCTS[op]
                 else:
                     # general R-type: ADD rd, rs, rt
                     rd = reg_num(instr.operands[0])
@@ -114,6 +136,14 @@ class Assembler:
                     word = (0 << 26) | (rs << 21) | (rt << 16) | (rd << 11) | (0 << 6) | FUNCTS[op]
                 machine.append(word & 0xFFFFFFFF)
 
+            elif op in SPECIAL2_FUNCTS:
+                # syntax: MUL rd, rs, rt
+                rd = reg_num(instr.operands[0])
+                rs = reg_num(instr.operands[1])
+                rt = reg_num(instr.operands[2])
+                word = (SPECIAL2_OPCODE << 26) | (rs << 21) | (rt << 16) | (rd << 11) | SPECIAL2_FUNCTS[op]
+                machine.append(word)
+
             elif op in OPCODES:
                 opcode = OPCODES[op]
                 if op in ('J','JAL'):
@@ -156,7 +186,7 @@ class Assembler:
                     imm &= 0xFFFF
                     word = (opcode << 26) | (rs << 21) | (0 << 16) | imm
                     machine.append(word)
-                elif op in ('LW','SW','LB','LBU','LH','LHU','SB','SH'):
+                elif op in ('LW','SW','LB','LBU','LH','LHU','SB','SH','TAS'):
                     # syntax: LW rt, imm(rs)
                     rt = reg_num(instr.operands[0])
                     # operands may be ['imm','(','$rs',')'] or ['imm','(','rs',')']
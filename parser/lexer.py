@@ -12,8 +12,9 @@ class Lexer:
     MNEMONICS = (
         'ADD','ADDU','SUB','SUBU','AND','OR','XOR','NOR',
         'SLT','SLTU','SLL','SRL','SRA','JR','JALR',
+        'MULT','MULTU','DIV','DIVU','MFHI','MFLO','MUL',
         'ADDI','ADDIU','SLTI','SLTIU','ANDI','ORI','XORI',
-        'LW','SW','LB','LBU','LH','LHU','SB','SH',
+        'LW','SW','LB','LBU','LH','LHU','SB','SH','TAS',
         'BEQ','BNE','BLEZ','BGTZ','BLT','BGE','BLE','BGT',
         'J','JAL','HALT'
     )
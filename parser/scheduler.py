@@ -0,0 +1,199 @@
+#parser/scheduler.py
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from decoder.decoder import decode
+from .asm_parser import Instruction
+from .assembler import Assembler
+
+LOAD_OPS = ('LW', 'LB', 'LBU', 'LH', 'LHU', 'TAS')   # TAS also writes memory
+MEM_WRITE_OPS = ('SW', 'SB', 'SH', 'TAS')
+CONTROL_OPS = ('BEQ', 'BNE', 'BLEZ', 'BGTZ', 'BLT', 'BGE', 'BLE', 'BGT',
+               'J', 'JAL', 'JR', 'JALR')
+# Mnemonics that must stay last in their block
+BLOCK_ENDERS = CONTROL_OPS + ('HALT',)
+
+
+@dataclass
+class BlockSchedule:
+    start: int              # index of the block's first instruction
+    end: int                # one past its last instruction
+    stalls_before: int      # load-use stalls in the original order
+    stalls_after: int       # load-use stalls after scheduling
+
+    @property
+    def stalls_removed(self) -> int:
+        return self.stalls_before - self.stalls_after
+
+
+def _stalls(order: List[int], reads: List[int], writes: List[int], is_load: List[bool], prev: int = -1) -> int:
+    # A load immediately followed by a reader of its result stalls one cycle
+    stalls = 0
+    for i in order:
+        if prev >= 0 and is_load[prev] and writes[prev] & reads[i]:
+            stalls += 1
+        prev = i
+    return stalls
+
+
+def _register_masks(instructions: List[Instruction]) -> Tuple[List[int], List[int]]:
+    # Assemble once (labels must resolve) and read the decoded masks back
+    words = Assembler(instructions).assemble()
+    decoded = [decode(word, pc=4 * i) for i, word in enumerate(words)]
+    return [dec.reads for dec in decoded], [dec.writes for dec in decoded]
+
+
+def _depends(i: int, j: int, ops, reads, writes) -> bool:
+    # True if instructions i and j may not swap (register or memory order)
+    if writes[i] & reads[j] or reads[i] & writes[j] or writes[i] & writes[j]:
+        return True
+    memory = MEM_WRITE_OPS + LOAD_OPS
+    return ops[i] in memory and ops[j] in memory and (ops[i] in MEM_WRITE_OPS or ops[j] in MEM_WRITE_OPS)
+
+
+def schedule(instructions: List[Instruction]) -> Tuple[List[Instruction], List[BlockSchedule]]:
+    """Reorder instructions within basic blocks to hide load-use stalls.
+
+    Runs between `Parser.parse()` and `Assembler.assemble()`. Blocks start at
+    labels and after branches/jumps; a block's branch, jump or HALT stays
+    last and its label stays on whichever instruction ends up first, so the
+    assembler resolves the same targets. Register dependences (RAW, WAR and
+    WAW, from the decoded read/write masks) are preserved, and memory order is
+    kept except that loads may pass each other.
+
+    The pass is a greedy list scheduler: among the instructions whose
+    predecessors are placed, it prefers one that does not read the result of
+    a load placed just before it, then the one with the longest remaining
+    dependence chain. A block keeps its original order unless the new order
+    has fewer stalls. Returns the new instruction list and one
+    `BlockSchedule` per block.
+    """
+    count = len(instructions)
+    reads, writes = _register_masks(instructions)
+    ops = [instr.mnemonic for instr in instructions]
+    is_load = [op in LOAD_OPS for op in ops]
+
+    starts = [0] if count else []
+    for i in range(1, count):
+        if instructions[i].label or ops[i - 1] in BLOCK_ENDERS:
+            starts.append(i)
+
+    order: List[int] = []
+    report: List[BlockSchedule] = []
+    for b, start in enumerate(starts):
+        end = starts[b + 1] if b + 1 < len(starts) else count
+        # Stalls across the fall-through edge from the previous (already scheduled) block
+        prev = order[-1] if order and ops[order[-1]] not in ('J', 'JAL', 'JR', 'JALR') else -1
+        original = list(range(start, end))
+        best = _schedule_block(original, ops, reads, writes, is_load, prev)
+        before = _stalls(original, reads, writes, is_load, prev)
+        after = _stalls(best, reads, writes, is_load, prev)
+        if after >= before:
+            best, after = original, before
+        order.extend(best)
+        report.append(BlockSchedule(start, end, before, after))
+
+    scheduled = []
+    for b, start in enumerate(starts):
+        label = instructions[start].label
+        end = report[b].end
+        for pos in range(start, end):
+            instr = instructions[order[pos]]
+            scheduled.append(Instruction(instr.mnemonic, instr.operands, label if pos == start else None))
+    return scheduled, report
+
+
+def _schedule_block(block: List[int], ops, reads, writes, is_load, prev: int) -> List[int]:
+    fixed = block[-1] if ops[block[-1]] in BLOCK_ENDERS else None
+    body = block[:-1] if fixed is not None else block
+
+    # Dependence edges: RAW/WAR/WAW on registers, stores ordered with all memory ops
+    preds = {i: set() for i in body}
+    succs = {i: [] for i in body}
+    for x, j in enumerate(body):
+        for i in body[:x]:
+            if _depends(i, j, ops, reads, writes):
+                preds[j].add(i)
+                succs[i].append(j)
+
+    # Priority: longest path to the end of the block, counting load-use latency
+    height = {}
+    for i in reversed(body):
+        height[i] = 1 + max((height[j] + (1 if is_load[i] and writes[i] & reads[j] else 0)
+                             for j in succs[i]), default=0)
+
+    placed: List[int] = []
+    remaining = {i: len(preds[i]) for i in body}
+    ready = [i for i in body if not preds[i]]
+    last = prev
+    while ready:
+        def cost(i):
+            stalls = last >= 0 and is_load[last] and writes[last] & reads[i]
+            return (1 if stalls else 0, -height[i], i)
+        pick = min(ready, key=cost)
+        ready.remove(pick)
+        placed.append(pick)
+        last = pick
+        for j in succs[pick]:
+            remaining[j] -= 1
+            if not remaining[j]:
+                ready.append(j)
+
+    if fixed is not None:
+        placed.append(fixed)
+    return placed
+
+
+@dataclass
+class DelaySlot:
+    branch: int                 # index of the branch or jump (original numbering)
+    filler: Optional[int]       # index of the instruction moved into its slot, None = NOP
+
+
+def fill_delay_slots(instructions: List[Instruction]) -> Tuple[List[Instruction], List[DelaySlot]]:
+    """Give every branch and jump a delay slot for `Pipeline(delay_slot=True)`.
+
+    The slot is filled with the closest earlier instruction of the same block
+    that can execute after the branch instead: it must not carry a label, not
+    feed the branch (or use the register a call links), and not conflict with
+    any instruction it would move past. Otherwise a NOP (`SLL $0, $0, 0`) is
+    inserted. Labels stay on their instructions, so targets still resolve.
+    Returns the new instruction list and one `DelaySlot` per branch.
+    """
+    count = len(instructions)
+    reads, writes = _register_masks(instructions)
+    ops = [instr.mnemonic for instr in instructions]
+
+    slots: List[DelaySlot] = []
+    moved = set()
+    block_start = 0
+    for b in range(count):
+        if instructions[b].label or (b and ops[b - 1] in BLOCK_ENDERS):
+            block_start = b
+        if ops[b] not in CONTROL_OPS:
+            continue
+        filler = None
+        for i in range(b - 1, block_start - 1, -1):
+            if i in moved or instructions[i].label:
+                break
+            feeds_branch = writes[i] & reads[b] or (reads[i] | writes[i]) & writes[b]
+            if not feeds_branch and not any(_depends(i, j, ops, reads, writes) for j in range(i + 1, b)):
+                filler = i
+                break
+        if filler is not None:
+            moved.add(filler)
+        slots.append(DelaySlot(b, filler))
+
+    fillers = {slot.branch: slot.filler for slot in slots}
+    filled: List[Instruction] = []
+    for i, instr in enumerate(instructions):
+        if i in moved:
+            continue
+        filled.append(instr)
+        if i in fillers:
+            filler = fillers[i]
+            if filler is None:
+                filled.append(Instruction('SLL', ['$0', '$0', '0']))
+            else:
+                filled.append(Instruction(instructions[filler].mnemonic, instructions[filler].operands))
+    return filled, slots
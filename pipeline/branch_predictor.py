@@ -0,0 +1,221 @@
+# pipeline/branch_predictor.py
+from typing import List, Optional
+
+
+class DirectionPredictor:
+    """Taken/not-taken guess for a branch at `pc` whose target is `target`."""
+    name = 'base'
+
+    def predict(self, pc: int, target: int) -> bool:
+        raise NotImplementedError
+
+    def update(self, pc: int, target: int, taken: bool):
+        pass
+
+
+class StaticNotTaken(DirectionPredictor):
+    name = 'not-taken'
+
+    def predict(self, pc, target):
+        return False
+
+
+class StaticBTFN(DirectionPredictor):
+    """Backward taken, forward not taken (loops close with backward branches)."""
+    name = 'btfn'
+
+    def predict(self, pc, target):
+        return target <= pc
+
+
+class OneBit(DirectionPredictor):
+    """Last outcome per table entry, indexed by the low bits of pc >> 2."""
+    name = '1bit'
+
+    def __init__(self, entries: int = 1024):
+        if entries & (entries - 1):
+            raise ValueError('Predictor table size must be a power of two')
+        self.mask = entries - 1
+        self.table = bytearray(entries)
+
+    def predict(self, pc, target):
+        return bool(self.table[(pc >> 2) & self.mask])
+
+    def update(self, pc, target, taken):
+        self.table[(pc >> 2) & self.mask] = taken
+
+
+class TwoBit(DirectionPredictor):
+    """2-bit saturating counters (0-1 predict not taken, 2-3 taken)."""
+    name = '2bit'
+
+    def __init__(self, entries: int = 1024, initial: int = 1):
+        if entries & (entries - 1):
+            raise ValueError('Predictor table size must be a power of two')
+        self.mask = entries - 1
+        self.table = bytearray([initial]) * entries
+
+    def _index(self, pc):
+        return (pc >> 2) & self.mask
+
+    def predict(self, pc, target):
+        return self.table[self._index(pc)] >= 2
+
+    def update(self, pc, target, taken):
+        i = self._index(pc)
+        counter = self.table[i]
+        if taken:
+            if counter < 3:
+                self.table[i] = counter + 1
+        elif counter > 0:
+            self.table[i] = counter - 1
+
+
+class Gshare(TwoBit):
+    """2-bit counters indexed by pc >> 2 XOR the global outcome history."""
+    name = 'gshare'
+
+    def __init__(self, entries: int = 1024, history_bits: int = 10, initial: int = 1):
+        super().__init__(entries, initial)
+        self.history_mask = (1 << history_bits) - 1
+        self.history = 0
+
+    def _index(self, pc):
+        return ((pc >> 2) ^ self.history) & self.mask
+
+    def update(self, pc, target, taken):
+        super().update(pc, target, taken)
+        self.history = ((self.history << 1) | taken) & self.history_mask
+
+
+class BranchTargetBuffer:
+    """Direct-mapped cache of taken-branch targets, tagged with the full PC."""
+
+    def __init__(self, entries: int = 256):
+        if entries & (entries - 1):
+            raise ValueError('BTB size must be a power of two')
+        self.mask = entries - 1
+        self.tags: List[Optional[int]] = [None] * entries
+        self.targets: List[int] = [0] * entries
+
+    def lookup(self, pc: int) -> Optional[int]:
+        i = (pc >> 2) & self.mask
+        return self.targets[i] if self.tags[i] == pc else None
+
+    def update(self, pc: int, target: int):
+        i = (pc >> 2) & self.mask
+        self.tags[i] = pc
+        self.targets[i] = target
+
+
+class BranchPredictor:
+    """Fetch-stage predictor: a BTB supplies the target, `direction` the guess.
+
+    `IF` calls `predict(pc)` for every fetch and redirects to the returned
+    target (None = fetch pc + 4); on a BTB miss there is no target to fetch
+    from, so the branch is predicted not taken. `Pipeline.step()` calls
+    `resolve()` once per branch or jump when its outcome is known, which
+    trains both structures and counts mispredictions.
+    """
+
+    def __init__(self, direction: DirectionPredictor, btb: Optional[BranchTargetBuffer] = None):
+        self.direction = direction
+        self.btb = btb if btb is not None else BranchTargetBuffer()
+        self.branches = 0
+        self.mispredicts = 0
+
+    @property
+    def name(self) -> str:
+        return self.direction.name
+
+    def predict(self, pc: int) -> Optional[int]:
+        target = self.btb.lookup(pc)
+        if target is not None and self.direction.predict(pc, target):
+            return target
+        return None
+
+    def resolve(self, pc: int, taken: bool, target: int, predicted: Optional[int]) -> bool:
+        """Record the outcome of the branch at `pc`; True if it was mispredicted."""
+        self.branches += 1
+        self.direction.update(pc, target, taken)
+        if taken:
+            self.btb.update(pc, target)
+        mispredicted = predicted != (target if taken else None)
+        if mispredicted:
+            self.mispredicts += 1
+        return mispredicted
+
+    @property
+    def accuracy(self) -> float:
+        return 1.0 - self.mispredicts / self.branches if self.branches else 1.0
+
+
+class ReturnAddressStack:
+    """Fixed-depth stack of return addresses predicting `JR $31` in fetch.
+
+    IF pushes PC+4 for every JAL/JALR it fetches and pops a prediction for
+    every `JR $31`. Overflow overwrites the oldest entry (the stack is a
+    circular buffer) and underflow predicts nothing. Wrong-path fetches
+    corrupt the stack, so IF stores a `checkpoint()` with each fetched
+    instruction and the pipeline `restore()`s the one of a mispredicted
+    branch; saving the top entry with the pointer repairs the common case of
+    a pop followed by a push on the wrong path.
+    """
+
+    def __init__(self, depth: int = 8):
+        if depth < 1:
+            raise ValueError('Return address stack depth must be at least 1')
+        self.depth = depth
+        self.entries = [0] * depth
+        self.top = 0      # index of the newest entry
+        self.count = 0    # valid entries (<= depth)
+        self.return_pcs = set()  # addresses of the JR $31 instructions seen by IF
+        self.returns = 0
+        self.mispredicts = 0
+
+    def push(self, address: int):
+        self.top = (self.top + 1) % self.depth
+        self.entries[self.top] = address
+        if self.count < self.depth:
+            self.count += 1
+
+    def pop(self) -> Optional[int]:
+        if not self.count:
+            return None
+        address = self.entries[self.top]
+        self.top = (self.top - 1) % self.depth
+        self.count -= 1
+        return address
+
+    def checkpoint(self):
+        return self.top, self.count, self.entries[self.top]
+
+    def restore(self, state):
+        self.top, self.count, self.entries[self.top] = state
+
+    @property
+    def accuracy(self) -> float:
+        return 1.0 - self.mispredicts / self.returns if self.returns else 1.0
+
+
+def is_call(word: int) -> bool:
+    """JAL, or JALR (R-type funct 0x09), from the raw instruction bits."""
+    opcode = word >> 26
+    return opcode == 0x03 or (opcode == 0 and word & 0x3F == 0x09)
+
+
+def is_return(word: int) -> bool:
+    """JR $31 (R-type funct 0x08 with rs = 31)."""
+    return word >> 26 == 0 and word & 0x3F == 0x08 and (word >> 21) & 0x1F == 31
+
+
+PREDICTORS = {
+    cls.name: cls for cls in (StaticNotTaken, StaticBTFN, OneBit, TwoBit, Gshare)
+}
+
+
+def make_predictor(name: str, btb_entries: int = 256) -> BranchPredictor:
+    """Build a predictor by name: not-taken, btfn, 1bit, 2bit or gshare."""
+    if name not in PREDICTORS:
+        raise ValueError(f"Unknown branch predictor {name!r} (choose from {', '.join(PREDICTORS)})")
+    return BranchPredictor(PREDICTORS[name](), BranchTargetBuffer(btb_entries))
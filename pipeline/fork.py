@@ -0,0 +1,48 @@
+# pipeline/fork.py
+from typing import Any, Dict, List, Tuple
+
+from pipeline.pipeline import Pipeline
+from state.cow_memory import CowMemory
+from state.cpu_state import CPUstate
+from state.instruction_memory import InstructionMemory
+from state.registers import Registers
+
+
+def fork_simulation(cpu: CPUstate, pipeline: Pipeline, count: int = 1) -> List[Tuple[CPUstate, Pipeline]]:
+    """Fork a running simulation into `count` independent children.
+
+    Every child gets its own PC, register file and pipeline latches, and shares
+    the parent's memory pages copy-on-write. The parent can keep running too.
+    """
+    return [(cpu.fork(), pipeline.fork()) for _ in range(count)]
+
+
+def export_fork(cpu: CPUstate, pipeline: Pipeline) -> Dict[str, Any]:
+    """Compact, picklable description of a fork relative to its base memory.
+
+    Only the pages the fork has written since it was created are included, so
+    a worker process that already holds the base checkpoint can rebuild the
+    fork with `import_fork()`.
+    """
+    if not isinstance(cpu.memory, CowMemory):
+        raise ValueError('export_fork requires a forked CPU (CowMemory)')
+    return {
+        'pc': cpu.pc,
+        'regs': cpu.registers.snapshot(),
+        'pipeline': pipeline,
+        'pages': cpu.memory.page_delta(),
+        'text': (cpu.imem.base, cpu.imem.end) if cpu.imem is not None else None,
+    }
+
+
+def import_fork(base: CowMemory, payload: Dict[str, Any]) -> Tuple[CPUstate, Pipeline]:
+    """Rebuild a fork exported by `export_fork()` on top of `base`."""
+    memory = base.fork()
+    memory.apply_delta(payload['pages'])
+    registers = Registers()
+    registers.restore(payload['regs'])
+    cpu = CPUstate(memory=memory, registers=registers)
+    cpu.pc = payload['pc']
+    if payload['text'] is not None:
+        cpu.imem = InstructionMemory.from_memory(memory, *payload['text'])
+    return cpu, payload['pipeline'].fork()
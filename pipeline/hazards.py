@@ -1,6 +1,8 @@
 # pipeline/hazards.py
 from typing import List, Tuple, Optional
 
+from state.registers import NUM_REGS, wrap32
+
 
 # All branch and jump instructions
 BRANCH_INSTRUCTIONS = {
@@ -10,6 +12,13 @@ BRANCH_INSTRUCTIONS = {
 }
 
 
+LOAD_OPS = ('LW', 'LB', 'LBU', 'LH', 'LHU')
+STORE_OPS = ('SW', 'SB', 'SH')
+ATOMIC_OPS = ('TAS',)  # read and write memory in one MEM access
+MEM_RESULT_OPS = LOAD_OPS + ATOMIC_OPS   # write rt from MEM
+MEM_WRITE_OPS = STORE_OPS + ATOMIC_OPS   # write memory
+
+
 def is_branch(op: Optional[str]) -> bool:
     """Check if an instruction is a branch or jump."""
     return op in BRANCH_INSTRUCTIONS
@@ -49,16 +58,16 @@ def detect_raw(id_ex_reg, ex_mem_reg, mem_wb_reg) -> List[str]:
 
     Compares ID/EX source registers (rs, rt) against EX/MEM.rd and MEM/WB.rd.
     Returns a list of human-readable hazard descriptions (empty if none).
+    `Pipeline` itself tracks producers with `Scoreboard`.
     """
     hazards: List[str] = []
-    for src_name in ('rs', 'rt'):
-        src = getattr(id_ex_reg, src_name, None)
-        if src is None:
-            continue
-        if ex_mem_reg.rd is not None and src == ex_mem_reg.rd and ex_mem_reg.rd != 0:
-            hazards.append(f"RAW between ID/EX.{src_name} and EX/MEM.rd (${ex_mem_reg.rd})")
-        if mem_wb_reg.rd is not None and src == mem_wb_reg.rd and mem_wb_reg.rd != 0:
-            hazards.append(f"RAW between ID/EX.{src_name} and MEM/WB.rd (${mem_wb_reg.rd})")
+    for latch, name in ((ex_mem_reg, 'EX/MEM'), (mem_wb_reg, 'MEM/WB')):
+        scoreboard = Scoreboard()
+        scoreboard.reserve(latch.rd, 1)
+        for src_name in ('rs', 'rt'):
+            src = getattr(id_ex_reg, src_name, None)
+            if src is not None and scoreboard.inflight >> src & 1:
+                hazards.append(f"RAW between ID/EX.{src_name} and {name}.rd (${latch.rd})")
     return hazards
 
 
@@ -67,28 +76,19 @@ def forwarding(id_ex_reg, ex_mem_reg, mem_wb_reg):
 
     This updates id_ex_reg.rs_val and id_ex_reg.rt_val when a matching producer
     exists in EX/MEM or MEM/WB with an available value (alu_result or mem_data).
-    
+    An EX/MEM result replaces the operand; a MEM/WB result only fills one
+    that is still None. `Pipeline` forwards with `Scoreboard.read_operands`.
+
     Note: For load operations in EX/MEM, we don't forward the address (alu_result)
     because the actual loaded value hasn't been computed yet. We wait for MEM/WB.
     """
-    # Forward from EX/MEM first (most recent), but NOT from loads
-    # (loads have the address in alu_result, not the loaded value)
-    is_load_in_ex = ex_mem_reg.mem_op in ("LW", "LB", "LBU", "LH", "LHU")
-    if not is_load_in_ex and ex_mem_reg.rd is not None and ex_mem_reg.alu_result is not None and ex_mem_reg.rd != 0:
-        if id_ex_reg.rs == ex_mem_reg.rd:
-            id_ex_reg.rs_val = ex_mem_reg.alu_result
-        if id_ex_reg.rt == ex_mem_reg.rd:
-            id_ex_reg.rt_val = ex_mem_reg.alu_result
-
-    # Then from MEM/WB (if not already forwarded)
-    if mem_wb_reg.rd is not None and mem_wb_reg.rd != 0:
-        wb_val = mem_wb_reg.mem_data if mem_wb_reg.mem_data is not None else mem_wb_reg.alu_result
-        if wb_val is None:
-            return
-        if id_ex_reg.rs == mem_wb_reg.rd and id_ex_reg.rs_val is None:
-            id_ex_reg.rs_val = wb_val
-        if id_ex_reg.rt == mem_wb_reg.rd and id_ex_reg.rt_val is None:
-            id_ex_reg.rt_val = wb_val
+    for latch, replace in ((ex_mem_reg, True), (mem_wb_reg, False)):
+        scoreboard = _latch_scoreboard(latch)
+        for name in ('rs', 'rt'):
+            reg = getattr(id_ex_reg, name)
+            if (reg and scoreboard.inflight >> reg & 1 and scoreboard.ready[reg] <= 1
+                    and (replace or getattr(id_ex_reg, name + '_val') is None)):
+                setattr(id_ex_reg, name + '_val', scoreboard.read(reg, None))
 
 
 def detect_load_use_hazard(id_ex_reg, ex_mem_reg) -> bool:
@@ -96,22 +96,26 @@ def detect_load_use_hazard(id_ex_reg, ex_mem_reg) -> bool:
 
     Returns True if a stall is needed, False otherwise.
     A load-use hazard occurs when:
-    - EX/MEM has a load operation (LW, LB, LBU, LH, LHU)
+    - EX/MEM has a load operation (LW, LB, LBU, LH, LHU, or TAS)
     - ID/EX reads the same register that EX/MEM is loading into
     """
-    if ex_mem_reg.mem_op is None or ex_mem_reg.rd is None or ex_mem_reg.rd == 0:
-        return False
-
-    # Check if it's a load operation
-    is_load = ex_mem_reg.mem_op in ("LW", "LB", "LBU", "LH", "LHU")
-    if not is_load:
-        return False
+    scoreboard = _latch_scoreboard(ex_mem_reg)
+    return any(scoreboard.ready[reg] > 1 for reg in (id_ex_reg.rs, id_ex_reg.rt) if reg)
 
-    # Check if ID/EX reads the register being loaded
-    if id_ex_reg.rs == ex_mem_reg.rd or id_ex_reg.rt == ex_mem_reg.rd:
-        return True
 
-    return False
+def _latch_scoreboard(latch) -> "Scoreboard":
+    # A scoreboard holding the producer in one EX/MEM or MEM/WB latch, consumable
+    # from cycle 1; a load still in EX/MEM has only its address and stays reserved
+    scoreboard = Scoreboard()
+    if getattr(latch, 'mem_op', None) in MEM_RESULT_OPS:  # MEM/WB has no mem_op
+        scoreboard.reserve(latch.rd, 1)
+    else:
+        value = getattr(latch, 'mem_data', None)
+        if value is None:
+            value = latch.alu_result
+        if value is not None:
+            scoreboard.produce(latch.rd, 1, value, 0)
+    return scoreboard
 
 
 def detect_branch_taken(ex_mem_reg) -> Tuple[bool, Optional[int]]:
@@ -138,3 +142,100 @@ def detect_branch_taken(ex_mem_reg) -> Tuple[bool, Optional[int]]:
         return True, ex_mem_reg.branch_target
     else:
         return False, None
+
+
+class Scoreboard:
+    """Register scoreboard used by `Pipeline` for stalls and forwarding.
+
+    Keeps, per register, the newest in-flight producer (a sequence number
+    assigned in ID, increasing in program order), its result once computed,
+    and the first cycle in which that result can be consumed. Producers are
+    recorded by the stages that create values (EX for ALU results, MEM for
+    loads) and released by WB.
+
+    Two bitmasks summarise the table: `inflight` has a bit for every register
+    with a producer in the pipeline and `pending` for every register whose
+    value may not be consumable yet. Together with the `reads` mask each
+    instruction carries from decode, the common no-hazard case is a single
+    AND. Because readiness is a cycle number, deeper pipelines and
+    multi-cycle units only need to `produce()` with a later cycle.
+    """
+
+    NOT_READY = 1 << 62  # ready-cycle of a reserved register whose value is pending
+
+    def __init__(self, num_regs: int = NUM_REGS):
+        self.owner = [0] * num_regs   # seq of the newest in-flight producer (0 = none)
+        self.value = [0] * num_regs   # that producer's result, once produced
+        self.ready = [0] * num_regs   # first cycle in which the value can be consumed
+        self.inflight = 0             # registers with an in-flight producer
+        self.pending = 0              # registers whose ready cycle may lie ahead
+
+    def reserve(self, reg: Optional[int], seq: int):
+        """A producer has issued but its result is not known yet (e.g., a load in EX)."""
+        if reg:
+            self.owner[reg] = seq
+            self.ready[reg] = self.NOT_READY
+            self.inflight |= 1 << reg
+            self.pending |= 1 << reg
+
+    def produce(self, reg: Optional[int], seq: int, value: int, cycle: int):
+        """Result of `seq` computed in `cycle`; consumers may use it from the next cycle.
+
+        The value is wrapped like a register file write, so a forwarded
+        operand equals the one read after writeback.
+        """
+        if reg and seq >= self.owner[reg]:  # never override a younger producer
+            self.owner[reg] = seq
+            self.value[reg] = wrap32(value)
+            self.ready[reg] = cycle + 1
+            self.inflight |= 1 << reg
+            self.pending |= 1 << reg
+
+    def retire(self, reg: Optional[int], seq: int, cycle: Optional[int] = None):
+        """`seq` wrote the register file; stop forwarding unless a younger producer exists.
+
+        With `cycle`, a result that is not consumable until a later cycle (a
+        multi-cycle unit that finishes after WB) stays on the scoreboard.
+        """
+        if reg and self.owner[reg] == seq and (cycle is None or self.ready[reg] <= cycle):
+            self.owner[reg] = 0
+            self.inflight &= ~(1 << reg)
+            self.pending &= ~(1 << reg)
+
+    def must_stall(self, id_ex, cycle: int) -> bool:
+        """True if the ID/EX instruction reads a register not consumable in `cycle`."""
+        busy = id_ex.reads & self.pending
+        while busy:
+            bit = busy & -busy
+            busy ^= bit
+            if self.ready[bit.bit_length() - 1] > cycle:
+                return True
+            self.pending &= ~bit  # ready from now on
+        return False
+
+    def read(self, reg: int, registers) -> int:
+        """Current value of `reg`: forwarded from the newest producer or the register file."""
+        if self.inflight >> reg & 1:
+            return self.value[reg]
+        return registers.read(reg)
+
+    def read_operands(self, id_ex, registers):
+        """Fill ID/EX operand values, forwarding from in-flight producers."""
+        if id_ex.reads & self.inflight:
+            if id_ex.rs is not None:
+                id_ex.rs_val = self.read(id_ex.rs, registers)
+            if id_ex.rt is not None:
+                id_ex.rt_val = self.read(id_ex.rt, registers)
+        else:
+            if id_ex.rs is not None:
+                id_ex.rs_val = registers.read(id_ex.rs)
+            if id_ex.rt is not None:
+                id_ex.rt_val = registers.read(id_ex.rt)
+
+    def clear(self):
+        n = len(self.owner)
+        self.owner = [0] * n
+        self.value = [0] * n
+        self.ready = [0] * n
+        self.inflight = 0
+        self.pending = 0
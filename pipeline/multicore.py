@@ -0,0 +1,109 @@
+# pipeline/multicore.py
+from dataclasses import dataclass
+from typing import List, Optional
+
+from pipeline.pipeline import Pipeline
+from pipeline.branch_predictor import make_predictor
+from execute.muldiv_unit import MulDivUnit
+from state.cpu_state import CPUstate
+from state.memory import Memory
+from state.memory_system import MemorySystem
+from state.coherence import SnoopingBus, CoherentCache
+
+
+@dataclass
+class Core:
+    """One core: its architectural state and pipeline."""
+    cid: int
+    cpu: CPUstate
+    pipeline: Pipeline
+
+    @property
+    def cpi(self) -> float:
+        """Cycles per retired instruction so far."""
+        return self.pipeline.cycle / self.pipeline.retired if self.pipeline.retired else 0.0
+
+
+class Multicore:
+    """`cores` scalar pipelines over one shared memory.
+
+    Each core has its own CPUstate (PC and registers) and `Pipeline`, with
+    its own `predictor` (by name) and `muldiv` unit (`MulDivUnit` arguments).
+    With
+    `dcache` (`state.cache.Cache` arguments), each also gets a private
+    `CoherentCache` on a shared `SnoopingBus` (MSI). All cores run the same
+    program from PC 0; with `id_register`, core i starts with i in that
+    register so kernels can split their work. Synchronize with TAS.
+
+    `step()` advances the core that is furthest behind in time (lowest
+    `pipeline.cycle`, then lowest index) by one step, so cores stepping over
+    several cycles on a cache miss stay in global time order and every run
+    is deterministic. Memory effects of a step are visible to the next one.
+
+    With `end_pc`, a core is finished once its PC has left [0, end_pc) and
+    no instruction from inside that range is left in its pipeline; finished
+    cores are no longer stepped. `cycle` is the time of the slowest core.
+    """
+
+    def __init__(self, cores: int = 2, dcache: Optional[dict] = None, upgrade_latency: int = 1,
+                 id_register: Optional[int] = None, end_pc: Optional[int] = None,
+                 memory=None, predictor: Optional[str] = None, muldiv: Optional[dict] = None):
+        if cores < 1:
+            raise ValueError('A multicore system needs at least one core')
+        self.memory = memory if memory is not None else Memory()
+        self.bus = SnoopingBus() if dcache else None
+        self.id_register = id_register
+        self.end_pc = end_pc
+        self.cores: List[Core] = []
+        for cid in range(cores):
+            l1d = None
+            if dcache:
+                l1d = CoherentCache(self.bus, upgrade_latency, name=f'L1D{cid}', **dcache)
+            pipeline = Pipeline(predictor=make_predictor(predictor) if predictor else None,
+                                memory_system=MemorySystem(dcache=l1d),
+                                muldiv=MulDivUnit(**muldiv) if muldiv else None)
+            self.cores.append(Core(cid, CPUstate(memory=self.memory), pipeline))
+
+    def load_program(self, words, base: int = 0, predecode: bool = True):
+        """Store `words` in the shared memory and start every core at `base`."""
+        first = self.cores[0].cpu
+        first.load_program(words, base, predecode)
+        for core in self.cores:
+            core.cpu.pc = base
+            core.cpu.imem = first.imem
+            if self.id_register is not None:
+                core.cpu.registers.write(self.id_register, core.cid)
+
+    def step(self):
+        """Step the core furthest behind in time; return it (None once all are finished)."""
+        running = [core for core in self.cores if not self.finished(core)]
+        if not running:
+            return None
+        core = min(running, key=lambda core: core.pipeline.cycle)
+        core.pipeline.step(core.cpu)
+        return core
+
+    def finished(self, core: Core) -> bool:
+        """True once the core left the program and drained the instructions from inside it."""
+        if self.end_pc is None:
+            return False
+        end = self.end_pc
+        if 0 <= core.cpu.pc < end:
+            return False
+        pipeline = core.pipeline
+        in_flight = [latch.pc for latch in (pipeline.id_ex, pipeline.ex_mem, pipeline.mem_wb) if latch.seq]
+        if pipeline.if_id.instr is not None:
+            in_flight.append(pipeline.if_id.pc)
+        return all(pc >= end for pc in in_flight)
+
+    @property
+    def done(self) -> bool:
+        return all(self.finished(core) for core in self.cores)
+
+    @property
+    def cycle(self) -> int:
+        return max(core.pipeline.cycle for core in self.cores)
+
+    @property
+    def retired(self) -> int:
+        return sum(core.pipeline.retired for core in self.cores)
@@ -0,0 +1,217 @@
+# pipeline/multithread.py
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from pipeline.pipeline import Pipeline
+from pipeline.pipeline_regs import IF_ID, ID_EX, EX_MEM, MEM_WB
+from pipeline.pipeline_stages import IF, ID, EX, MEM, WB
+from pipeline.hazards import Scoreboard, detect_branch_taken, is_branch, STORE_OPS, MEM_RESULT_OPS
+from decoder.decoder import HI
+from execute.muldiv_unit import MULDIV_OPS
+from state.cpu_state import CPUstate
+
+
+def make_threads(cpu: CPUstate, count: int) -> List[CPUstate]:
+    """Return `count` thread contexts: `cpu` itself and copies sharing its memory.
+
+    Every context starts at `cpu.pc` with its own (zeroed) register file and
+    fetches from the same instruction store.
+    """
+    threads = [cpu]
+    for _ in range(count - 1):
+        thread = CPUstate(memory=cpu.memory)
+        thread.pc = cpu.pc
+        thread.imem = cpu.imem
+        threads.append(thread)
+    return threads
+
+
+@dataclass
+class ThreadContext:
+    """Front-end latches, hazard state and counters of one hardware thread."""
+    tid: int
+    scoreboard: Scoreboard = field(default_factory=Scoreboard)
+    if_id: IF_ID = field(default_factory=IF_ID)
+    id_ex: ID_EX = field(default_factory=ID_EX)
+    retired: int = 0
+    stalls: int = 0    # cycles its next instruction waited on an operand or the multiply/divide unit
+    flushes: int = 0
+
+
+class MultithreadedPipeline(Pipeline):
+    """Fine-grained multithreaded version of `Pipeline`.
+
+    `threads` hardware threads share the EX/MEM/WB back end, the
+    multiply/divide unit and the branch predictor. Each has its own CPUstate
+    (PC and registers, memory shared; see `make_threads`), IF/ID and ID/EX
+    latches and scoreboard, so hazards only ever exist within a thread.
+    `step` takes the list of thread CPUs.
+
+    Every cycle one instruction issues from ID/EX to EX: threads are tried
+    round-robin starting after the last one that issued, and a thread whose
+    instruction would stall is skipped, so one thread's load-use and
+    multiply stalls are filled with the other's instructions. The single
+    fetch port alternates the same way between threads with a free IF/ID
+    latch. A mispredicted branch squashes only its own thread's front end.
+
+    With `end_pc`, a thread stops fetching once its PC leaves [0, end_pc)
+    and is `finished` when its last instruction has written back; a branch
+    still in flight can send it back into the program.
+
+    Counters: per-thread `retired`, `stalls` and `flushes` in `contexts`;
+    `stalls` here counts cycles where no thread could issue, and
+    `hidden_stalls` cycles where a stalled thread was covered by another.
+    Caches, store buffers, delay slots, early branch resolution and a
+    return address stack are not modelled here.
+    """
+
+    def __init__(self, threads: int = 2, predictor=None, muldiv=None, end_pc: Optional[int] = None):
+        super().__init__(predictor=predictor, muldiv=muldiv)
+        if threads < 1:
+            raise ValueError('A multithreaded pipeline needs at least one thread')
+        self.contexts = [ThreadContext(tid) for tid in range(threads)]
+        self.end_pc = end_pc
+        self.ex_thread: Optional[ThreadContext] = None   # owner of ex_mem
+        self.wb_thread: Optional[ThreadContext] = None   # owner of mem_wb
+        self.last_issue = threads - 1
+        self.last_fetch = threads - 1
+        self.hidden_stalls = 0
+
+    def step(self, cpus):
+        """Perform one cycle on the thread CPUs `cpus`: WB, MEM, EX, then each thread's ID and one IF."""
+        self.cycle += 1
+        cycle = self.cycle
+        contexts = self.contexts
+        issuing = self._select(cycle)
+
+        # WRITEBACK into the owning thread's register file
+        owner = self.wb_thread
+        WB(cpus[owner.tid] if owner is not None else cpus[0], self.mem_wb)
+        if self.mem_wb.seq:
+            self.retired += 1
+            owner.retired += 1
+            owner.scoreboard.retire(self.mem_wb.rd, self.mem_wb.seq, cycle)
+            if self.mem_wb.hi is not None:
+                owner.scoreboard.retire(HI, self.mem_wb.seq, cycle)
+
+        # MEM (memory is shared)
+        owner = self.ex_thread
+        MEM(cpus[owner.tid] if owner is not None else cpus[0], self.ex_mem, self.next_mem_wb)
+        if self.ex_mem.mem_op in MEM_RESULT_OPS:
+            owner.scoreboard.produce(self.next_mem_wb.rd, self.next_mem_wb.seq,
+                                     self.next_mem_wb.mem_data, cycle)
+
+        # EX: the selected thread's instruction, or a bubble
+        redirect = None
+        if issuing is not None:
+            scoreboard = issuing.scoreboard
+            EX(issuing.id_ex, self.next_ex_mem)
+            ex_mem = self.next_ex_mem
+            if ex_mem.rd is not None:
+                if ex_mem.mem_op in MEM_RESULT_OPS:
+                    scoreboard.reserve(ex_mem.rd, ex_mem.seq)
+                elif ex_mem.op in MULDIV_OPS:
+                    done = self.muldiv.issue(ex_mem.op, cycle)
+                    scoreboard.produce(ex_mem.rd, ex_mem.seq, ex_mem.alu_result, done)
+                    if ex_mem.hi is not None:
+                        scoreboard.produce(HI, ex_mem.seq, ex_mem.hi, done)
+                elif ex_mem.mem_op not in STORE_OPS:
+                    scoreboard.produce(ex_mem.rd, ex_mem.seq, ex_mem.alu_result, cycle)
+            if is_branch(ex_mem.op):
+                redirect = self._resolve(ex_mem, *detect_branch_taken(ex_mem))
+            issuing.id_ex = ID_EX()
+        else:
+            self.next_ex_mem.clear()
+
+        if redirect is not None:
+            # Mispredicted: squash the thread's front end; it refetches next cycle
+            issuing.if_id.clear()
+            issuing.id_ex.clear()
+            cpus[issuing.tid].pc = redirect
+            issuing.flushes += 1
+            self.flushes += 1
+
+        # ID for every thread whose ID/EX is free; operands are (re-)read through its scoreboard
+        for context in contexts:
+            cpu = cpus[context.tid]
+            if context.id_ex.op is None and context.if_id.instr is not None:
+                ID(cpu, context.if_id, context.id_ex)
+                if context.id_ex.op is not None:
+                    self.seq += 1
+                    context.id_ex.seq = self.seq
+                context.if_id = IF_ID()
+            context.scoreboard.read_operands(context.id_ex, cpu.registers)
+
+        # IF: one thread per cycle, round-robin over those with a free IF/ID latch
+        for offset in range(1, len(contexts) + 1):
+            context = contexts[(self.last_fetch + offset) % len(contexts)]
+            if context is issuing and redirect is not None:
+                continue
+            cpu = cpus[context.tid]
+            if context.if_id.instr is None and self._fetching(cpu):
+                IF(cpu, context.if_id, self.predictor)
+                self.last_fetch = context.tid
+                break
+
+        self.wb_thread = self.ex_thread
+        self.ex_thread = issuing
+        self.ex_mem = self.next_ex_mem
+        self.mem_wb = self.next_mem_wb
+        self.next_ex_mem = EX_MEM()
+        self.next_mem_wb = MEM_WB()
+
+    def _select(self, cycle: int) -> Optional[ThreadContext]:
+        """Pick the thread whose ID/EX instruction issues this cycle, counting the stalled ones."""
+        contexts = self.contexts
+        selected = None
+        stalled = False
+        for offset in range(1, len(contexts) + 1):
+            context = contexts[(self.last_issue + offset) % len(contexts)]
+            id_ex = context.id_ex
+            if id_ex.op is None:
+                continue
+            if self._stalled(context, cycle):
+                context.stalls += 1
+                stalled = True
+            elif selected is None:
+                selected = context
+        if selected is not None:
+            self.last_issue = selected.tid
+            if stalled:
+                self.hidden_stalls += 1
+        elif stalled:
+            self.stalls += 1
+        return selected
+
+    def _stalled(self, context: ThreadContext, cycle: int) -> bool:
+        """True if the thread's ID/EX instruction cannot issue this cycle."""
+        id_ex = context.id_ex
+        if context.scoreboard.must_stall(id_ex, cycle):
+            return True
+        if id_ex.op in MULDIV_OPS and not self.muldiv.can_issue(cycle):
+            self.muldiv.busy_stalls += 1
+            return True
+        return False
+
+    def _fetching(self, cpu) -> bool:
+        """True if the thread's PC is still inside the program."""
+        return self.end_pc is None or 0 <= cpu.pc < self.end_pc
+
+    def finished(self, context: ThreadContext, cpu) -> bool:
+        """True once the thread stopped fetching and its last instruction wrote back."""
+        return (not self._fetching(cpu) and context.if_id.instr is None and context.id_ex.op is None
+                and not (self.ex_thread is context and self.ex_mem.seq)
+                and not (self.wb_thread is context and self.mem_wb.seq))
+
+    def thread_ipc(self, tid: int) -> float:
+        """Instructions retired per cycle by one thread."""
+        return self.contexts[tid].retired / self.cycle if self.cycle else 0.0
+
+    def flush(self):
+        """Flush all pipeline latches of every thread."""
+        super().flush()
+        for context in self.contexts:
+            context.if_id.clear()
+            context.id_ex.clear()
+            context.scoreboard.clear()
+        self.ex_thread = self.wb_thread = None
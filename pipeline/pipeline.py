@@ -1,16 +1,57 @@
 # pipeline/pipeline.py
+import copy
+from collections import deque
+
 from pipeline.pipeline_regs import IF_ID, ID_EX, EX_MEM, MEM_WB
 from pipeline.pipeline_stages import IF, ID, EX, MEM, WB
-from pipeline.hazards import forwarding, detect_raw, detect_load_use_hazard, detect_branch_taken
+from pipeline.hazards import (Scoreboard, detect_branch_taken, is_branch, evaluate_branch, STORE_OPS,
+                              MEM_RESULT_OPS, MEM_WRITE_OPS)
+from decoder.decoder import HI
+from execute.muldiv_unit import MulDivUnit, MULDIV_OPS
+from state.memory_system import MemorySystem
 
 class Pipeline:
     """5-stage pipeline controller with stall and flush logic.
 
     This controller manages the pipeline registers and detects/handles hazards:
     - Stall on load-use hazards (prevent IF/ID and ID/EX advancement)
+    - Forward in-flight results through a register scoreboard
     - Flush on demand (clear pipeline registers on mispredicted branches)
+
+    Options:
+    - `early_branch`: resolve branches and jumps in ID (1-cycle taken penalty)
+    - `predictor`, `ras`: fetch follows their predictions (pipeline/branch_predictor.py);
+      without them fetch continues at PC+4
+    - `delay_slot`: MIPS-style delay slots (see `parser.scheduler.fill_delay_slots`)
+    - `memory_system`: caches, prefetcher, store buffer and region latencies (state/memory_system.py)
+    - `trace`: record fetch and data addresses for cache sweeps (analysis/stack_distance.py)
+    - `muldiv`: multiply/divide unit timing (execute/muldiv_unit.py)
+    - `fetch_queue`, `fetch_width`: decouple fetch from decode (see `_fetch_ahead`)
     """
-    def __init__(self):
+    width = 1  # instructions fetched and issued per cycle
+    def __init__(self, early_branch: bool = False, predictor=None, ras=None, delay_slot: bool = False,
+                 memory_system=None, trace=None, muldiv=None, fetch_queue: int = 0, fetch_width: int = 1):
+        if delay_slot and (predictor is not None or ras is not None):
+            raise ValueError('Delay-slot mode cannot be combined with fetch prediction')
+        if fetch_queue < 0 or fetch_width < 1 or fetch_width > 1 and not fetch_queue:
+            raise ValueError('The fetch queue depth must be non-negative, and a fetch width '
+                             'above 1 needs a fetch queue')
+        if fetch_queue and delay_slot:
+            raise ValueError('Delay-slot mode cannot be combined with a fetch queue')
+        self.early_branch = early_branch
+        self.delay_slot = delay_slot
+        self.predictor = predictor
+        self.ras = ras  # optional ReturnAddressStack predicting JR $31 in fetch
+        self.memory_system = memory_system if memory_system is not None else MemorySystem()
+        self.muldiv = muldiv if muldiv is not None else MulDivUnit()
+        self.fetch_pc = None      # PC whose I-cache fill is outstanding
+        self.fetch_ready = 0      # cycle its fetch can complete
+        self.after_fetch = None   # delay-slot redirect applied once the slot is fetched
+        self.trace = trace
+        self.fetch_queue_depth = fetch_queue
+        self.fetch_width = fetch_width
+        self.fetch_queue = deque() if fetch_queue else None  # IF/ID latches fetched ahead of ID
+
         # current pipeline register state
         self.if_id = IF_ID()
         self.id_ex = ID_EX()
@@ -22,29 +63,78 @@ class Pipeline:
         self.next_id_ex = ID_EX()
         self.next_ex_mem = EX_MEM()
         self.next_mem_wb = MEM_WB()
-        
+
+        # hazard unit: pending producers and result readiness per register
+        self.scoreboard = Scoreboard()
+        self.seq = 0  # last sequence number handed out in ID
+
         # cycle counter for debugging
         self.cycle = 0
 
+        # event counters: stall cycles, taken-branch flushes, instructions written back
+        self.stalls = 0
+        self.flushes = 0
+        self.retired = 0
+        # memory stall cycles: pipeline frozen on D-cache misses and slow memory, fetch bubbles on I-cache misses
+        self.memory_stalls = 0
+        self.fetch_stalls = 0
+        # front end: cycles fetch was held by a full IF/ID latch (and queue), queue occupancy
+        self.fetch_blocked = 0
+        self.queue_occupancy_cycles = 0
+        self.max_queue_occupancy = 0
+
     def step(self, cpu):
         """Perform one pipeline cycle with hazard detection and control.
-        
-        1. Check for load-use hazard; if detected, stall IF/ID and ID/EX (and insert NOP in EX)
-        2. Run stages (WB, MEM, EX, ID, IF) appropriately based on stall/flush
-        3. Check for branch taken in next_ex_mem (just computed by EX); if taken, flush pipeline and redirect PC
-        4. Apply forwarding
+
+        1. Ask the scoreboard whether ID/EX reads a register that is not ready yet
+           (load-use, a bit test of its decoded read mask); if so, stall IF/ID and ID/EX (and insert NOP in EX)
+        2. Run stages (WB, MEM, EX, ID, IF) appropriately based on stall/flush,
+           recording produced and retired results in the scoreboard
+        3. Resolve the branch in next_ex_mem (just computed by EX); if it was mispredicted
+           (taken, without a predictor), flush pipeline and redirect PC
+           (with early_branch, resolve the branch leaving ID instead and squash only the IF slot)
+        4. Read ID/EX operands through the scoreboard (forwarding)
         5. Commit pipeline registers
         """
         self.cycle += 1
-        
-        # Check for load-use hazard between current ID/EX and current EX/MEM
-        stall_requested = detect_load_use_hazard(self.id_ex, self.ex_mem)
-        
-        # WRITEBACK stage (always runs)
+        cycle = self.cycle
+        scoreboard = self.scoreboard
+
+        # Stall if the instruction about to execute needs a value that is not ready
+        # (or is a multiply/divide and the unit is still busy)
+        stall_requested = scoreboard.must_stall(self.id_ex, cycle)
+        if not stall_requested and self.id_ex.op in MULDIV_OPS and not self.muldiv.can_issue(cycle):
+            stall_requested = True
+            self.muldiv.busy_stalls += 1
+        if stall_requested:
+            self.stalls += 1
+
+        # WRITEBACK stage (always runs); the register file now holds the result
         WB(cpu, self.mem_wb)
+        if self.mem_wb.seq:
+            self.retired += 1
+            scoreboard.retire(self.mem_wb.rd, self.mem_wb.seq, cycle)
+            if self.mem_wb.hi is not None:
+                scoreboard.retire(HI, self.mem_wb.seq, cycle)
 
-        # MEM stage (always runs)
-        MEM(cpu, self.ex_mem, self.next_mem_wb)
+        # Store buffer: write out the stores that finished draining; a store
+        # meeting a full buffer freezes the pipeline until the head drains
+        mem_op = self.ex_mem.mem_op
+        memory_system = self.memory_system
+        self.cycle += memory_system.store_wait(self.cycle, cpu, mem_op in MEM_WRITE_OPS)
+
+        # MEM stage (always runs); loaded values become available for forwarding
+        MEM(cpu, self.ex_mem, self.next_mem_wb, memory_system.store_buffer)
+        if mem_op in MEM_RESULT_OPS:
+            scoreboard.produce(self.next_mem_wb.rd, self.next_mem_wb.seq, self.next_mem_wb.mem_data, cycle)
+        if mem_op is not None:
+            if self.trace is not None:
+                self.trace.data.append(self.ex_mem.alu_result)
+            # The access holds MEM and freezes the stages behind it: skip the frozen cycles
+            extra = memory_system.data_access(self.ex_mem.alu_result, mem_op in MEM_WRITE_OPS,
+                                              self.ex_mem.pc, self.cycle)
+            self.cycle += extra
+            self.memory_stalls += extra
 
         # EX stage: if stalling, insert NOP (clear); otherwise execute current ID/EX
         if stall_requested:
@@ -52,51 +142,100 @@ class Pipeline:
             self.next_ex_mem.clear()
         else:
             # Normal: execute current ID/EX
-            EX(self.id_ex, self.next_ex_mem)
+            EX(self.id_ex, self.next_ex_mem, self.delay_slot)
+            ex_mem = self.next_ex_mem
+            if ex_mem.rd is not None:
+                if ex_mem.mem_op in MEM_RESULT_OPS:
+                    scoreboard.reserve(ex_mem.rd, ex_mem.seq)
+                elif ex_mem.op in MULDIV_OPS:
+                    done = self.muldiv.issue(ex_mem.op, cycle)
+                    scoreboard.produce(ex_mem.rd, ex_mem.seq, ex_mem.alu_result, done)
+                    if ex_mem.hi is not None:
+                        scoreboard.produce(HI, ex_mem.seq, ex_mem.hi, done)
+                elif ex_mem.mem_op not in STORE_OPS:
+                    scoreboard.produce(ex_mem.rd, ex_mem.seq, ex_mem.alu_result, cycle)
 
-        # Check for branch taken in next_ex_mem (the result of EX stage this cycle)
-        branch_taken, branch_target = detect_branch_taken(self.next_ex_mem)
+        # Resolve a branch leaving EX (just computed); with early resolution
+        # branches were already handled in ID
+        redirect = None
+        if not self.early_branch and is_branch(self.next_ex_mem.op):
+            redirect = self._resolve(self.next_ex_mem, *detect_branch_taken(self.next_ex_mem))
 
         # ID stage: if stalling, hold ID/EX; otherwise decode next instruction
+        hold_if_id = stall_requested
         if stall_requested:
-            # Stall: restore instruction info but clear operand values so forwarding refills them
-            self.next_id_ex.pc = self.id_ex.pc
-            self.next_id_ex.op = self.id_ex.op
-            self.next_id_ex.rs = self.id_ex.rs
-            self.next_id_ex.rt = self.id_ex.rt
-            self.next_id_ex.rd = self.id_ex.rd
-            self.next_id_ex.imm = self.id_ex.imm
-            self.next_id_ex.shamt = self.id_ex.shamt
-            # Clear operand values so they can be re-forwarded from updated pipeline state
-            # But preserve values for register $0 (always 0, no forwarding needed)
-            self.next_id_ex.rs_val = None if self.id_ex.rs != 0 else self.id_ex.rs_val
-            self.next_id_ex.rt_val = None if self.id_ex.rt != 0 else self.id_ex.rt_val
+            # Stall: hold the instruction; its operands are re-read below
+            self.next_id_ex = copy.copy(self.id_ex)
         else:
             # Normal: decode next instruction
             ID(cpu, self.if_id, self.next_id_ex)
+            if (self.early_branch and is_branch(self.next_id_ex.op)
+                    and scoreboard.must_stall(self.next_id_ex, cycle)):
+                # Comparator operands not consumable yet: keep the branch in ID (one
+                # cycle behind an ALU result in EX, two behind a load in EX)
+                self.next_id_ex.clear()
+                hold_if_id = True
+                self.stalls += 1
+            elif self.next_id_ex.op is not None:
+                self.seq += 1
+                self.next_id_ex.seq = self.seq
+
+        # Forwarding: take each source from its newest in-flight producer or the register file
+        scoreboard.read_operands(self.next_id_ex, cpu.registers)
 
-        # Apply forwarding (even during stall, as values may have become available)
-        forwarding(self.next_id_ex, self.ex_mem, self.mem_wb)
-        forwarding(self.next_id_ex, self.next_ex_mem, self.next_mem_wb)
+        # Early resolution: the comparator sees the forwarded operands now
+        early_redirect = None
+        if self.early_branch and not hold_if_id and is_branch(self.next_id_ex.op):
+            id_ex = self.next_id_ex
+            taken = evaluate_branch(id_ex.op, id_ex.rs_val or 0, id_ex.rt_val or 0)
+            target = id_ex.rs_val if id_ex.op in ('JR', 'JALR') else id_ex.branch_target
+            early_redirect = self._resolve(id_ex, taken, target if taken else None)
 
         # IF stage: if stalling, hold IF/ID; otherwise fetch next instruction
-        if stall_requested:
+        if early_redirect is not None and self.delay_slot:
+            # The delay slot is fetched now (or once its line arrives); the target follows it
+            self.after_fetch = early_redirect
+            self._fetch(cpu)
+        elif early_redirect is not None:
+            # Squash the wrong-path fetch and redirect
+            self.next_if_id.clear()
+            if self.fetch_queue is not None:
+                self.fetch_queue.clear()
+            cpu.pc = early_redirect
+            self.flushes += 1
+        elif self.fetch_queue is not None:
+            # Decoupled front end: keep fetching into the queue
+            self._fetch_ahead(cpu, hold_if_id)
+        elif hold_if_id:
             # Stall: copy current IF/ID to next (no new fetch, don't advance PC)
-            self.next_if_id.pc = self.if_id.pc
-            self.next_if_id.instr = self.if_id.instr
+            self.next_if_id = copy.copy(self.if_id)
+            self.fetch_blocked += 1
         else:
-            # Normal: fetch next instruction
-            IF(cpu, self.next_if_id)
+            # Normal: fetch next instruction (following the predictor, if any)
+            self._fetch(cpu)
 
-        # Handle branch taken: flush pipeline and redirect PC
-        # This must happen BEFORE commit so the flushed state is used next cycle
-        if branch_taken and branch_target is not None:
-            # Flush the next IF/ID (clear fetched instruction that came after branch)
-            self.next_if_id.clear()
-            # Flush the next ID/EX (clear decoded instruction that came after branch)
-            self.next_id_ex.clear()
-            # Redirect PC to branch target for next cycle
-            cpu.pc = branch_target
+        # Handle a mispredicted branch: flush pipeline and redirect PC
+        # This must happen BEFORE commit so the flushed state is used next cycle.
+        # In delay-slot mode the slot always executes, so only what follows it is squashed
+        if redirect is not None:
+            self.flushes += 1
+            slot = self.next_ex_mem.pc + 4
+            if not self.delay_slot or self.next_id_ex.seq and self.next_id_ex.pc == slot:
+                # Flush the next IF/ID (clear fetched instruction that came after branch)
+                self.next_if_id.clear()
+                if self.fetch_queue is not None:
+                    self.fetch_queue.clear()
+                # Flush the next ID/EX (clear decoded instruction that came after branch),
+                # unless it is the delay slot
+                if not self.delay_slot:
+                    self.next_id_ex.clear()
+            elif self.next_if_id.instr is None or self.next_if_id.pc != slot:
+                # I-cache bubbles: the delay slot has not been fetched yet
+                self.after_fetch = redirect
+                redirect = None
+            # Redirect PC to the correct path for next cycle
+            if redirect is not None:
+                cpu.pc = redirect
 
         # Commit: advance register snapshots
         self.if_id = self.next_if_id
@@ -110,9 +249,108 @@ class Pipeline:
         self.next_ex_mem = EX_MEM()
         self.next_mem_wb = MEM_WB()
 
+    def _fetch(self, cpu, if_id=None):
+        """Run IF into `if_id` (default: the next IF/ID), or insert a fetch bubble
+        while the I-cache fills the line at PC."""
+        if if_id is None:
+            if_id = self.next_if_id
+        icache = self.memory_system.icache
+        if icache is not None:
+            if self.fetch_pc != cpu.pc:
+                self.fetch_pc = cpu.pc
+                self.fetch_ready = self.cycle + icache.access(cpu.pc, pc=cpu.pc)
+            if self.cycle < self.fetch_ready:
+                if_id.clear()
+                self.fetch_stalls += 1
+                return
+            self.fetch_pc = None
+        if self.trace is not None:
+            self.trace.fetches.append(cpu.pc)
+        IF(cpu, if_id, self.predictor, self.ras)
+        if self.after_fetch is not None:
+            cpu.pc = self.after_fetch
+            self.after_fetch = None
+
+    def _fetch_ahead(self, cpu, hold_if_id):
+        """IF with a fetch queue: refill IF/ID from the queue, then fetch up to `fetch_width`.
+
+        Fetch (and prediction) keeps going into the queue while ID/EX is
+        stalled, stopping after a predicted-taken instruction, so buffered
+        instructions cover later I-cache misses. A fetched instruction goes
+        straight to IF/ID when that is empty and to the queue otherwise, so
+        an empty queue adds no latency; redirects discard the queue.
+        """
+        queue = self.fetch_queue
+        if hold_if_id:
+            self.next_if_id = copy.copy(self.if_id)
+        elif queue:
+            self.next_if_id = queue.popleft()
+        for _ in range(self.fetch_width):
+            if self.next_if_id.instr is not None and len(queue) >= self.fetch_queue_depth:
+                self.fetch_blocked += 1
+                break
+            if_id = IF_ID()
+            self._fetch(cpu, if_id)
+            if if_id.instr is None:
+                break  # I-cache bubble
+            if self.next_if_id.instr is None:
+                self.next_if_id = if_id
+            else:
+                queue.append(if_id)
+            if if_id.predicted_target is not None:
+                break
+        occupancy = len(queue)
+        self.queue_occupancy_cycles += occupancy
+        if occupancy > self.max_queue_occupancy:
+            self.max_queue_occupancy = occupancy
+
+    @property
+    def average_queue_occupancy(self) -> float:
+        """Mean number of fetch queue entries at the end of a cycle."""
+        return self.queue_occupancy_cycles / self.cycle if self.cycle else 0.0
+
+    def _resolve(self, latch, taken, target):
+        """Settle a branch whose outcome is known; return the PC to redirect to, or None.
+
+        `latch` is the branch's ID/EX or EX/MEM register (pc, prediction and
+        return address stack checkpoint).
+        """
+        if target is None:
+            taken = False
+        predicted = latch.predicted_target
+        if self.predictor is not None:
+            self.predictor.resolve(latch.pc, taken, target, predicted)
+        actual = target if taken else None
+        ras = self.ras
+        if ras is not None and latch.op == 'JR' and latch.pc in ras.return_pcs:
+            ras.returns += 1
+            if actual != predicted:
+                ras.mispredicts += 1
+        if actual == predicted:
+            return None
+        if ras is not None and latch.ras_state is not None:
+            ras.restore(latch.ras_state)
+        return actual if taken else latch.pc + 4
+
+    @property
+    def ipc(self) -> float:
+        """Instructions retired per cycle so far."""
+        return self.retired / self.cycle if self.cycle else 0.0
+
+    def drain_stores(self, cpu):
+        """Write out the store buffer, advancing `cycle` until its last store completes."""
+        self.cycle = self.memory_system.drain(self.cycle, cpu)
+
+    def fork(self) -> "Pipeline":
+        """Return an independent copy of the pipeline latches and counters."""
+        return copy.deepcopy(self)
+
     def flush(self):
         """Flush all pipeline registers (e.g., after a taken branch)."""
         self.if_id.clear()
         self.id_ex.clear()
         self.ex_mem.clear()
         self.mem_wb.clear()
+        self.scoreboard.clear()
+        if self.fetch_queue is not None:
+            self.fetch_queue.clear()
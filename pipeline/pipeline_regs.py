@@ -1,16 +1,22 @@
 # pipeline/pipeline_regs.py
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Any, Optional
 
 
 @dataclass
 class IF_ID:
     pc: int = 0
     instr: Optional[int] = None
+    decoded: Optional[Any] = None  # predecoded record when fetched from cpu.imem
+    predicted_target: Optional[int] = None  # where IF went next if it predicted taken
+    ras_state: Optional[Any] = None  # return address stack checkpoint after this fetch
 
     def clear(self):
         self.pc = 0
         self.instr = None
+        self.decoded = None
+        self.predicted_target = None
+        self.ras_state = None
 
 
 @dataclass
@@ -25,6 +31,11 @@ class ID_EX:
     op: Optional[str] = None
     shamt: Optional[int] = None  # shift amount for shift operations
     branch_target: Optional[int] = None  # target address for branches/jumps
+    reads: int = 0   # bitmask of registers read (from DecodedInstruction)
+    writes: int = 0  # bitmask of registers written
+    predicted_target: Optional[int] = None
+    ras_state: Optional[Any] = None
+    seq: int = 0  # program-order sequence number assigned in ID (0 = bubble)
 
     def clear(self):
         self.pc = 0
@@ -37,6 +48,11 @@ class ID_EX:
         self.op = None
         self.shamt = None
         self.branch_target = None
+        self.reads = 0
+        self.writes = 0
+        self.predicted_target = None
+        self.ras_state = None
+        self.seq = 0
 
 
 @dataclass
@@ -48,7 +64,11 @@ class EX_MEM:
     rs_val: Optional[int] = None  # rs_val needed for branch evaluation
     rd: Optional[int] = None
     mem_op: Optional[str] = None
+    hi: Optional[int] = None  # HI result of MULT/DIV (alu_result holds LO)
     branch_target: Optional[int] = None  # target address for branches
+    predicted_target: Optional[int] = None
+    ras_state: Optional[Any] = None
+    seq: int = 0
 
     def clear(self):
         self.pc = 0
@@ -58,7 +78,11 @@ class EX_MEM:
         self.rs_val = None
         self.rd = None
         self.mem_op = None
+        self.hi = None
         self.branch_target = None
+        self.predicted_target = None
+        self.ras_state = None
+        self.seq = 0
 
 
 @dataclass
@@ -67,9 +91,13 @@ class MEM_WB:
     mem_data: Optional[int] = None
     alu_result: Optional[int] = None
     rd: Optional[int] = None
+    hi: Optional[int] = None
+    seq: int = 0
 
     def clear(self):
         self.pc = 0
         self.mem_data = None
         self.alu_result = None
         self.rd = None
+        self.hi = None
+        self.seq = 0
@@ -1,19 +1,45 @@
 # pipeline/pipeline_stages.py
-from decoder.decoder import decode
-from execute.alu import alu
+from decoder.decoder import decode, HI, LO
+from execute.alu import alu, muldiv
 from execute.branch_unit import branch
 from execute.load_store_unit import load_store
+from pipeline.branch_predictor import is_call, is_return
 
 
-def IF(cpu, next_if_id):
+def IF(cpu, next_if_id, predictor=None, ras=None):
     """Instruction Fetch: read the instruction at PC and write into next IF/ID register.
 
     This function advances the CPU PC so that the next IF sees the next instruction.
+    When `cpu.imem` is set and covers PC, the word and its predecoded record come
+    from the instruction store; otherwise fetch reads data memory (unified mode).
+    With a branch `predictor`, a predicted-taken fetch continues at the predicted
+    target instead of PC+4 and the target is recorded in IF/ID. A return
+    address stack `ras` records calls and predicts `JR $31` targets.
     """
-    instr_word = cpu.memory.load_word(cpu.pc)
+    imem = cpu.imem
+    index = cpu.pc >> 2
+    if imem is not None and imem.first <= index < imem.limit and not cpu.pc & 3:
+        next_if_id.instr = imem.words[index]
+        next_if_id.decoded = imem.decoded[index]
+    else:
+        next_if_id.instr = cpu.memory.fetch_word(cpu.pc)
+        next_if_id.decoded = None
     next_if_id.pc = cpu.pc
-    next_if_id.instr = instr_word
-    cpu.step_pc()
+    next_if_id.predicted_target = predictor.predict(cpu.pc) if predictor is not None else None
+    if ras is not None:
+        word = next_if_id.instr
+        if is_call(word):
+            ras.push(cpu.pc + 4)
+        elif is_return(word):
+            ras.return_pcs.add(cpu.pc)
+            target = ras.pop()
+            if target is not None:
+                next_if_id.predicted_target = target
+        next_if_id.ras_state = ras.checkpoint()
+    if next_if_id.predicted_target is not None:
+        cpu.pc = next_if_id.predicted_target
+    else:
+        cpu.step_pc()
 
 
 def ID(cpu, cur_if_id, next_id_ex):
@@ -26,7 +52,9 @@ def ID(cpu, cur_if_id, next_id_ex):
         next_id_ex.clear()
         return
 
-    dec = decode(cur_if_id.instr, pc=cur_if_id.pc)
+    dec = cur_if_id.decoded
+    if dec is None:
+        dec = decode(cur_if_id.instr, pc=cur_if_id.pc)
     next_id_ex.pc = cur_if_id.pc
     next_id_ex.op = dec.op
     next_id_ex.rs = dec.rs
@@ -37,16 +65,26 @@ def ID(cpu, cur_if_id, next_id_ex):
     next_id_ex.imm = dec.imm
     next_id_ex.shamt = dec.shamt  # Shift amount for shift operations
     next_id_ex.branch_target = dec.target  # Store branch/jump target
+    next_id_ex.reads = dec.reads
+    next_id_ex.writes = dec.writes
+    next_id_ex.predicted_target = cur_if_id.predicted_target
+    next_id_ex.ras_state = cur_if_id.ras_state
+
 
+def EX(cur_id_ex, next_ex_mem, delay_slot=False):
+    """Execute stage: perform ALU ops or compute memory addresses and write to next EX/MEM.
 
-def EX(cur_id_ex, next_ex_mem):
-    """Execute stage: perform ALU ops or compute memory addresses and write to next EX/MEM."""
+    With `delay_slot`, calls link past their delay slot (PC+8 instead of PC+4).
+    """
     next_ex_mem.clear()
     next_ex_mem.pc = cur_id_ex.pc
     next_ex_mem.op = cur_id_ex.op  # Carry forward op for branch detection
     next_ex_mem.rs_val = cur_id_ex.rs_val  # Carry forward rs_val for branch evaluation
     next_ex_mem.rt_val = cur_id_ex.rt_val  # Carry forward rt_val for branch evaluation
     next_ex_mem.branch_target = cur_id_ex.branch_target  # Carry forward branch target
+    next_ex_mem.predicted_target = cur_id_ex.predicted_target
+    next_ex_mem.ras_state = cur_id_ex.ras_state
+    next_ex_mem.seq = cur_id_ex.seq
 
     op = cur_id_ex.op
     if op is None:
@@ -61,6 +99,22 @@ def EX(cur_id_ex, next_ex_mem):
         next_ex_mem.alu_result = alu(op, cur_id_ex.rs_val, cur_id_ex.rt_val, shamt=cur_id_ex.shamt or 0)
         next_ex_mem.rd = cur_id_ex.rd
 
+    # Multiply/divide: the results are timed by the MulDivUnit in Pipeline
+    elif op in ("MULT", "MULTU", "DIV", "DIVU"):
+        if cur_id_ex.rs_val is None or cur_id_ex.rt_val is None:
+            return
+        next_ex_mem.hi, next_ex_mem.alu_result = muldiv(op, cur_id_ex.rs_val, cur_id_ex.rt_val)
+        next_ex_mem.rd = LO
+    elif op == "MUL":
+        if cur_id_ex.rs_val is None or cur_id_ex.rt_val is None:
+            return
+        next_ex_mem.alu_result = alu(op, cur_id_ex.rs_val, cur_id_ex.rt_val)
+        next_ex_mem.rd = cur_id_ex.rd
+    elif op in ("MFHI", "MFLO"):
+        # rs is HI or LO (see decode)
+        next_ex_mem.alu_result = cur_id_ex.rs_val
+        next_ex_mem.rd = cur_id_ex.rd
+
     # I-type immediate arithmetic/logical
     elif op in ("ADDI", "ADDIU"):
         if cur_id_ex.rs_val is None:
@@ -75,40 +129,78 @@ def EX(cur_id_ex, next_ex_mem):
         next_ex_mem.rd = cur_id_ex.rt
 
     # Load/store address computation
-    elif op in ("LW", "SW", "LB", "LBU", "LH", "LHU", "SB", "SH"):
+    elif op in ("LW", "SW", "LB", "LBU", "LH", "LHU", "SB", "SH", "TAS"):
         if cur_id_ex.rs_val is None:
             return
         next_ex_mem.alu_result = cur_id_ex.rs_val + (cur_id_ex.imm or 0)
         next_ex_mem.rt_val = cur_id_ex.rt_val
-        next_ex_mem.rd = cur_id_ex.rt
+        # Only loads write rt; a store's rt is a source
+        if op not in ("SW", "SB", "SH"):
+            next_ex_mem.rd = cur_id_ex.rt
         next_ex_mem.mem_op = op
 
+    # Calls write the return address; register jumps take their target from rs
+    elif op in ("JAL", "JALR", "JR"):
+        if op != "JAL":
+            next_ex_mem.branch_target = cur_id_ex.rs_val
+        if op != "JR":
+            next_ex_mem.alu_result = cur_id_ex.pc + (8 if delay_slot else 4)
+            next_ex_mem.rd = 31 if op == "JAL" else cur_id_ex.rd
+
     else:
         # For unimplemented ops, do nothing except forward pc
         pass
 
 
-def MEM(cpu, cur_ex_mem, next_mem_wb):
-    """Memory stage: perform loads/stores and prepare writeback values."""
+def MEM(cpu, cur_ex_mem, next_mem_wb, store_buffer=None):
+    """Memory stage: perform loads/stores and prepare writeback values.
+
+    With a `store_buffer` (state/store_buffer.py), stores retire into the
+    buffer instead of memory and loads read through it.
+    """
     next_mem_wb.clear()
     next_mem_wb.pc = cur_ex_mem.pc
-
-    if cur_ex_mem.mem_op == "LW":
-        next_mem_wb.mem_data = load_store("LW", cpu.memory, cur_ex_mem.alu_result)
+    next_mem_wb.seq = cur_ex_mem.seq
+
+    mem_op = cur_ex_mem.mem_op
+    if mem_op in ("LW", "LB", "LBU", "LH", "LHU"):
+        if store_buffer is not None:
+            next_mem_wb.mem_data = store_buffer.load(mem_op, cpu.memory, cur_ex_mem.alu_result)
+        else:
+            next_mem_wb.mem_data = load_store(mem_op, cpu.memory, cur_ex_mem.alu_result)
         next_mem_wb.rd = cur_ex_mem.rd
-    elif cur_ex_mem.mem_op == "SW":
-        load_store("SW", cpu.memory, cur_ex_mem.alu_result, cur_ex_mem.rt_val)
-    elif cur_ex_mem.mem_op in ("LB", "LBU", "LH", "LHU"):
-        next_mem_wb.mem_data = load_store(cur_ex_mem.mem_op, cpu.memory, cur_ex_mem.alu_result)
+    elif mem_op in ("SW", "SB", "SH"):
+        if store_buffer is not None:
+            if cur_ex_mem.rt_val is None:
+                raise ValueError('Store operations require rt_val')
+            store_buffer.push(mem_op, cur_ex_mem.alu_result, cur_ex_mem.rt_val, cur_ex_mem.pc, cpu.memory)
+            return
+        load_store(mem_op, cpu.memory, cur_ex_mem.alu_result, cur_ex_mem.rt_val)
+        # Keep the predecoded instruction store coherent with self-modifying code
+        if cpu.imem is not None:
+            cpu.imem.sync(cur_ex_mem.alu_result, cpu.memory)
+    elif mem_op == "TAS":
+        # Read the old word and set it to 1 in the same access
+        address = cur_ex_mem.alu_result
+        if store_buffer is not None:
+            next_mem_wb.mem_data = store_buffer.load('LW', cpu.memory, address)
+            store_buffer.push('SW', address, 1, cur_ex_mem.pc, cpu.memory)
+        else:
+            next_mem_wb.mem_data = load_store(mem_op, cpu.memory, address)
+            if cpu.imem is not None:
+                cpu.imem.sync(address, cpu.memory)
         next_mem_wb.rd = cur_ex_mem.rd
     else:
         next_mem_wb.alu_result = cur_ex_mem.alu_result
         next_mem_wb.rd = cur_ex_mem.rd
+        next_mem_wb.hi = cur_ex_mem.hi
 
 
 def WB(cpu, cur_mem_wb):
-    """Writeback: commit results to the register file."""
+    """Writeback: commit results to the register file (and HI after MULT/DIV)."""
     if cur_mem_wb.rd is not None:
         val = cur_mem_wb.mem_data if cur_mem_wb.mem_data is not None else cur_mem_wb.alu_result
         if val is not None:
-            cpu.registers.write(cur_mem_wb.rd, val)
\ No newline at end of file
+            cpu.registers.write(cur_mem_wb.rd, val)
+    if cur_mem_wb.hi is not None:
+        cpu.registers.write(HI, cur_mem_wb.hi)
\ No newline at end of file
@@ -0,0 +1,201 @@
+# pipeline/superscalar.py
+from collections import Counter
+from typing import List, Optional
+
+from pipeline.pipeline import Pipeline
+from pipeline.pipeline_regs import IF_ID, ID_EX, EX_MEM, MEM_WB
+from pipeline.pipeline_stages import IF, ID, EX, MEM, WB
+from pipeline.hazards import detect_branch_taken, is_branch, LOAD_OPS, STORE_OPS, ATOMIC_OPS, MEM_RESULT_OPS
+from decoder.decoder import HI
+from execute.muldiv_unit import MULDIV_OPS
+
+MEMORY_OPS = LOAD_OPS + STORE_OPS + ATOMIC_OPS
+
+# Why the younger instruction of an issue pair stayed behind
+PAIR_FAILURES = {
+    'dependency': 'reads a register the older one writes',
+    'memory port': 'both access memory',
+    'branch': 'the older one is a branch or jump',
+    'muldiv': 'multiply/divide unit taken or busy',
+    'operand': 'waits for an in-flight result',
+    'empty': 'no second instruction decoded',
+}
+
+
+class DualIssuePipeline(Pipeline):
+    """In-order, two-wide version of `Pipeline`.
+
+    Every stage holds up to two instructions (oldest first) and runs the
+    scalar stage functions on each. IF fetches two sequential instructions
+    per cycle (stopping after a predicted-taken one) and ID decodes as many
+    as the issue window has room for. Each cycle the oldest instruction in
+    the window issues to EX unless the scoreboard stalls it; the second one
+    joins it when the pair is legal:
+
+    - it does not read a register the first one writes (no intra-pair
+      forwarding; results of either slot reach both slots from the next
+      cycle on through the shared scoreboard)
+    - at most `memory_ports` of the two are loads/stores
+    - the first one is not a branch or jump (a branch ends its group)
+    - at most one uses the multiply/divide unit
+    - its own operands are ready
+
+    Branches resolve in EX as in the scalar pipeline and squash everything
+    younger. Counters: `issued`, `issue_cycles` (cycles issuing anything),
+    `dual_issues`, and `pair_failures` keyed by `PAIR_FAILURES`.
+
+    Caches, store buffers, delay slots and early branch resolution are not
+    modelled here. `ex_mem` names the latch being processed by MEM so
+    watchpoints can report its PC.
+    """
+
+    width = 2
+
+    def __init__(self, predictor=None, ras=None, muldiv=None, memory_ports: int = 1):
+        super().__init__(predictor=predictor, ras=ras, muldiv=muldiv)
+        if memory_ports < 1:
+            raise ValueError('A dual-issue pipeline needs at least one memory port')
+        self.memory_ports = memory_ports
+        self.fetched: List[IF_ID] = []      # IF/ID latches
+        self.window: List[ID_EX] = []       # ID/EX latches waiting to issue
+        self.executed: List[EX_MEM] = []    # EX/MEM latches
+        self.completed: List[MEM_WB] = []   # MEM/WB latches
+
+        self.issued = 0
+        self.issue_cycles = 0
+        self.dual_issues = 0
+        self.pair_failures = Counter()
+
+    def step(self, cpu):
+        """Perform one cycle: WB, MEM and EX on up to two instructions each, then ID and IF.
+
+        The issue decision is taken first, from the scoreboard as it stands
+        at the start of the cycle, exactly like the scalar stall check.
+        """
+        self.cycle += 1
+        cycle = self.cycle
+        scoreboard = self.scoreboard
+
+        count = self._issue_count(cycle)
+        if count:
+            self.issued += count
+            self.issue_cycles += 1
+            if count == 2:
+                self.dual_issues += 1
+        elif self.window:
+            self.stalls += 1
+
+        # WRITEBACK in program order, so the younger of two writers wins
+        for mem_wb in self.completed:
+            WB(cpu, mem_wb)
+            if mem_wb.seq:
+                self.retired += 1
+                scoreboard.retire(mem_wb.rd, mem_wb.seq, cycle)
+                if mem_wb.hi is not None:
+                    scoreboard.retire(HI, mem_wb.seq, cycle)
+
+        # MEM
+        completed = []
+        for ex_mem in self.executed:
+            self.ex_mem = ex_mem
+            mem_wb = MEM_WB()
+            MEM(cpu, ex_mem, mem_wb)
+            if ex_mem.mem_op in MEM_RESULT_OPS:
+                scoreboard.produce(mem_wb.rd, mem_wb.seq, mem_wb.mem_data, cycle)
+            completed.append(mem_wb)
+
+        # EX: the issue group; only its last instruction can be a branch
+        executed = []
+        redirect = None
+        for id_ex in self.window[:count]:
+            ex_mem = EX_MEM()
+            EX(id_ex, ex_mem)
+            if ex_mem.rd is not None:
+                if ex_mem.mem_op in MEM_RESULT_OPS:
+                    scoreboard.reserve(ex_mem.rd, ex_mem.seq)
+                elif ex_mem.op in MULDIV_OPS:
+                    done = self.muldiv.issue(ex_mem.op, cycle)
+                    scoreboard.produce(ex_mem.rd, ex_mem.seq, ex_mem.alu_result, done)
+                    if ex_mem.hi is not None:
+                        scoreboard.produce(HI, ex_mem.seq, ex_mem.hi, done)
+                elif ex_mem.mem_op not in STORE_OPS:
+                    scoreboard.produce(ex_mem.rd, ex_mem.seq, ex_mem.alu_result, cycle)
+            if is_branch(ex_mem.op):
+                redirect = self._resolve(ex_mem, *detect_branch_taken(ex_mem))
+            executed.append(ex_mem)
+        del self.window[:count]
+
+        if redirect is not None:
+            # Mispredicted: squash the window and the fetched instructions
+            self.window.clear()
+            self.fetched.clear()
+            cpu.pc = redirect
+            self.flushes += 1
+        else:
+            # ID into the free window slots; operands are (re-)read through the scoreboard
+            while self.fetched and len(self.window) < self.width:
+                id_ex = ID_EX()
+                ID(cpu, self.fetched.pop(0), id_ex)
+                if id_ex.op is not None:
+                    self.seq += 1
+                    id_ex.seq = self.seq
+                self.window.append(id_ex)
+            for id_ex in self.window:
+                scoreboard.read_operands(id_ex, cpu.registers)
+
+            # IF into the free IF/ID slots
+            while len(self.fetched) < self.width:
+                if_id = IF_ID()
+                IF(cpu, if_id, self.predictor, self.ras)
+                self.fetched.append(if_id)
+                if if_id.predicted_target is not None:
+                    break
+
+        self.executed = executed
+        self.completed = completed
+
+    def _issue_count(self, cycle: int) -> int:
+        """How many instructions of the window issue this cycle (0, 1 or 2)."""
+        window = self.window
+        if not window:
+            return 0
+        first = window[0]
+        if self.scoreboard.must_stall(first, cycle):
+            return 0
+        if first.op in MULDIV_OPS and not self.muldiv.can_issue(cycle):
+            self.muldiv.busy_stalls += 1
+            return 0
+        reason = self._pair_failure(first, window[1] if len(window) > 1 else None, cycle)
+        if reason is not None:
+            self.pair_failures[reason] += 1
+            return 1
+        return 2
+
+    def _pair_failure(self, first: ID_EX, second: Optional[ID_EX], cycle: int) -> Optional[str]:
+        """Reason `second` cannot issue together with `first`, or None."""
+        if second is None or second.op is None:
+            return 'empty'
+        if is_branch(first.op):
+            return 'branch'
+        if second.reads & first.writes:
+            return 'dependency'
+        if first.op in MEMORY_OPS and second.op in MEMORY_OPS and self.memory_ports < 2:
+            return 'memory port'
+        if second.op in MULDIV_OPS and (first.op in MULDIV_OPS or not self.muldiv.can_issue(cycle)):
+            return 'muldiv'
+        if self.scoreboard.must_stall(second, cycle):
+            return 'operand'
+        return None
+
+    @property
+    def pairing_rate(self) -> float:
+        """Share of issuing cycles that issued two instructions."""
+        return self.dual_issues / self.issue_cycles if self.issue_cycles else 0.0
+
+    def flush(self):
+        """Flush all pipeline latches."""
+        super().flush()
+        self.fetched.clear()
+        self.window.clear()
+        self.executed.clear()
+        self.completed.clear()
@@ -0,0 +1,345 @@
+# pipeline/tomasulo.py
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from pipeline.pipeline import Pipeline
+from pipeline.pipeline_regs import IF_ID, ID_EX, EX_MEM
+from pipeline.pipeline_stages import IF, ID, EX
+from pipeline.hazards import detect_branch_taken, is_branch, LOAD_OPS, STORE_OPS, ATOMIC_OPS
+from decoder.decoder import HI
+from execute.load_store_unit import load_store
+from execute.muldiv_unit import MULDIV_OPS
+from state.registers import wrap32
+from state.store_buffer import LOAD_SIZES, STORE_SIZES
+
+# Reservation station classes
+UNITS = ('alu', 'mem', 'muldiv')
+
+
+def unit_of(op: Optional[str]) -> str:
+    if op in LOAD_OPS or op in STORE_OPS:
+        return 'mem'
+    if op in MULDIV_OPS:
+        return 'muldiv'
+    return 'alu'
+
+
+@dataclass
+class RobEntry:
+    seq: int
+    pc: int
+    op: Optional[str]
+    dests: Tuple[int, ...]                  # architectural registers written
+    predicted_target: Optional[int] = None
+    values: Dict[int, int] = field(default_factory=dict)
+    done: bool = False                      # result broadcast (or store/branch resolved)
+    store: Optional[Tuple[str, int, int]] = None  # (op, address, value) written at commit
+    next_pc: int = 0                        # PC of the next instruction in program order
+    taken: bool = False
+    target: Optional[int] = None
+    fault: Optional[Exception] = None       # raised at commit (the load may be on a wrong path)
+
+
+@dataclass
+class Station:
+    """Reservation station slot: the ID/EX latch with operands captured or tagged."""
+    entry: RobEntry
+    id_ex: ID_EX
+    waits: Dict[str, Tuple[int, int]]  # operand field -> (producer seq, register)
+    ready: int                         # first cycle it may execute once `waits` is empty
+
+
+class TomasuloPipeline(Pipeline):
+    """Out-of-order timing model: register renaming, reservation stations, a
+    common data bus and a reorder buffer for precise state.
+
+    Each cycle, in reverse pipeline order:
+
+    - commit: up to `width` finished instructions leave the ROB head in
+      program order and write the register file (stores write memory here)
+    - execute: the oldest ready station of each class starts on a free unit
+      (`alu_units` ALUs, `mem_ports` load/store ports, the `muldiv` unit).
+      Values are computed with `EX()`; a result is broadcast on the CDB
+      (`cdb_width` per cycle, oldest first) `latency` cycles later and wakes
+      the stations waiting on it for the next cycle. Loads take
+      `load_latency` cycles, wait for older stores with unknown or
+      overlapping addresses, and take an exactly matching older SW's value
+    - dispatch: up to `width` fetched instructions are decoded with `ID()`,
+      renamed through the register alias table and placed in the ROB
+      (`rob_size` entries) and a station of their class (`rs_size` each)
+    - fetch: up to `width` instructions, following the `predictor` if given
+
+    Branches resolve when they finish executing; a misprediction squashes
+    every younger instruction and rebuilds the alias table from the ROB.
+    The latencies mirror `Pipeline` (a dependent instruction runs one cycle
+    after an ALU result and two after a load), so the difference in cycles
+    is the stall time the out-of-order window hides.
+
+    `arch_pc` is the PC of the next instruction to commit. Statistics: `ipc`,
+    ROB occupancy (`average_occupancy`, `max_occupancy`), `dispatch_stalls`
+    (rob full, <class> rs full, frontend), `commit_stalls` (class of the
+    unfinished ROB head), `cdb_conflicts`, `memory_order_waits`, `flushes`
+    and `squashed`. A load that faults raises when it commits, so wrong-path
+    loads are harmless. Caches, store buffers, delay slots and TAS are not
+    modelled (a TAS raises when it commits).
+    """
+
+    def __init__(self, rob_size: int = 16, rs_size: int = 4, width: int = 1, cdb_width: int = 1,
+                 alu_units: int = 1, mem_ports: int = 1, load_latency: int = 2,
+                 predictor=None, muldiv=None):
+        super().__init__(predictor=predictor, muldiv=muldiv)
+        if min(rob_size, rs_size, width, cdb_width, alu_units, mem_ports, load_latency) < 1:
+            raise ValueError('Window sizes, widths, unit counts and latencies must be at least 1')
+        self.rob_size = rob_size
+        self.rs_size = rs_size
+        self.width = width
+        self.cdb_width = cdb_width
+        self.units = {'alu': alu_units, 'mem': mem_ports, 'muldiv': 1}
+        self.load_latency = load_latency
+
+        self.if_queue: deque = deque()             # IF/ID latches, at most 2 * width
+        self.rob: deque = deque()                  # RobEntry, oldest first
+        self.entries: Dict[int, RobEntry] = {}     # seq -> ROB entry
+        self.stations: Dict[str, List[Station]] = {unit: [] for unit in UNITS}
+        self.executing: List[Tuple[int, Station, EX_MEM]] = []  # (finish cycle, station, result)
+        self.finished: List[Tuple[Station, EX_MEM]] = []        # waiting for the CDB
+        self.rat: List[Optional[int]] = [None] * len(self.scoreboard.owner)  # reg -> producer seq
+        self.arch_pc = 0
+
+        self.occupancy_cycles = 0
+        self.max_occupancy = 0
+        self.dispatch_stalls = Counter()
+        self.commit_stalls = Counter()
+        self.cdb_conflicts = 0
+        self.memory_order_waits = 0
+        self.squashed = 0
+
+    def step(self, cpu):
+        """Perform one cycle: commit, execute and broadcast, dispatch, fetch."""
+        self.cycle += 1
+        cycle = self.cycle
+        self._commit(cpu)
+        self._execute(cpu, cycle)
+        self._broadcast(cpu, cycle)
+        self._dispatch(cpu, cycle)
+        for _ in range(self.width):
+            if len(self.if_queue) >= 2 * self.width:
+                break
+            if_id = IF_ID()
+            IF(cpu, if_id, self.predictor)
+            self.if_queue.append(if_id)
+            if if_id.predicted_target is not None:
+                break
+        occupancy = len(self.rob)
+        self.occupancy_cycles += occupancy
+        if occupancy > self.max_occupancy:
+            self.max_occupancy = occupancy
+
+    def _commit(self, cpu):
+        rob = self.rob
+        if rob and not rob[0].done:
+            head = rob[0]
+            self.commit_stalls['load' if head.op in LOAD_OPS else unit_of(head.op)] += 1
+        for _ in range(self.width):
+            if not rob or not rob[0].done:
+                break
+            entry = rob.popleft()
+            if entry.fault is not None:
+                raise entry.fault
+            del self.entries[entry.seq]
+            for reg in entry.dests:
+                value = entry.values.get(reg)
+                if value is not None:
+                    cpu.registers.write(reg, value)
+                if self.rat[reg] == entry.seq:
+                    self.rat[reg] = None
+            if entry.store is not None:
+                op, address, value = entry.store
+                load_store(op, cpu.memory, address, value)
+                # Keep the predecoded instruction store coherent with self-modifying code
+                if cpu.imem is not None:
+                    cpu.imem.sync(address, cpu.memory)
+            if self.predictor is not None and is_branch(entry.op):
+                self.predictor.resolve(entry.pc, entry.taken, entry.target, entry.predicted_target)
+            self.arch_pc = entry.next_pc
+            self.retired += 1
+
+    def _execute(self, cpu, cycle: int):
+        """Start ready stations on free units; finish the operations due this cycle."""
+        for unit in UNITS:
+            free = self.units[unit]
+            stations = self.stations[unit]
+            i = 0
+            while free and i < len(stations):
+                station = stations[i]
+                if station.waits or station.ready > cycle:
+                    i += 1
+                    continue
+                op = station.entry.op
+                if unit == 'muldiv' and not self.muldiv.can_issue(cycle):
+                    self.muldiv.busy_stalls += 1
+                    break
+                ex_mem = EX_MEM()
+                EX(station.id_ex, ex_mem)
+                if op in LOAD_OPS:
+                    value = self._load(cpu, station.entry, ex_mem)
+                    if value is None:
+                        self.memory_order_waits += 1
+                        i += 1
+                        continue
+                    ex_mem.alu_result = value
+                    finish = cycle + self.load_latency - 1
+                elif unit == 'muldiv':
+                    finish = self.muldiv.issue(op, cycle)
+                else:
+                    finish = cycle
+                del stations[i]
+                free -= 1
+                self.executing.append((finish, station, ex_mem))
+
+        still = []
+        for finish, station, ex_mem in self.executing:
+            if station.entry.seq not in self.entries:
+                continue  # squashed by a branch that finished just before
+            if finish > cycle:
+                still.append((finish, station, ex_mem))
+            elif station.entry.dests:
+                self.finished.append((station, ex_mem))
+            else:
+                self._complete(cpu, station.entry, ex_mem, cycle)
+        self.executing = [item for item in still if item[1].entry.seq in self.entries]
+        self.finished = [item for item in self.finished if item[0].entry.seq in self.entries]
+
+    def _load(self, cpu, entry: RobEntry, ex_mem: EX_MEM) -> Optional[int]:
+        """Value of the load in `ex_mem`, or None while an older store blocks it."""
+        address = ex_mem.alu_result
+        end = address + LOAD_SIZES[entry.op]
+        for older in reversed(self.rob):  # newest first
+            if older.seq >= entry.seq or older.op not in STORE_OPS:
+                continue
+            if older.store is None:
+                return None  # address not known yet
+            s_op, s_addr, s_value = older.store
+            if s_addr < end and address < s_addr + STORE_SIZES[s_op]:
+                if s_op == 'SW' and entry.op == 'LW' and s_addr == address:
+                    return s_value
+                return None  # partial overlap: wait until the store commits
+        self.ex_mem = ex_mem  # watchpoints report the PC of the access
+        try:
+            return load_store(entry.op, cpu.memory, address)
+        except ValueError as fault:
+            entry.fault = fault
+            return 0
+
+    def _broadcast(self, cpu, cycle: int):
+        """Put up to `cdb_width` finished results (oldest first) on the common data bus."""
+        if not self.finished:
+            return
+        self.finished.sort(key=lambda item: item[0].entry.seq)
+        sent = self.finished[:self.cdb_width]
+        self.finished = self.finished[self.cdb_width:]
+        self.cdb_conflicts += len(self.finished)
+        for station, ex_mem in sent:
+            if station.entry.seq in self.entries:  # not squashed by an older jump on the bus
+                self._complete(cpu, station.entry, ex_mem, cycle)
+
+    def _complete(self, cpu, entry: RobEntry, ex_mem: EX_MEM, cycle: int):
+        """Mark `entry` finished, wake its consumers and resolve branches."""
+        entry.done = True
+        for reg in entry.dests:
+            # Wrapped like a register file write, so consumers see the committed value
+            entry.values[reg] = wrap32(ex_mem.hi if reg == HI else ex_mem.alu_result)
+        if entry.op in STORE_OPS:
+            entry.store = (entry.op, ex_mem.alu_result, ex_mem.rt_val)
+        if entry.dests:
+            for stations in self.stations.values():
+                for station in stations:
+                    for name, (seq, reg) in list(station.waits.items()):
+                        if seq == entry.seq:
+                            setattr(station.id_ex, name, entry.values[reg])
+                            del station.waits[name]
+                            station.ready = max(station.ready, cycle + 1)
+        if is_branch(entry.op):
+            taken, target = detect_branch_taken(ex_mem)
+            if target is None:
+                taken = False
+            entry.taken, entry.target = taken, target
+            entry.next_pc = target if taken else entry.pc + 4
+            predicted = entry.predicted_target
+            if entry.next_pc != (predicted if predicted is not None else entry.pc + 4):
+                self._squash(entry.seq)
+                cpu.pc = entry.next_pc
+                self.flushes += 1
+
+    def _squash(self, seq: int):
+        """Discard everything younger than `seq` and rebuild the alias table."""
+        rob = self.rob
+        while rob and rob[-1].seq > seq:
+            del self.entries[rob.pop().seq]
+            self.squashed += 1
+        for unit in UNITS:
+            self.stations[unit] = [s for s in self.stations[unit] if s.entry.seq <= seq]
+        self.executing = [item for item in self.executing if item[1].entry.seq <= seq]
+        self.finished = [item for item in self.finished if item[0].entry.seq <= seq]
+        self.if_queue.clear()
+        self.rat = [None] * len(self.rat)
+        for entry in rob:
+            for reg in entry.dests:
+                self.rat[reg] = entry.seq
+
+    def _dispatch(self, cpu, cycle: int):
+        """Rename and dispatch up to `width` instructions into the ROB and stations."""
+        for _ in range(self.width):
+            if not self.if_queue:
+                self.dispatch_stalls['frontend'] += 1
+                return
+            if len(self.rob) >= self.rob_size:
+                self.dispatch_stalls['rob full'] += 1
+                return
+            if_id = self.if_queue[0]
+            id_ex = ID_EX()
+            ID(cpu, if_id, id_ex)
+            unit = unit_of(id_ex.op)
+            if len(self.stations[unit]) >= self.rs_size:
+                self.dispatch_stalls[f'{unit} rs full'] += 1
+                return
+            self.if_queue.popleft()
+
+            self.seq += 1
+            id_ex.seq = self.seq
+            waits = {}
+            for name, reg in (('rs_val', id_ex.rs), ('rt_val', id_ex.rt)):
+                if reg is None or not id_ex.reads >> reg & 1:
+                    continue
+                producer = self.rat[reg]
+                if producer is None:
+                    continue  # ID already read the register file
+                entry = self.entries[producer]
+                if entry.done:
+                    setattr(id_ex, name, entry.values[reg])
+                else:
+                    waits[name] = (producer, reg)
+
+            dests = tuple(reg for reg in range(len(self.rat)) if id_ex.writes >> reg & 1)
+            entry = RobEntry(self.seq, id_ex.pc, id_ex.op, dests, id_ex.predicted_target,
+                             next_pc=id_ex.pc + 4)
+            self.rob.append(entry)
+            self.entries[entry.seq] = entry
+            for reg in dests:
+                self.rat[reg] = entry.seq
+            if id_ex.op in ATOMIC_OPS:
+                entry.fault = ValueError(f'{id_ex.op} is not supported by the out-of-order model')
+                entry.values = dict.fromkeys(dests, 0)
+                entry.done = True
+                continue
+            self.stations[unit].append(Station(entry, id_ex, waits, cycle + 1))
+
+    @property
+    def average_occupancy(self) -> float:
+        return self.occupancy_cycles / self.cycle if self.cycle else 0.0
+
+    def flush(self):
+        """Discard all in-flight state (the register file and memory keep committed state)."""
+        super().flush()
+        self._squash(-1)
@@ -0,0 +1,140 @@
+#state/cache.py
+import random
+from typing import Dict, List, Optional
+
+POLICIES = ('lru', 'fifo', 'random')
+
+
+class Cache:
+    """Set-associative cache timing model (tags and dirty bits only).
+
+    Data stays in `state.Memory`; the cache decides how long an access takes.
+    Each set is a dict of tag -> dirty bit whose insertion order is the
+    replacement order: LRU re-inserts a tag on every hit, FIFO only on fill,
+    and random evicts any way. Write-back caches allocate on write misses and
+    count the dirty lines they evict; write-through caches send every store
+    to memory (absorbed by a write buffer, so a store costs `hit_latency`)
+    and do not allocate on a write miss.
+
+    `access()` returns the stall cycles beyond the pipeline stage's own
+    cycle: `hit_latency - 1` on a hit, plus `miss_latency` on a miss.
+    Accesses and misses are also counted per instruction PC in `pc_stats`.
+    """
+
+    def __init__(self, size: int = 1024, line_size: int = 16, assoc: int = 1, policy: str = 'lru',
+                 write_back: bool = True, hit_latency: int = 1, miss_latency: int = 10,
+                 name: str = 'cache', seed: Optional[int] = 0):
+        for value, what in ((size, 'Cache size'), (line_size, 'Line size'), (assoc, 'Associativity')):
+            if value < 1 or value & (value - 1):
+                raise ValueError(f'{what} must be a power of two, got {value}')
+        if line_size * assoc > size:
+            raise ValueError(f'Cache of {size} bytes cannot hold {assoc} ways of {line_size}-byte lines')
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown replacement policy {policy!r} (choose from {', '.join(POLICIES)})")
+        if hit_latency < 1 or miss_latency < 0:
+            raise ValueError('Hit latency must be at least 1 and miss latency non-negative')
+        self.name = name
+        self.size = size
+        self.line_size = line_size
+        self.assoc = assoc
+        self.policy = policy
+        self.write_back = write_back
+        self.hit_latency = hit_latency
+        self.miss_latency = miss_latency
+        self.num_sets = size // (line_size * assoc)
+        self.offset_bits = line_size.bit_length() - 1
+        self.set_mask = self.num_sets - 1
+        self.sets: List[Dict[int, bool]] = [{} for _ in range(self.num_sets)]
+        self.rng = random.Random(seed)
+
+        self.hits = 0
+        self.misses = 0
+        self.writebacks = 0       # dirty lines evicted (write-back)
+        self.memory_writes = 0    # stores sent straight to memory (write-through)
+        self.pc_stats: Dict[int, List[int]] = {}  # pc -> [accesses, misses]
+
+    def access(self, address: int, write: bool = False, pc: Optional[int] = None,
+               miss_latency: Optional[int] = None) -> int:
+        """Look up `address` (filling on a miss) and return the extra stall cycles.
+
+        `miss_latency` overrides the cache's own for this access (e.g. the
+        latency of the memory region behind it).
+        """
+        line = address >> self.offset_bits
+        ways = self.sets[line & self.set_mask]
+        tag = line  # the full line number doubles as the tag
+        hit = tag in ways
+        if hit:
+            self.hits += 1
+            if self.policy == 'lru':
+                dirty = ways.pop(tag)
+                ways[tag] = dirty
+        else:
+            self.misses += 1
+        if pc is not None:
+            stats = self.pc_stats.get(pc)
+            if stats is None:
+                stats = self.pc_stats[pc] = [0, 0]
+            stats[0] += 1
+            if not hit:
+                stats[1] += 1
+
+        if write and not self.write_back:
+            self.memory_writes += 1
+            return self.hit_latency - 1
+        if not hit:
+            if len(ways) >= self.assoc:
+                self._evict(ways)
+            ways[tag] = False
+        if write:
+            ways[tag] = True
+        if hit:
+            return self.hit_latency - 1
+        return self.hit_latency - 1 + (self.miss_latency if miss_latency is None else miss_latency)
+
+    def fill(self, address: int) -> bool:
+        """Bring the line holding `address` in without a demand access (prefetch).
+
+        Returns False if it was already cached. Hit/miss counters are untouched.
+        """
+        line = address >> self.offset_bits
+        ways = self.sets[line & self.set_mask]
+        if line in ways:
+            return False
+        if len(ways) >= self.assoc:
+            self._evict(ways)
+        ways[line] = False
+        return True
+
+    def _evict(self, ways: Dict[int, bool]):
+        if self.policy == 'random':
+            victim = self.rng.choice(list(ways))
+        else:
+            victim = next(iter(ways))
+        if ways.pop(victim):
+            self.writebacks += 1
+
+    def contains(self, address: int) -> bool:
+        line = address >> self.offset_bits
+        return line in self.sets[line & self.set_mask]
+
+    def flush(self) -> int:
+        """Invalidate every line; return the number of dirty lines written back."""
+        dirty = sum(d for ways in self.sets for d in ways.values())
+        self.writebacks += dirty
+        for ways in self.sets:
+            ways.clear()
+        return dirty
+
+    @property
+    def accesses(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def miss_rate(self) -> float:
+        return self.misses / self.accesses if self.accesses else 0.0
+
+    def worst_pcs(self, count: int = 5):
+        """(pc, accesses, misses) of the `count` PCs with the most misses."""
+        ranked = sorted(self.pc_stats.items(), key=lambda item: (-item[1][1], item[0]))
+        return [(pc, acc, miss) for pc, (acc, miss) in ranked[:count] if miss]
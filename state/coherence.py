@@ -0,0 +1,111 @@
+#state/coherence.py
+from typing import List, Optional
+
+from .cache import Cache
+
+# Bus transactions of the snooping MSI protocol
+TRANSACTIONS = {
+    'BusRd': 'read miss (line becomes Shared)',
+    'BusRdX': 'write miss (line becomes Modified, other copies invalidated)',
+    'BusUpgr': 'write hit on a Shared line (other copies invalidated)',
+}
+
+
+class SnoopingBus:
+    """Shared bus that keeps private write-back caches coherent with MSI.
+
+    Like `Cache`, this is a timing and traffic model: data always lives in
+    the shared `Memory`, so coherence decides how long accesses take and how
+    much traffic they cause, not which value a load sees. Every
+    `CoherentCache` on the bus snoops the transactions of the others:
+
+    - BusRd: a Modified copy is flushed to memory and drops to Shared
+    - BusRdX / BusUpgr: every other copy is invalidated, a Modified one is
+      flushed first
+
+    Transactions complete immediately in the order the caches issue them;
+    arbitration and contention for the bus are not modelled. Counters:
+    `transactions` per kind (see `TRANSACTIONS`), `invalidations` (copies
+    removed by snooping) and `flushes` (Modified lines written back on a
+    snoop).
+    """
+
+    def __init__(self):
+        self.caches: List["CoherentCache"] = []
+        self.transactions = dict.fromkeys(TRANSACTIONS, 0)
+        self.invalidations = 0
+        self.flushes = 0
+
+    def connect(self, cache: "CoherentCache"):
+        self.caches.append(cache)
+
+    def broadcast(self, requester: "CoherentCache", kind: str, address: int):
+        """Issue a `kind` transaction for the line holding `address`; the other caches snoop it."""
+        self.transactions[kind] += 1
+        for cache in self.caches:
+            if cache is not requester:
+                cache.snoop(kind, address)
+
+    @property
+    def traffic(self) -> int:
+        """Bus transactions plus snoop flushes."""
+        return sum(self.transactions.values()) + self.flushes
+
+
+class CoherentCache(Cache):
+    """Private write-back cache on a `SnoopingBus`, tracking MSI state per line.
+
+    A present dirty line is Modified, a present clean line Shared, and an
+    absent line Invalid. A write to a Shared line sends BusUpgr and costs
+    `upgrade_latency` extra cycles; misses send BusRd or BusRdX and pay the
+    usual miss latency. `invalidations` counts lines this cache lost to
+    other caches' writes (the source of its coherence misses).
+    """
+
+    def __init__(self, bus: SnoopingBus, upgrade_latency: int = 1, **cache_args):
+        if not cache_args.get('write_back', True):
+            raise ValueError('MSI coherence needs write-back caches')
+        if upgrade_latency < 0:
+            raise ValueError('Upgrade latency must be non-negative')
+        super().__init__(**cache_args)
+        self.bus = bus
+        self.upgrade_latency = upgrade_latency
+        self.upgrades = 0
+        self.invalidations = 0
+        bus.connect(self)
+
+    def state(self, address: int) -> str:
+        """MSI state ('M', 'S' or 'I') of the line holding `address`."""
+        line = address >> self.offset_bits
+        dirty = self.sets[line & self.set_mask].get(line)
+        if dirty is None:
+            return 'I'
+        return 'M' if dirty else 'S'
+
+    def access(self, address: int, write: bool = False, pc: Optional[int] = None,
+               miss_latency: Optional[int] = None) -> int:
+        state = self.state(address)
+        extra = 0
+        if state == 'I':
+            self.bus.broadcast(self, 'BusRdX' if write else 'BusRd', address)
+        elif write and state == 'S':
+            self.bus.broadcast(self, 'BusUpgr', address)
+            self.upgrades += 1
+            extra = self.upgrade_latency
+        return super().access(address, write, pc, miss_latency) + extra
+
+    def snoop(self, kind: str, address: int):
+        """React to another cache's `kind` transaction on the line holding `address`."""
+        line = address >> self.offset_bits
+        ways = self.sets[line & self.set_mask]
+        dirty = ways.get(line)
+        if dirty is None:
+            return
+        if dirty:
+            self.bus.flushes += 1
+        if kind == 'BusRd':
+            ways[line] = False
+        else:
+            del ways[line]
+            self.invalidations += 1
+            self.bus.invalidations += 1
@@ -0,0 +1,105 @@
+#state/cow_memory.py
+from typing import Dict
+
+from .memory import Memory, PAGE_SHIFT, PAGE_SIZE, PAGE_MASK
+
+
+class CowMemory(Memory):
+    """Paged memory whose pages are shared between forks until written.
+
+    Behaves exactly like `Memory` (same byte order, alignment and bounds
+    checks) but stores its contents as a list of `bytearray` pages. `fork()`
+    returns a child that shares every page with its parent; whichever side
+    writes to a shared page first gets a private copy of just that page.
+    """
+
+    def __init__(self, size: int = 4096):
+        self.size = size
+        num_pages = (size + PAGE_SIZE - 1) >> PAGE_SHIFT
+        self.pages = [bytearray(PAGE_SIZE) for _ in range(num_pages)]
+        # owned[i] is True when pages[i] is private to this instance
+        self.owned = [True] * num_pages
+
+    @classmethod
+    def from_memory(cls, memory: Memory) -> "CowMemory":
+        """Build a paged copy of a flat `Memory`."""
+        cow = cls(memory.size)
+        for index in range(len(cow.pages)):
+            start = index << PAGE_SHIFT
+            chunk = memory.mem[start:start + PAGE_SIZE]
+            cow.pages[index][:len(chunk)] = bytes(chunk)
+        return cow
+
+    def fork(self) -> "CowMemory":
+        """Return a child sharing all pages; both sides copy on next write."""
+        child = CowMemory.__new__(CowMemory)
+        child.size = self.size
+        child.pages = list(self.pages)
+        child.owned = [False] * len(self.pages)
+        self.owned = [False] * len(self.pages)
+        return child
+
+    def _writable_page(self, address: int) -> bytearray:
+        index = address >> PAGE_SHIFT
+        if not self.owned[index]:
+            self.pages[index] = bytearray(self.pages[index])
+            self.owned[index] = True
+        return self.pages[index]
+
+    # ------------------------------------------------------------
+    # Page-delta serialization (for shipping forks to worker processes)
+    # ------------------------------------------------------------
+
+    def page_delta(self) -> Dict[int, bytes]:
+        """Pages written since this instance was created or last forked."""
+        return {index: bytes(page) for index, page in enumerate(self.pages) if self.owned[index]}
+
+    def apply_delta(self, delta: Dict[int, bytes]):
+        """Overwrite pages from a `page_delta()` taken against the same base."""
+        for index, data in delta.items():
+            self.pages[index] = bytearray(data)
+            self.owned[index] = True
+
+    # ------------------------------------------------------------
+    # Memory interface
+    # ------------------------------------------------------------
+
+    def load_byte(self, address: int) -> int:
+        self._check_addr(address, 1)
+        return self.pages[address >> PAGE_SHIFT][address & PAGE_MASK]
+
+    def store_byte(self, address: int, value: int):
+        self._check_addr(address, 1)
+        self._writable_page(address)[address & PAGE_MASK] = value & 0xFF
+
+    def load_half(self, address: int) -> int:
+        if address % 2 != 0:
+            raise ValueError('Halfword access must be 2-byte aligned')
+        self._check_addr(address, 2)
+        offset = address & PAGE_MASK
+        return int.from_bytes(self.pages[address >> PAGE_SHIFT][offset:offset + 2], 'big')
+
+    def store_half(self, address: int, value: int):
+        if address % 2 != 0:
+            raise ValueError('Halfword access must be 2-byte aligned')
+        self._check_addr(address, 2)
+        offset = address & PAGE_MASK
+        self._writable_page(address)[offset:offset + 2] = (value & 0xFFFF).to_bytes(2, 'big')
+
+    def load_word(self, address: int) -> int:
+        if address % 4 != 0:
+            raise ValueError('Address must be word-aligned')
+        self._check_addr(address, 4)
+        offset = address & PAGE_MASK
+        return int.from_bytes(self.pages[address >> PAGE_SHIFT][offset:offset + 4], 'big')
+
+    # Instruction fetch path: same as load_word, but never routed through
+    # per-instance hooks such as data watchpoints.
+    fetch_word = load_word
+
+    def store_word(self, address: int, value: int):
+        if address % 4 != 0:
+            raise ValueError('Address must be word-aligned')
+        self._check_addr(address, 4)
+        offset = address & PAGE_MASK
+        self._writable_page(address)[offset:offset + 4] = (value & 0xFFFFFFFF).to_bytes(4, 'big')
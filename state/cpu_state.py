@@ -1,11 +1,38 @@
 #state/cpu_state.py
 from .memory import Memory
+from .cow_memory import CowMemory
+from .instruction_memory import InstructionMemory
 from .registers import Registers
 class CPUstate:
-    def __init__(self):
+    def __init__(self, memory=None, registers=None):
         self.pc = 0  # Program Counter initialized to 0
-        self.memory = Memory()
-        self.registers = Registers()
+        self.memory = memory if memory is not None else Memory()
+        self.registers = registers if registers is not None else Registers()
+        self.imem = None  # Optional predecoded instruction store (Harvard-style fetch)
 
     def step_pc(self, offset: int = 4):
-        self.pc += offset # Increment PC by offset (default 4 for word size)
\ No newline at end of file
+        self.pc += offset # Increment PC by offset (default 4 for word size)
+
+    def load_program(self, words, base: int = 0, predecode: bool = True):
+        """Store `words` at `base` and, unless `predecode` is False, build `imem`.
+
+        With `predecode=False` every fetch reads data memory (unified mode).
+        """
+        for idx, word in enumerate(words):
+            self.memory.store_word(base + idx * 4, word)
+        self.imem = InstructionMemory(words, base) if predecode else None
+
+    def fork(self) -> "CPUstate":
+        """Return a child CPU sharing memory pages copy-on-write with this one.
+
+        A flat `Memory` is converted to a `CowMemory` in place on the first fork,
+        so the parent keeps running on the paged copy afterwards.
+        """
+        if not isinstance(self.memory, CowMemory):
+            self.memory = CowMemory.from_memory(self.memory)
+        registers = Registers()
+        registers.restore(self.registers.snapshot())
+        child = CPUstate(memory=self.memory.fork(), registers=registers)
+        child.pc = self.pc
+        child.imem = self.imem.copy() if self.imem is not None else None
+        return child
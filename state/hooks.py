@@ -0,0 +1,48 @@
+#state/hooks.py
+from typing import Callable
+
+# Builds the hooked method from the next one in the chain
+Wrap = Callable[[Callable], Callable]
+
+
+def add_hook(obj, name: str, wrap: Wrap):
+    """Install `wrap` around method `name` of the instance `obj` (not its class).
+
+    Several tools (watchpoints, state hashing) may hook the same method. Each
+    hook is kept in a per-instance chain, in installation order, and the
+    method is rebuilt from the chain, so any hook can be removed with
+    `remove_hook` without dropping the others.
+    """
+    chains = obj.__dict__.setdefault('_hooks', {})
+    if name not in chains:
+        # Keep a method the instance already overrides as the base of the chain
+        chains[name] = (obj.__dict__.get(name), [])
+    chains[name][1].append(wrap)
+    _rebuild(obj, name)
+
+
+def remove_hook(obj, name: str, wrap: Wrap):
+    """Remove one hook added with `add_hook`; the method is restored once none is left."""
+    chains = obj.__dict__.get('_hooks', {})
+    if name not in chains or wrap not in chains[name][1]:
+        return
+    chains[name][1].remove(wrap)
+    _rebuild(obj, name)
+
+
+def _rebuild(obj, name: str):
+    chains = obj.__dict__['_hooks']
+    base, wraps = chains[name]
+    if not wraps:
+        del chains[name]
+        if not chains:
+            del obj.__dict__['_hooks']
+        if base is None:
+            del obj.__dict__[name]
+        else:
+            setattr(obj, name, base)
+        return
+    method = base if base is not None else getattr(type(obj), name).__get__(obj)
+    for wrap in wraps:
+        method = wrap(method)
+    setattr(obj, name, method)
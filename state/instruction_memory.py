@@ -0,0 +1,60 @@
+#state/instruction_memory.py
+from typing import List, Optional
+
+from decoder.decoder import DecodedInstruction, decode
+
+
+def predecode(word: int, pc: int) -> Optional[DecodedInstruction]:
+    # Illegal words are left undecoded so ID raises at the same point the
+    # unified fetch path would.
+    try:
+        return decode(word, pc=pc)
+    except ValueError:
+        return None
+
+
+class InstructionMemory:
+    """Predecoded instruction store for Harvard-style fetch.
+
+    Holds the raw word and its `DecodedInstruction` for every address in the
+    text range [base, end), indexed by `pc >> 2`, so IF/ID become a single list
+    index instead of a `load_word` plus a full decode. Data memory still holds
+    the program too; stores that land in the text range must be reported with
+    `sync()` to keep the two views coherent.
+    """
+
+    def __init__(self, words: List[int], base: int = 0):
+        if base % 4 != 0:
+            raise ValueError('Text base must be word-aligned')
+        self.base = base
+        self.end = base + 4 * len(words)
+        self.first = base >> 2
+        self.limit = self.end >> 2
+        # Pad below `base` so the lists can be indexed by pc >> 2 directly
+        self.words: List[Optional[int]] = [None] * self.first + list(words)
+        self.decoded: List[Optional[DecodedInstruction]] = [None] * self.first + [
+            predecode(word, base + 4 * i) for i, word in enumerate(words)
+        ]
+
+    @classmethod
+    def from_memory(cls, memory, base: int, end: int) -> "InstructionMemory":
+        """Predecode the words currently stored in memory[base:end]."""
+        return cls([memory.fetch_word(addr) for addr in range(base, end, 4)], base)
+
+    def copy(self) -> "InstructionMemory":
+        clone = InstructionMemory.__new__(InstructionMemory)
+        clone.__dict__.update(self.__dict__)
+        clone.words = list(self.words)
+        clone.decoded = list(self.decoded)
+        return clone
+
+    def contains(self, address: int) -> bool:
+        return self.base <= address < self.end
+
+    def sync(self, address: int, memory):
+        """Refresh the word containing `address` after a store to data memory."""
+        if self.base <= address < self.end:
+            index = address >> 2
+            word = memory.fetch_word(index << 2)
+            self.words[index] = word
+            self.decoded[index] = predecode(word, index << 2)
@@ -1,10 +1,19 @@
 #state/memory.py
+
+# Page granularity shared by the paged/copy-on-write memory and by tools that
+# index memory by page (fork deltas, watchpoints).
+PAGE_SHIFT = 8
+PAGE_SIZE = 1 << PAGE_SHIFT
+PAGE_MASK = PAGE_SIZE - 1
+
+
 class Memory:
     def __init__(self, size: int = 4096):
+        self.size = size
         self.mem = [0] * size  # Initialize memory with given size
 
     def _check_addr(self, address: int, length: int = 1):
-        if address < 0 or address + length > len(self.mem):
+        if address < 0 or address + length > self.size:
             raise ValueError(f"Memory access out of bounds: {address}")
 
     # Load a single byte from memory (unsigned 0-255).
@@ -45,6 +54,10 @@ class Memory:
         )
         return word
     
+    # Instruction fetch path: same as load_word, but never routed through
+    # per-instance hooks such as data watchpoints.
+    fetch_word = load_word
+
     # Store a 32-bit word (big-endian). Address must be word-aligned.
     def store_word(self, address: int, value: int):
         if address % 4 != 0:
@@ -0,0 +1,81 @@
+#state/memory_latency.py
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class MemoryRegion:
+    start: int              # first byte
+    end: int                # one past the last byte
+    read_latency: int       # cycles per load (1 = single-cycle MEM)
+    write_latency: int      # cycles per store
+    name: str = ''
+    accesses: int = 0
+    wait_cycles: int = 0    # cycles beyond the first spent in MEM
+
+
+class MemoryLatency:
+    """Access latency of data memory by address region.
+
+    Addresses outside every region take `default` cycles. Regions may not
+    overlap; lookups bisect their sorted start addresses. `Pipeline.step()`
+    holds a load or store in MEM for `access()` - 1 extra cycles by skipping
+    them (the stages behind MEM are frozen and WB has already drained), so a
+    long wait costs one step. With a D-cache, the region latency is the miss
+    penalty instead, hits cost the cache's hit latency, and only line fills
+    are counted in the region statistics.
+    """
+
+    def __init__(self, default: int = 1):
+        if default < 1:
+            raise ValueError('Memory latency must be at least 1 cycle')
+        self.default = default
+        self.regions: List[MemoryRegion] = []
+        self._starts: List[int] = []
+        self.default_accesses = 0
+        self.default_wait_cycles = 0
+
+    def add_region(self, start: int, end: int, latency: int, write_latency: Optional[int] = None,
+                   name: str = '') -> MemoryRegion:
+        """Give bytes [start, end) `latency` cycles (`write_latency` for stores, default the same)."""
+        if write_latency is None:
+            write_latency = latency
+        if end <= start:
+            raise ValueError(f"Empty memory region: {start:#x}-{end:#x}")
+        if latency < 1 or write_latency < 1:
+            raise ValueError('Memory latency must be at least 1 cycle')
+        for region in self.regions:
+            if start < region.end and region.start < end:
+                raise ValueError(f"Memory region {start:#x}-{end:#x} overlaps "
+                                 f"{region.start:#x}-{region.end:#x}")
+        region = MemoryRegion(start, end, latency, write_latency, name or f'{start:#x}-{end:#x}')
+        i = bisect_right(self._starts, start)
+        self.regions.insert(i, region)
+        self._starts.insert(i, start)
+        return region
+
+    def region_at(self, address: int) -> Optional[MemoryRegion]:
+        i = bisect_right(self._starts, address) - 1
+        if i >= 0 and address < self.regions[i].end:
+            return self.regions[i]
+        return None
+
+    def latency(self, address: int, write: bool = False) -> int:
+        """Latency in cycles of an access at `address`, without recording it."""
+        region = self.region_at(address)
+        if region is None:
+            return self.default
+        return region.write_latency if write else region.read_latency
+
+    def access(self, address: int, write: bool = False) -> int:
+        """Latency in cycles of one access at `address`, recorded in the region's statistics."""
+        region = self.region_at(address)
+        if region is None:
+            self.default_accesses += 1
+            self.default_wait_cycles += self.default - 1
+            return self.default
+        latency = region.write_latency if write else region.read_latency
+        region.accesses += 1
+        region.wait_cycles += latency - 1
+        return latency
@@ -0,0 +1,75 @@
+#state/memory_system.py
+
+
+class MemorySystem:
+    """Timing side of a pipeline's memory hierarchy.
+
+    Groups the optional L1 caches (`state.cache.Cache`), a `prefetcher` on
+    the D-cache (`state.prefetcher.StridePrefetcher`), a `store_buffer`
+    (`state.store_buffer.StoreBuffer`) and per-region data latencies
+    (`state.memory_latency.MemoryLatency`). None of them hold data; together
+    they decide how long fetches and data accesses take. With nothing
+    configured every access takes one cycle.
+
+    An I-cache miss only holds fetch: IF delivers bubbles while the line is
+    filled and the rest of the pipeline drains; a redirect abandons the
+    pending fetch. A data access holds MEM for `data_access()` extra cycles
+    and freezes the stages behind it: the step performing it advances the
+    pipeline's `cycle` by those cycles as well, so frozen cycles cost no
+    simulation work. Without a D-cache the extra cycles come from the
+    region latency; with one, the region latency is the miss penalty. A
+    buffered store pays its cost while draining instead, and only a store
+    meeting a full buffer freezes the pipeline (`store_wait()`).
+    """
+
+    def __init__(self, icache=None, dcache=None, prefetcher=None, store_buffer=None, memory_latency=None):
+        if prefetcher is not None and prefetcher.cache is not dcache:
+            raise ValueError('The prefetcher must fill the data cache')
+        self.icache = icache
+        self.dcache = dcache
+        self.prefetcher = prefetcher
+        self.store_buffer = store_buffer
+        self.memory_latency = memory_latency
+
+    def store_wait(self, cycle: int, cpu, write: bool) -> int:
+        """Drain buffered stores up to `cycle`; return the cycles a store in MEM waits for an entry."""
+        store_buffer = self.store_buffer
+        if store_buffer is None:
+            return 0
+        store_buffer.drain(cycle, cpu.memory, cpu.imem)
+        if not write or not store_buffer.full:
+            return 0
+        wait = store_buffer.ready - cycle
+        store_buffer.full_stalls += wait
+        store_buffer.drain(cycle + wait, cpu.memory, cpu.imem)
+        return wait
+
+    def data_access(self, address: int, write: bool, pc: int, cycle: int) -> int:
+        """Time a load or store performed in MEM; return the extra cycles it holds MEM."""
+        dcache = self.dcache
+        memory_latency = self.memory_latency
+        if dcache is None and memory_latency is None:
+            return 0
+        if dcache is None:
+            extra = memory_latency.access(address, write) - 1
+        else:
+            # The region latency, if configured, is the miss penalty
+            fill = memory_latency.latency(address, write) if memory_latency is not None else None
+            misses = dcache.misses
+            if self.prefetcher is not None:
+                extra = self.prefetcher.access(address, write, pc, cycle, fill)
+            else:
+                extra = dcache.access(address, write, pc, fill)
+            if fill is not None and dcache.misses != misses:
+                memory_latency.access(address, write)  # count the fill in its region
+        if self.store_buffer is not None and write:
+            # A buffered store pays its latency while draining
+            self.store_buffer.delay(extra)
+            return 0
+        return extra
+
+    def drain(self, cycle: int, cpu) -> int:
+        """Write out the store buffer; return the cycle its last store completes (at least `cycle`)."""
+        if self.store_buffer is None:
+            return cycle
+        return max(cycle, self.store_buffer.flush(cpu.memory, cpu.imem))
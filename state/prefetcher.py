@@ -0,0 +1,100 @@
+#state/prefetcher.py
+from typing import Dict, List, Optional
+
+from .cache import Cache
+
+
+class StridePrefetcher:
+    """Per-PC stride prefetcher in front of a data `Cache`.
+
+    A direct-mapped reference prediction table, indexed by the load's PC,
+    keeps the last address, the last stride and a confidence counter. When a
+    load repeats its stride, lines `distance` .. `distance + degree - 1`
+    strides ahead are filled into the cache; each arrives after the fill
+    latency of the access that triggered it (the cache's `miss_latency`
+    unless a region latency is passed to `access`). A demand access to a prefetched line counts as useful, and
+    as late if the line is still in flight (the access then waits for the
+    remainder instead of a full miss).
+
+    Reported as coverage (share of would-be misses removed), accuracy (share
+    of prefetches used) and timeliness (share of useful prefetches on time).
+    `cycles_saved` sums the miss cycles the useful prefetches hid.
+    """
+
+    def __init__(self, cache: Cache, degree: int = 1, distance: int = 1, entries: int = 64,
+                 threshold: int = 1):
+        if degree < 1 or distance < 1:
+            raise ValueError('Prefetch degree and distance must be at least 1')
+        if entries & (entries - 1):
+            raise ValueError('Prefetch table size must be a power of two')
+        self.cache = cache
+        self.degree = degree
+        self.distance = distance
+        self.threshold = threshold  # stride repeats needed before prefetching
+        self.mask = entries - 1
+        self.tags: List[Optional[int]] = [None] * entries
+        self.last: List[int] = [0] * entries
+        self.strides: List[int] = [0] * entries
+        self.confidence = bytearray(entries)
+        self.pending: Dict[int, int] = {}  # prefetched line -> cycle it arrives (until first use)
+
+        self.issued = 0
+        self.useful = 0
+        self.late = 0
+        self.cycles_saved = 0
+
+    def access(self, address: int, write: bool, pc: int, cycle: int, miss_latency: Optional[int] = None) -> int:
+        """Demand access through the cache; train on loads. Returns the extra stall cycles."""
+        cache = self.cache
+        line = address >> cache.offset_bits
+        arrival = self.pending.pop(line, None)
+        if arrival is not None and cache.contains(address):
+            self.useful += 1
+            stall = cache.access(address, write, pc)
+            wait = arrival - cycle
+            if wait > 0:
+                self.late += 1
+                stall += wait
+            self.cycles_saved += (cache.miss_latency if miss_latency is None else miss_latency) - max(wait, 0)
+        else:
+            stall = cache.access(address, write, pc, miss_latency)
+        if not write:
+            self._train(address, pc, cycle, cache.miss_latency if miss_latency is None else miss_latency)
+        return stall
+
+    def _train(self, address: int, pc: int, cycle: int, miss_latency: int):
+        i = (pc >> 2) & self.mask
+        if self.tags[i] != pc:
+            self.tags[i] = pc
+            self.last[i] = address
+            self.strides[i] = 0
+            self.confidence[i] = 0
+            return
+        stride = address - self.last[i]
+        self.last[i] = address
+        if stride != self.strides[i]:
+            self.strides[i] = stride
+            self.confidence[i] = 0
+            return
+        if self.confidence[i] < 3:
+            self.confidence[i] += 1
+        if stride and self.confidence[i] >= self.threshold:
+            cache = self.cache
+            for k in range(self.distance, self.distance + self.degree):
+                target = address + stride * k
+                if target >= 0 and cache.fill(target):
+                    self.issued += 1
+                    self.pending[target >> cache.offset_bits] = cycle + miss_latency
+
+    @property
+    def coverage(self) -> float:
+        total = self.useful + self.cache.misses
+        return self.useful / total if total else 0.0
+
+    @property
+    def accuracy(self) -> float:
+        return self.useful / self.issued if self.issued else 0.0
+
+    @property
+    def timeliness(self) -> float:
+        return 1.0 - self.late / self.useful if self.useful else 0.0
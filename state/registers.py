@@ -1,20 +1,57 @@
 #state/registers.py
+from array import array
+
+# Signed 32-bit storage ('i' is 4 bytes on every mainstream platform; fall back to 'l')
+_TYPECODE = 'i' if array('i').itemsize == 4 else 'l'
+
+
+NUM_REGS = 34  # 32 general-purpose registers, then HI (32) and LO (33)
+
+
+def wrap32(value: int) -> int:
+    """`value` wrapped to a signed (two's complement) 32-bit integer."""
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
 class Registers:
+    """34 x 32-bit register file (32 general-purpose registers, HI, LO) backed by a signed `array`.
+
+    Writes wrap to 32 bits (two's complement), so long arithmetic loops behave
+    like hardware instead of growing unbounded Python ints. The multiply/divide
+    result registers HI and LO are indices 32 and 33.
+    """
     def __init__(self):
 
-        self.regs = [0] * 32  # Initialize 32 registers to 0
+        self.regs = array(_TYPECODE, [0] * NUM_REGS)  # Initialize all registers to 0
 
     def read(self, idx: int) -> int:
         return self.regs[idx]
-    
+
     def write(self, idx: int, value: int):
         if idx == 0:  # Register 0 is always 0
             self.regs[idx] = 0
         else:
-            self.regs[idx] = value
+            self.regs[idx] = wrap32(value)
+
+    def snapshot(self) -> array:
+        """Copy of all register values in one bulk copy."""
+        return self.regs[:]
+
+    def restore(self, snapshot):
+        """Restore values taken with `snapshot()` (in place, one bulk copy)."""
+        self.regs[:] = snapshot
+
+    def view(self) -> memoryview:
+        """Zero-copy, live view of the 32 general-purpose registers for external inspection."""
+        return memoryview(self.regs)[:32]
+
+    def __copy__(self) -> "Registers":
+        clone = Registers()
+        clone.restore(self.regs)
+        return clone
 
     def dump(self):
 
         for i, val in enumerate(self.regs):
-            print(f"R{i}: {val}")
-        
\ No newline at end of file
+            print(f"R{i}: {val}" if i < 32 else f"{('HI', 'LO')[i - 32]}: {val}")
+
@@ -0,0 +1,112 @@
+#state/state_hash.py
+from .hooks import add_hook, remove_hook
+
+_MASK64 = (1 << 64) - 1
+
+# Key spaces: memory words use their byte address, registers and the PC sit above it
+_REG_KEY_BASE = 1 << 40
+_PC_KEY = 1 << 41
+
+_STORE_METHODS = ('store_byte', 'store_half', 'store_word')
+
+
+def mix(key: int, value: int) -> int:
+    """64-bit hash of one (location, value) pair; zero values contribute nothing.
+
+    The state hash is the XOR of `mix()` over every location, so a write is
+    folded in with `h ^= mix(k, old) ^ mix(k, new)` and all-zero state hashes
+    to 0. The finalizer is splitmix64, which is deterministic across processes.
+    """
+    if not value:
+        return 0
+    x = (key * 0x9E3779B97F4A7C15 + (value & 0xFFFFFFFF) * 0xC2B2AE3D27D4EB4F) & _MASK64
+    x ^= x >> 30
+    x = (x * 0xBF58476D1CE4E5B9) & _MASK64
+    x ^= x >> 27
+    x = (x * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class StateHash:
+    """Incrementally maintained hash of a CPU's architectural state.
+
+    Covers the register file, every memory word and the PC. Attaching hooks
+    `Registers.write` and the memory store methods of that CPU's instances
+    (state/hooks.py, so watchpoints can come and go independently), so
+    each write costs two `mix()` calls; `digest()` is then O(1), which makes
+    comparing two simulations (or two points of one run) cheap. Bulk updates
+    that bypass those methods (`Registers.restore`, `CowMemory.apply_delta`,
+    writes to `Memory.mem`) must be followed by `resync()`.
+    """
+
+    def __init__(self, cpu):
+        if cpu.memory.size % 4 != 0:
+            raise ValueError('StateHash requires a memory size that is a multiple of 4')
+        self.cpu = cpu
+        self.reg_hash, self.mem_hash = self._full_hashes()
+        self._hooks = None  # (object, method name, wrapper factory) installed
+        self._install()
+
+    def digest(self) -> int:
+        return self.reg_hash ^ self.mem_hash ^ mix(_PC_KEY, self.cpu.pc)
+
+    def recompute(self) -> int:
+        """Digest computed from scratch with a full scan (for verification)."""
+        reg_hash, mem_hash = self._full_hashes()
+        return reg_hash ^ mem_hash ^ mix(_PC_KEY, self.cpu.pc)
+
+    def resync(self):
+        """Re-derive the incremental hashes after a bulk state change."""
+        self.reg_hash, self.mem_hash = self._full_hashes()
+
+    def detach(self):
+        """Remove the write hooks installed on the CPU's registers and memory."""
+        if self._hooks is None:
+            return
+        for obj, name, wrap in self._hooks:
+            remove_hook(obj, name, wrap)
+        self._hooks = None
+
+    def _full_hashes(self):
+        regs = self.cpu.registers.regs
+        memory = self.cpu.memory
+        reg_hash = 0
+        for idx, value in enumerate(regs):
+            reg_hash ^= mix(_REG_KEY_BASE + idx, value)
+        mem_hash = 0
+        for addr in range(0, memory.size, 4):
+            mem_hash ^= mix(addr, memory.fetch_word(addr))
+        return reg_hash, mem_hash
+
+    def _install(self):
+        registers = self.cpu.registers
+        memory = self.cpu.memory
+        regs = registers.regs
+
+        def wrap_write(write):
+            def hashed_write(idx, value):
+                old = regs[idx]
+                write(idx, value)
+                new = regs[idx]
+                if old != new:
+                    key = _REG_KEY_BASE + idx
+                    self.reg_hash ^= mix(key, old) ^ mix(key, new)
+            return hashed_write
+
+        # Fetching bypasses data hooks such as watchpoints, so use it to read
+        # the word around each store.
+        fetch = memory.fetch_word
+        self._hooks = [(registers, 'write', wrap_write)]
+        self._hooks += [(memory, name, lambda store: self._wrap_store(store, fetch)) for name in _STORE_METHODS]
+        for obj, name, wrap in self._hooks:
+            add_hook(obj, name, wrap)
+
+    def _wrap_store(self, store, fetch):
+        def hashed_store(address, value):
+            key = address & ~3
+            old = fetch(key)
+            store(address, value)
+            new = fetch(key)
+            if old != new:
+                self.mem_hash ^= mix(key, old) ^ mix(key, new)
+        return hashed_store
@@ -0,0 +1,125 @@
+#state/store_buffer.py
+from collections import deque
+
+from execute.load_store_unit import load_store
+
+STORE_SIZES = {'SW': 4, 'SH': 2, 'SB': 1}
+LOAD_SIZES = {'LW': 4, 'LH': 2, 'LHU': 2, 'LB': 1, 'LBU': 1}
+
+
+class StoreBuffer:
+    """FIFO of retired stores between MEM and memory.
+
+    A store leaves MEM by entering the buffer; the oldest entry is written to
+    memory `drain_latency` cycles (plus any extra delay, e.g. its D-cache
+    miss) after it reached the head. Loads see the buffered bytes: each byte
+    comes from the newest buffered store covering it, or from memory, so
+    partial overlaps forward too. A store arriving at a full buffer must wait
+    for the head to drain; `Pipeline.step()` freezes for that time.
+
+    The buffer keeps its own clock, advanced by `drain(cycle, ...)` once per
+    pipeline step. Occupancy is integrated over those cycles. While a store
+    is written, `draining` holds its PC (for watchpoint hits).
+    """
+
+    def __init__(self, entries: int = 4, drain_latency: int = 1):
+        if entries < 1 or drain_latency < 1:
+            raise ValueError('Store buffer needs at least one entry and a drain latency of at least 1')
+        self.entries = entries
+        self.drain_latency = drain_latency
+        self.queue = deque()  # [op, address, value, pc, latency], oldest first
+        self.now = 0
+        self.ready = 0        # cycle the head entry reaches memory
+        self.draining = None  # PC of the store being written to memory
+
+        self.stores = 0
+        self.forwarded = 0        # loads that took at least one byte from the buffer
+        self.loads_searched = 0   # loads issued while the buffer held stores
+        self.full_stalls = 0      # cycles stores waited for a free entry
+        self.max_occupancy = 0
+        self.occupancy_cycles = 0  # sum of occupancy over elapsed cycles
+        self.cycles = 0
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    @property
+    def full(self) -> bool:
+        return len(self.queue) >= self.entries
+
+    def push(self, op: str, address: int, value: int, pc: int = 0, memory=None):
+        """Buffer a store (the caller checks `full` first).
+
+        The address is checked here, against `memory`'s bounds when given, so
+        a bad store faults in its own MEM cycle rather than when it drains.
+        """
+        size = STORE_SIZES[op]
+        if address % size != 0:
+            raise ValueError(f'{op} address must be {size}-byte aligned: {address}')
+        if memory is not None and (address < 0 or address + size > memory.size):
+            raise ValueError(f"Memory access out of bounds: {address}")
+        if not self.queue:
+            self.ready = self.now + self.drain_latency
+        self.queue.append([op, address, value, pc, self.drain_latency])
+        self.stores += 1
+        if len(self.queue) > self.max_occupancy:
+            self.max_occupancy = len(self.queue)
+
+    def delay(self, cycles: int):
+        """Add `cycles` to the drain time of the newest store."""
+        if cycles:
+            self.queue[-1][4] += cycles
+            if len(self.queue) == 1:
+                self.ready += cycles
+
+    def drain(self, cycle: int, memory, imem=None):
+        """Advance the clock to `cycle`, writing every store that completes by then."""
+        if cycle > self.now:
+            self.occupancy_cycles += len(self.queue) * (cycle - self.now)
+            self.cycles += cycle - self.now
+            self.now = cycle
+        queue = self.queue
+        while queue and self.ready <= cycle:
+            op, address, value, self.draining, _ = queue.popleft()
+            load_store(op, memory, address, value)
+            self.draining = None
+            # Keep the predecoded instruction store coherent with self-modifying code
+            if imem is not None:
+                imem.sync(address, memory)
+            if queue:
+                self.ready += queue[0][4]
+
+    def flush(self, memory, imem=None) -> int:
+        """Write out every buffered store; return the cycle the last one completes."""
+        while self.queue:
+            self.drain(max(self.ready, self.now), memory, imem)
+        return self.now
+
+    def load(self, op: str, memory, address: int) -> int:
+        """Perform load `op`, merging bytes still waiting in the buffer."""
+        value = load_store(op, memory, address)
+        if not self.queue:
+            return value
+        self.loads_searched += 1
+        size = LOAD_SIZES[op]
+        end = address + size
+        raw = value & ((1 << 8 * size) - 1)
+        hit = False
+        for s_op, s_addr, s_value, _, _ in self.queue:  # oldest first, so newer stores win
+            s_end = s_addr + STORE_SIZES[s_op]
+            for b in range(max(address, s_addr), min(end, s_end)):
+                byte = (s_value >> 8 * (s_end - 1 - b)) & 0xFF
+                shift = 8 * (end - 1 - b)
+                raw = (raw & ~(0xFF << shift)) | (byte << shift)
+                hit = True
+        if not hit:
+            return value
+        self.forwarded += 1
+        if op in ('LB', 'LH'):
+            sign = 1 << (8 * size - 1)
+            return (raw ^ sign) - sign
+        return raw
+
+    @property
+    def average_occupancy(self) -> float:
+        return self.occupancy_cycles / self.cycles if self.cycles else 0.0
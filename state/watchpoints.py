@@ -0,0 +1,139 @@
+#state/watchpoints.py
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .memory import PAGE_SHIFT
+from .hooks import add_hook, remove_hook
+
+# Memory methods that are routed through watchpoint checks: name -> (kind, size)
+_WATCHED_METHODS = {
+    'load_byte': ('r', 1),
+    'load_half': ('r', 2),
+    'load_word': ('r', 4),
+    'store_byte': ('w', 1),
+    'store_half': ('w', 2),
+    'store_word': ('w', 4),
+}
+
+
+@dataclass
+class WatchHit:
+    kind: str               # 'r' or 'w'
+    address: int
+    size: int
+    value: int              # value loaded or stored
+    cycle: Optional[int]    # pipeline cycle of the access (None outside a pipeline)
+    pc: Optional[int]       # PC of the accessing instruction (None outside a pipeline)
+
+
+@dataclass
+class Watchpoint:
+    start: int              # first watched byte
+    end: int                # one past the last watched byte
+    kind: str = 'rw'        # any combination of 'r' and 'w'
+    callback: Optional[Callable[[WatchHit], None]] = None
+    stop: bool = False      # request the run loop to stop on a hit
+
+
+class Watchpoints:
+    """Read/write watchpoints on memory address ranges.
+
+    Nothing is installed while no watchpoint exists, so `load_store` and MEM
+    run on the plain `Memory` methods. Adding the first watchpoint wraps the
+    memory's load/store methods on that instance only (see state/hooks.py, so
+    other hooks such as a `StateHash` survive removal); the wrappers look up the
+    accessed page first and only inspect ranges on watched pages. Instruction
+    fetch uses `Memory.fetch_word` and never triggers watchpoints.
+
+    A store written out later by the pipeline's store buffer reports its
+    own PC and the buffer's drain cycle. Hits are appended to `hits`; a hit on a watchpoint with `stop=True` also
+    sets `triggered`, which run loops should poll after each `Pipeline.step()`.
+    """
+
+    def __init__(self, memory, pipeline=None):
+        self.memory = memory
+        self.pipeline = pipeline  # supplies the cycle and MEM-stage PC of hits
+        self.watchpoints: List[Watchpoint] = []
+        self.pages: Dict[int, List[Watchpoint]] = {}
+        self.hits: List[WatchHit] = []
+        self.triggered: Optional[WatchHit] = None
+        self._hooks = None  # method name -> installed wrapper factory
+
+    def add(self, start: int, end: int, kind: str = 'rw', callback=None, stop: bool = False) -> Watchpoint:
+        """Watch bytes [start, end) for reads ('r'), writes ('w') or both."""
+        if end <= start:
+            raise ValueError(f"Empty watch range: {start:#x}-{end:#x}")
+        if not kind or set(kind) - {'r', 'w'}:
+            raise ValueError(f"Watch kind must be 'r', 'w' or 'rw', got {kind!r}")
+        wp = Watchpoint(start, end, kind, callback, stop)
+        self.watchpoints.append(wp)
+        for page in range(start >> PAGE_SHIFT, ((end - 1) >> PAGE_SHIFT) + 1):
+            self.pages.setdefault(page, []).append(wp)
+        if self._hooks is None:
+            self._install()
+        return wp
+
+    def remove(self, wp: Watchpoint):
+        self.watchpoints.remove(wp)
+        for page in range(wp.start >> PAGE_SHIFT, ((wp.end - 1) >> PAGE_SHIFT) + 1):
+            self.pages[page].remove(wp)
+            if not self.pages[page]:
+                del self.pages[page]
+        if not self.watchpoints:
+            self._uninstall()
+
+    def clear(self):
+        """Remove every watchpoint and restore the unwatched fast path."""
+        self.watchpoints.clear()
+        self.pages.clear()
+        self._uninstall()
+
+    def _install(self):
+        self._hooks = {}
+        for name, (kind, size) in _WATCHED_METHODS.items():
+            wrap = self._hooks[name] = lambda original, kind=kind, size=size: self._wrap(original, kind, size)
+            add_hook(self.memory, name, wrap)
+
+    def _uninstall(self):
+        if self._hooks is None:
+            return
+        for name, wrap in self._hooks.items():
+            remove_hook(self.memory, name, wrap)
+        self._hooks = None
+
+    def _wrap(self, original, kind, size):
+        pages = self.pages
+        check = self._check
+        if kind == 'r':
+            def watched_load(address):
+                value = original(address)
+                if address >> PAGE_SHIFT in pages:
+                    check('r', address, size, value)
+                return value
+            return watched_load
+
+        def watched_store(address, value):
+            original(address, value)
+            if address >> PAGE_SHIFT in pages:
+                check('w', address, size, value)
+        return watched_store
+
+    def _check(self, kind: str, address: int, size: int, value: int):
+        hit = None
+        for wp in self.pages[address >> PAGE_SHIFT]:
+            if kind not in wp.kind or address + size <= wp.start or address >= wp.end:
+                continue
+            if hit is None:
+                cycle = pc = None
+                if self.pipeline is not None:
+                    cycle = self.pipeline.cycle
+                    pc = self.pipeline.ex_mem.pc
+                    buffer = self.pipeline.memory_system.store_buffer
+                    if kind == 'w' and buffer is not None and buffer.draining is not None:
+                        cycle, pc = buffer.now, buffer.draining
+                hit = WatchHit(kind, address, size, value, cycle, pc)
+                self.hits.append(hit)
+            if wp.callback is not None:
+                wp.callback(hit)
+            if wp.stop and self.triggered is None:
+                self.triggered = hit
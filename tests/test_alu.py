@@ -9,6 +9,12 @@ def test_add_and_addu():
     assert alu('ADDU', 0xFFFFFFFF, 1) == 0x00000000
 
 
+def test_add_and_sub_wrap_signed_32_bit():
+    assert alu('ADD', 0x7FFFFFFF, 1) == -0x80000000
+    assert alu('SUB', -0x80000000, 1) == 0x7FFFFFFF
+    assert alu('ADD', -3, 1) == -2
+
+
 def test_sub_and_subu():
     assert alu('SUB', 10, 3) == 7
     assert alu('SUBU', 0, 1) == (0 - 1) & 0xFFFFFFFF
@@ -39,4 +45,4 @@ def test_shifts():
 
 def test_unsupported_op_raises():
     with pytest.raises(ValueError):
-        alu('MUL', 1, 2)  # MUL not implemented yet
+        alu('DIV', 1, 2)  # HI/LO ops go through muldiv()
@@ -1,6 +1,6 @@
 """Tests for branch flushing in the pipeline."""
 
-from tests.util import assemble
+from tests.util import assemble, run_cycles
 from state.cpu_state import CPUstate
 from pipeline.pipeline import Pipeline
 
@@ -323,3 +323,74 @@ def test_bgt_branch_taken():
 
 # Note: Extended branch type support for labels was added to the assembler.
 # Now BLT, BGE, BLE, BGT, BLEZ, and BGTZ can all be tested with labels.
+
+
+def run_loop(src, early_branch, cycles=80):
+    """Run a counted loop and return (cpu, pipeline, cycles between iterations)."""
+    words = assemble(src)
+    branch_pc = 4 * (len(words) - 2)  # the loop branch is second to last
+    cpu, pipeline, writebacks = run_cycles(words, cycles, Pipeline(early_branch=early_branch))
+    branch_cycles = [cycle for cycle, pc in writebacks if pc == branch_pc]
+    gaps = {b - a for a, b in zip(branch_cycles, branch_cycles[1:])}
+    return cpu, pipeline, gaps
+
+
+# The counter update is two instructions ahead of the branch
+INDEPENDENT = 'ADDI $1, $0, 4\nloop: ADDI $1, $1, -1\nADDI $2, $2, 3\nBNE $1, $0, loop\nADDI $5, $0, 1'
+# The branch reads the ALU result produced right before it
+ALU_FED = 'ADDI $1, $0, 4\nloop: ADDI $2, $2, 3\nADDI $1, $1, -1\nBNE $1, $0, loop\nADDI $5, $0, 1'
+# The branch reads a loaded value
+LOAD_FED = 'ADDI $1, $0, 4\nloop: ADDI $1, $1, -1\nLW $3, 512($0)\nBNE $3, $1, loop\nADDI $5, $0, 1'
+
+
+def test_early_branch_taken_penalty_is_one_cycle():
+    cpu, pipeline, gaps = run_loop(INDEPENDENT, early_branch=False)
+    assert gaps == {3 + 2}
+    cpu, pipeline, gaps = run_loop(INDEPENDENT, early_branch=True)
+    assert gaps == {3 + 1}
+    assert pipeline.stalls == 0
+    assert cpu.registers.read(2) == 12 and cpu.registers.read(5) == 1
+
+
+def test_early_branch_stalls_for_alu_and_load_operands():
+    # One extra cycle behind an ALU result in EX
+    cpu, pipeline, gaps = run_loop(ALU_FED, early_branch=True)
+    assert gaps == {3 + 1 + 1}
+    assert cpu.registers.read(2) == 12 and cpu.registers.read(5) == 1
+
+    # Two behind a load in EX (the EX-resolved pipeline needs one)
+    cpu, pipeline, gaps = run_loop(LOAD_FED, early_branch=False)
+    assert gaps == {3 + 1 + 2}
+    cpu, pipeline, gaps = run_loop(LOAD_FED, early_branch=True)
+    assert gaps == {3 + 2 + 1}
+    assert cpu.registers.read(1) == 0 and cpu.registers.read(5) == 1
+
+
+def test_delay_slot_mode_executes_slot_and_saves_flush():
+    from parser.lexer import Lexer
+    from parser.asm_parser import Parser
+    from parser.assembler import Assembler
+    from parser.scheduler import fill_delay_slots
+
+    src = ('ADDI $1, $0, 4\nloop: ADDI $1, $1, -1\nADDI $2, $2, 3\nADDI $7, $7, 1\n'
+           'BNE $1, $0, loop\nJAL f\nADDI $5, $0, 1\nJ end\nf: JR $31\nend: ADDI $6, $0, 1')
+    instructions, slots = fill_delay_slots(Parser(Lexer(src).tokenize()).parse())
+    assert slots[0].filler is not None
+    words = Assembler(instructions).assemble()
+
+    # Four instructions per iteration including the slot, plus one squash if resolved in EX
+    for early_branch, loop_gap in ((False, 4 + 1), (True, 4)):
+        cpu, pipeline, writebacks = run_cycles(words, 60, Pipeline(early_branch=early_branch, delay_slot=True))
+        branch_cycles = [cycle for cycle, pc in writebacks if pc == 3 * 4]
+        assert cpu.registers.read(2) == 12 and cpu.registers.read(7) == 4
+        assert cpu.registers.read(5) == 1 and cpu.registers.read(6) == 1
+        # The call links past its slot
+        assert cpu.registers.read(31) == 5 * 4 + 8
+        assert {b - a for a, b in zip(branch_cycles, branch_cycles[1:])} == {loop_gap}
+
+
+def test_delay_slot_mode_rejects_prediction():
+    import pytest
+    from pipeline.branch_predictor import make_predictor
+    with pytest.raises(ValueError):
+        Pipeline(delay_slot=True, predictor=make_predictor('2bit'))
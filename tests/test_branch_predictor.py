@@ -0,0 +1,134 @@
+# tests/test_branch_predictor.py
+"""Tests for fetch-stage branch prediction."""
+import pytest
+from tests.util import run_cycles
+from pipeline.pipeline import Pipeline
+from pipeline.branch_predictor import (
+    BranchTargetBuffer, Gshare, OneBit, ReturnAddressStack, StaticBTFN, TwoBit, make_predictor,
+)
+
+
+LOOP = '''
+ADDI $1, $0, 10
+ADDI $2, $0, 0
+loop:
+ADDI $2, $2, 3
+ADDI $1, $1, -1
+ADDI $4, $4, 1
+BNE $1, $0, loop
+ADDI $3, $0, 42
+'''
+
+
+def run(predictor_name, cycles=80):
+    pipeline = Pipeline(predictor=make_predictor(predictor_name) if predictor_name else None)
+    cpu, pipeline, writebacks = run_cycles(LOOP, cycles, pipeline)
+    done = next(cycle for cycle, pc in writebacks if pc == 6 * 4)  # ADDI $3 writes back
+    assert cpu.registers.read(2) == 30 and cpu.registers.read(3) == 42
+    return pipeline, done
+
+
+def test_two_bit_counter_saturates():
+    p = TwoBit(entries=4)
+    assert not p.predict(0, 0)
+    p.update(0, 0, True)
+    assert p.predict(0, 0)
+    p.update(0, 0, True)
+    p.update(0, 0, True)
+    p.update(0, 0, False)
+    assert p.predict(0, 0)  # one not-taken does not flip a strong counter
+    assert p.table[0] == 2
+
+
+def test_simple_predictors_and_btb():
+    assert StaticBTFN().predict(16, 8) and not StaticBTFN().predict(16, 32)
+    one = OneBit(entries=4)
+    one.update(4, 0, True)
+    assert one.predict(4, 0) and not one.predict(8, 0)
+
+    btb = BranchTargetBuffer(entries=4)
+    btb.update(4, 100)
+    assert btb.lookup(4) == 100
+    assert btb.lookup(20) is None  # same index, different tag
+
+    g = Gshare(entries=16, history_bits=2)
+    g.update(0, 0, True)
+    g.update(0, 0, False)
+    assert g.history == 0b10
+
+    with pytest.raises(ValueError):
+        make_predictor('oracle')
+
+
+def test_predictors_cut_loop_flushes():
+    base, base_done = run(None)
+    assert base.flushes == 9  # every taken BNE flushes
+
+    for name in ('btfn', '1bit', '2bit'):
+        pipeline, done = run(name)
+        # Cold BTB on the first iteration, then the exit is mispredicted
+        assert pipeline.predictor.mispredicts == 2
+        assert pipeline.predictor.branches == 10
+        assert pipeline.flushes == 2
+        assert done == base_done - 2 * 7
+
+    pipeline, _ = run('not-taken')
+    assert pipeline.predictor.mispredicts == 9
+    assert pipeline.predictor.accuracy == pytest.approx(0.1)
+
+
+def test_prediction_with_early_resolution():
+    cpu, pipeline, _ = run_cycles(LOOP, 80, Pipeline(early_branch=True, predictor=make_predictor('2bit')))
+    assert cpu.registers.read(2) == 30 and cpu.registers.read(3) == 42
+    assert pipeline.predictor.mispredicts == 2 and pipeline.flushes == 2
+
+
+CALLS = '''
+ADDI $5, $0, 3
+loop:
+JAL func
+ADDI $5, $5, -1
+BNE $5, $0, loop
+J end
+func:
+ADDI $4, $4, 7
+JR $31
+end:
+ADDI $6, $0, 1
+'''
+
+
+def run_calls(early_branch=False, ras=None, cycles=80):
+    cpu, pipeline, _ = run_cycles(CALLS, cycles, Pipeline(early_branch=early_branch, ras=ras))
+    assert cpu.registers.read(4) == 21 and cpu.registers.read(6) == 1
+    assert cpu.registers.read(31) == 8  # return address of the JAL at 4
+    return pipeline
+
+
+def test_calls_and_returns_execute():
+    for early_branch in (False, True):
+        pipeline = run_calls(early_branch)
+        # 3 calls, 3 returns, 2 taken BNEs and the final J all redirect fetch
+        assert pipeline.flushes == 9
+
+
+def test_return_address_stack_predicts_returns():
+    ras = ReturnAddressStack(depth=4)
+    pipeline = run_calls(ras=ras)
+    assert ras.returns == 3 and ras.mispredicts == 0
+    assert pipeline.flushes == 6
+
+
+def test_return_address_stack_overflow_and_checkpoint():
+    ras = ReturnAddressStack(depth=2)
+    for address in (4, 8, 12):
+        ras.push(address)
+    assert ras.pop() == 12 and ras.pop() == 8
+    assert ras.pop() is None  # 4 was overwritten
+
+    ras.push(20)
+    state = ras.checkpoint()
+    assert ras.pop() == 20
+    ras.push(99)  # wrong-path pop then push overwrites the top entry
+    ras.restore(state)
+    assert ras.pop() == 20
@@ -0,0 +1,79 @@
+# tests/test_cache.py
+"""Tests for the L1 cache model and its pipeline stalls."""
+import pytest
+
+from tests.util import run_pipeline
+from state.cache import Cache
+from state.memory_system import MemorySystem
+from pipeline.pipeline import Pipeline
+
+
+def test_lru_keeps_recently_used_line_fifo_does_not():
+    # One set, two ways: A, B, touch A, then C evicts the LRU (B) or the oldest (A)
+    for policy, survivor in (('lru', 0x000), ('fifo', 0x100)):
+        cache = Cache(size=32, line_size=16, assoc=2, policy=policy)
+        for addr in (0x000, 0x100, 0x004, 0x200):
+            cache.access(addr)
+        assert cache.contains(survivor) and cache.contains(0x200)
+        assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_write_back_counts_dirty_evictions_and_write_through_does_not_allocate():
+    cache = Cache(size=16, line_size=16, assoc=1, miss_latency=10)
+    assert cache.access(0x40, write=True) == 10     # write-allocate miss
+    assert cache.access(0x44) == 0
+    cache.access(0x80)                              # evicts the dirty line
+    assert cache.writebacks == 1
+
+    through = Cache(size=16, line_size=16, assoc=1, write_back=False, miss_latency=10)
+    assert through.access(0x40, write=True) == 0    # buffered, no allocation
+    assert not through.contains(0x40)
+    assert through.access(0x40) == 10
+    assert through.memory_writes == 1 and through.writebacks == 0
+
+
+def test_random_replacement_is_seeded_and_geometry_is_validated():
+    runs = []
+    for _ in range(2):
+        cache = Cache(size=64, line_size=16, assoc=4, policy='random', seed=3)
+        for addr in range(0, 4096, 48):
+            cache.access(addr)
+        runs.append([sorted(ways) for ways in cache.sets])
+    assert runs[0] == runs[1]
+    with pytest.raises(ValueError):
+        Cache(size=96)
+    with pytest.raises(ValueError):
+        Cache(size=32, line_size=16, assoc=4)
+    with pytest.raises(ValueError):
+        Cache(policy='mru')
+
+
+def test_dcache_miss_freezes_pipeline_for_miss_latency():
+    src = 'LW $1, 256($0)\nADDI $2, $0, 1\nLW $3, 260($0)\nADD $4, $1, $3'
+    _, base = run_pipeline(src, memory={256: 5, 260: 6})
+    pipeline = Pipeline(memory_system=MemorySystem(dcache=Cache(miss_latency=10)))
+    cpu, _ = run_pipeline(src, pipeline, {256: 5, 260: 6})
+    # The second load hits the line the first one brought in
+    assert pipeline.cycle == base.cycle + 10
+    assert pipeline.memory_stalls == 10 and pipeline.memory_system.dcache.pc_stats == {0: [1, 1], 8: [1, 0]}
+    assert cpu.registers.read(4) == 11
+
+
+def test_icache_miss_inserts_fetch_bubbles_per_line():
+    src = '\n'.join(f'ADDI ${i}, $0, {i}' for i in range(1, 9))  # two 16-byte lines
+    _, base = run_pipeline(src)
+    cpu, pipeline = run_pipeline(src, Pipeline(memory_system=MemorySystem(icache=Cache(line_size=16, miss_latency=3))))
+    assert pipeline.cycle == base.cycle + 2 * 3
+    # Fetch also runs ahead into a third line while the last instructions drain
+    assert pipeline.memory_system.icache.misses == 3 and pipeline.fetch_stalls == 9
+    assert cpu.registers.read(8) == 8
+
+
+def test_delay_slot_waits_for_its_own_fetch_after_icache_miss():
+    # The slot (ADDI $2) starts a new line, so it is still being filled when J resolves
+    src = 'ADDI $1, $0, 1\nADDI $3, $0, 3\nADDI $4, $0, 4\nJ end\nADDI $2, $0, 2\nADDI $5, $0, 5\nend: ADDI $6, $0, 6'
+    for early in (False, True):
+        pipeline = Pipeline(early_branch=early, delay_slot=True,
+                            memory_system=MemorySystem(icache=Cache(line_size=16, miss_latency=4)))
+        cpu, _ = run_pipeline(src, pipeline, until_retired=6)
+        assert [cpu.registers.read(r) for r in (2, 5, 6)] == [2, 0, 6]
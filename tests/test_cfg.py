@@ -0,0 +1,69 @@
+# tests/test_cfg.py
+"""Tests for the control-flow graph builder."""
+from tests.util import assemble
+from analysis.cfg import CFG, classify, PLAIN, BRANCH, JUMP, INDIRECT
+
+
+# Loop with the test at the bottom: entered through a forward jump
+PROGRAM = '''
+ADDI $1, $0, 3
+J test
+body:
+ADDI $2, $2, 1
+BEQ $2, $0, skip
+ADDI $3, $3, 1
+skip:
+ADDI $1, $1, -1
+test:
+BNE $1, $0, body
+JR $31
+'''
+
+
+def test_blocks_edges_and_lookup():
+    cfg = CFG(assemble(PROGRAM))
+    assert list(zip(cfg.starts, cfg.ends)) == [(0, 2), (2, 4), (4, 5), (5, 6), (6, 7), (7, 8)]
+    assert cfg.succs[0] == [4]           # J never falls through
+    assert cfg.succs[1] == [2, 3]
+    assert cfg.succs[4] == [5, 1]
+    assert cfg.succs[5] == []            # JR target is unknown
+    assert cfg.preds[1] == [4]
+
+    assert cfg.block_at(8) == 1 and cfg.block_at(12) == 1
+    assert cfg.block_at(28) == 5
+    assert cfg.block_at(32) is None and cfg.block_at(2) is None
+    assert cfg.block_pc(4) == (24, 28)
+
+
+def test_back_edges_and_loop_headers():
+    cfg = CFG(assemble(PROGRAM))
+    # The loop is entered at its test, so the test block is the header
+    assert cfg.back_edges == [(3, 4)]
+    assert cfg.loop_headers == {4}
+    assert cfg.loop_blocks(4, 3) == [1, 2, 3, 4]
+
+
+def test_classify_and_dot():
+    words = assemble(PROGRAM)
+    assert [classify(w) for w in words] == [PLAIN, JUMP, PLAIN, BRANCH, PLAIN, PLAIN, BRANCH, INDIRECT]
+
+    dot = CFG(words).to_dot()
+    assert dot.startswith('digraph cfg {')
+    assert 'b3 -> b4 [style=dashed];' in dot
+    assert 'b4 [label="B4\\n0x0018-0x0018", peripheries=2];' in dot
+
+
+def test_branch_targets_relative_to_base():
+    words = assemble('loop:\nADDI $1, $1, -1\nBNE $1, $0, loop')
+    cfg = CFG(words, base=0x100)
+    assert cfg.targets == [0]
+    assert cfg.back_edges == [(0, 0)]
+    assert cfg.block_at(0x104) == 0 and cfg.block_at(0) is None
+
+
+def test_large_image_has_flat_lookup_table():
+    words = assemble('loop:\nADDI $1, $1, 1\nADD $2, $2, $1\nBNE $1, $0, loop') * 10000
+    cfg = CFG(words)
+    assert len(cfg) == 10000
+    assert len(cfg.block_of) == len(words)
+    assert cfg.block_at(4 * (len(words) - 1)) == 9999
@@ -79,4 +79,20 @@ def test_illegal_r_type_funct():
 def test_illegal_opcode():
     instr = (0x3F << 26)
     with pytest.raises(ValueError):
-        decode(instr)
\ No newline at end of file
+        decode(instr)
+
+def test_register_usage_masks():
+    add = decode(0x00221820)  # ADD $3, $1, $2
+    assert add.reads == (1 << 1) | (1 << 2) and add.writes == 1 << 3
+
+    sw = decode((0x2B << 26) | (3 << 21) | (2 << 16) | 4)  # SW $2, 4($3)
+    assert sw.reads == (1 << 3) | (1 << 2) and sw.writes == 0
+
+    addi = decode((0x08 << 26) | (0 << 21) | (5 << 16) | 1)  # ADDI $5, $0, 1
+    assert addi.reads == 0 and addi.writes == 1 << 5
+
+    blez = decode((0x06 << 26) | (4 << 21) | 8)  # BLEZ $4
+    assert blez.reads == 1 << 4 and blez.writes == 0
+
+    jal = decode((0x03 << 26) | 4)
+    assert jal.reads == 0 and jal.writes == 1 << 31
@@ -0,0 +1,79 @@
+# tests/test_fetch_queue.py
+"""Tests for the decoupled fetch queue between IF and ID."""
+import pytest
+
+from main import run_simulation
+from tests.util import assemble, run_pipeline
+from state.cache import Cache
+from state.memory_system import MemorySystem
+from pipeline.pipeline import Pipeline
+from pipeline.branch_predictor import make_predictor
+
+# A load-use and a multiply stall in every group of four
+STRAIGHT = '\n'.join('LW $2, 0($0)\nMUL $3, $2, $2\nADD $4, $3, $3\nADDI $5, $5, 1' for _ in range(8))
+
+LOOP = """ADDI $1, $0, 6
+loop:
+LW $2, 64($0)
+ADD $3, $3, $2
+ADDI $1, $1, -1
+BGTZ $1, loop
+ADDI $7, $3, 1"""
+
+
+def run(src, count, **options):
+    """Step until `count` instructions retired; return (cpu, pipeline)."""
+    return run_pipeline(src, Pipeline(**options), {64: 5}, count)
+
+
+def test_queue_fills_during_back_end_stalls():
+    cpu, direct = run(STRAIGHT, 32)
+    assert direct.fetch_blocked == direct.stalls == 32
+    for depth, width in ((1, 1), (4, 1), (4, 2)):
+        queued_cpu, queued = run(STRAIGHT, 32, fetch_queue=depth, fetch_width=width)
+        assert queued_cpu.registers.snapshot() == cpu.registers.snapshot()
+        # With single-cycle fetch the queue neither helps nor hurts
+        assert queued.cycle == direct.cycle and queued.stalls == direct.stalls
+        assert queued.max_queue_occupancy == depth and queued.average_queue_occupancy > 0
+        if width == 1:
+            assert queued.fetch_blocked < direct.fetch_blocked
+
+
+def test_queue_hides_icache_misses_behind_stalls():
+    icache = dict(size=256, line_size=16, miss_latency=3)
+    _, direct = run(STRAIGHT, 32, memory_system=MemorySystem(icache=Cache(**icache)))
+    _, queued = run(STRAIGHT, 32, memory_system=MemorySystem(icache=Cache(**icache)), fetch_queue=2)
+    assert direct.fetch_stalls > 20
+    # Most line fills overlap the multiply and load-use stalls
+    assert direct.cycle - queued.cycle > 0.7 * direct.fetch_stalls
+    assert queued.stalls == direct.stalls
+
+
+def test_redirect_discards_queued_instructions():
+    count = 1 + 6 * 4 + 1
+    for predictor in (None, '2bit'):
+        cpu, direct = run(LOOP, count, predictor=make_predictor(predictor) if predictor else None)
+        queued_cpu, queued = run(LOOP, count, predictor=make_predictor(predictor) if predictor else None,
+                                 fetch_queue=4, fetch_width=2)
+        assert queued_cpu.registers.read(3) == 30 and queued_cpu.registers.read(7) == 31
+        assert queued_cpu.registers.snapshot() == cpu.registers.snapshot()
+        assert queued.flushes == direct.flushes and queued.cycle == direct.cycle
+        assert queued.retired == direct.retired
+    for early in (False, True):
+        early_cpu, _ = run(LOOP, count, early_branch=early, fetch_queue=3, fetch_width=2)
+        assert early_cpu.registers.read(7) == 31
+
+    with pytest.raises(ValueError):
+        Pipeline(fetch_width=2)
+    with pytest.raises(ValueError):
+        Pipeline(delay_slot=True, fetch_queue=2)
+
+
+def test_wide_fetch_past_the_program_end_completes_the_run():
+    """A two-wide fetch group may step the PC two words past the end of the program."""
+    src = ('ADDI $1, $0, 5\nADDI $2, $0, 0\nloop:\nADD $2, $2, $1\nADDI $1, $1, -1\nBNE $1, $0, loop\n'
+           'ADDI $3, $0, 42\nHALT')
+    pipeline = Pipeline(fetch_queue=4, fetch_width=2)
+    _, halt_reason, cpu, _ = run_simulation(assemble(src), pipeline, 200, False, False, True)
+    assert halt_reason == 'halt-complete (pipeline flushed)'
+    assert cpu.registers.read(2) == 15 and cpu.registers.read(3) == 42
@@ -0,0 +1,90 @@
+# tests/test_fork.py
+"""Tests for copy-on-write memory and simulation forks."""
+import pickle
+
+import pytest
+from tests.util import load_cpu
+from state.cow_memory import CowMemory
+from state.memory import Memory, PAGE_SIZE
+from pipeline.pipeline import Pipeline
+from pipeline.fork import fork_simulation, export_fork, import_fork
+
+
+def test_cow_memory_matches_flat_memory():
+    flat = Memory(size=64)
+    cow = CowMemory(size=64)
+    for mem in (flat, cow):
+        mem.store_word(4, 0xDEADBEEF)
+        mem.store_half(10, 0x1234)
+        mem.store_byte(13, 0x1FF)
+    for addr in range(0, 64, 4):
+        assert cow.load_word(addr) == flat.load_word(addr)
+    assert cow.load_half(10) == 0x1234
+    assert cow.load_byte(13) == 0xFF
+
+    with pytest.raises(ValueError):
+        cow.load_word(2)
+    with pytest.raises(ValueError):
+        cow.store_half(63, 1)
+    with pytest.raises(ValueError):
+        cow.load_word(64)
+
+
+def test_fork_copies_only_written_pages():
+    parent = CowMemory(size=4 * PAGE_SIZE)
+    parent.store_word(0, 7)
+    child = parent.fork()
+
+    # Nothing copied yet: every page object is shared
+    assert all(a is b for a, b in zip(parent.pages, child.pages))
+
+    child.store_word(PAGE_SIZE, 99)
+    assert child.pages[1] is not parent.pages[1]
+    assert child.pages[0] is parent.pages[0]
+    assert parent.load_word(PAGE_SIZE) == 0
+    assert child.load_word(0) == 7
+
+    # The parent writing to a shared page must not leak into the child either
+    parent.store_word(0, 8)
+    assert child.load_word(0) == 7
+
+
+def test_forked_simulations_diverge_independently():
+    """Children forked mid-run finish like the parent but keep separate state."""
+    src = 'LW $1, 256($0)\nADDI $2, $0, 10\nADD $3, $1, $2\nSW $3, 64($0)'
+    cpu = load_cpu(src, predecode=False)
+    cpu.memory.store_word(256, 5)
+    pipeline = Pipeline()
+    for _ in range(2):
+        pipeline.step(cpu)
+
+    (child_cpu, child_pipe), = fork_simulation(cpu, pipeline)
+    # Give the child a different input before the load reaches MEM
+    child_cpu.memory.store_word(256, 100)
+
+    for _ in range(12):
+        pipeline.step(cpu)
+        child_pipe.step(child_cpu)
+
+    assert cpu.memory.load_word(64) == 15
+    assert child_cpu.memory.load_word(64) == 110
+    assert cpu.registers.read(1) == 5 and child_cpu.registers.read(1) == 100
+
+
+def test_export_import_roundtrip_through_pickle():
+    src = 'ADDI $1, $0, 42\nSW $1, 512($0)'
+    base_cpu = load_cpu(src, predecode=False)
+    base_pipe = Pipeline()
+    child_cpu, child_pipe = base_cpu.fork(), base_pipe.fork()
+    for _ in range(8):
+        child_pipe.step(child_cpu)
+
+    payload = pickle.loads(pickle.dumps(export_fork(child_cpu, child_pipe)))
+    # Only the page holding address 512 was written by the child
+    assert list(payload['pages']) == [512 // PAGE_SIZE]
+
+    cpu, pipe = import_fork(base_cpu.memory, payload)
+    assert cpu.memory.load_word(512) == 42
+    assert cpu.registers.read(1) == 42
+    assert pipe.cycle == child_pipe.cycle
+    assert base_cpu.memory.load_word(512) == 0
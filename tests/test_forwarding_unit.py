@@ -1,7 +1,8 @@
 # tests/test_forwarding_unit.py
 """Unit test for forwarding logic."""
 from pipeline.pipeline_regs import ID_EX, EX_MEM, MEM_WB
-from pipeline.hazards import forwarding
+from pipeline.hazards import forwarding, Scoreboard
+from state.registers import Registers
 
 
 def test_forwarding_from_mem_wb():
@@ -32,6 +33,32 @@ def test_forwarding_from_mem_wb():
     assert id_ex.rs_val == 42, f"Expected forwarding to fill rs_val with 42, got {id_ex.rs_val}"
 
 
+def test_read_operands_forwards_in_flight_results():
+    """Test that Scoreboard.read_operands, used by Pipeline, forwards over the register file."""
+    registers = Registers()
+    registers.write(1, 7)
+    registers.write(2, 5)
+    sb = Scoreboard()
+    id_ex = ID_EX(op='ADD', rs=1, rt=2, reads=0b110)
+
+    # Nothing in flight: both operands come from the register file
+    sb.read_operands(id_ex, registers)
+    assert (id_ex.rs_val, id_ex.rt_val) == (7, 5)
+
+    # A loaded value for $1 is forwarded; $2 is still read from the register file
+    sb.reserve(1, seq=1)
+    sb.produce(1, seq=1, value=42, cycle=3)
+    sb.read_operands(id_ex, registers)
+    assert (id_ex.rs_val, id_ex.rt_val) == (42, 5)
+
+    # Once the producer has written back, the register file is read again
+    registers.write(1, 42)
+    sb.retire(1, seq=1)
+    registers.write(1, 8)
+    sb.read_operands(id_ex, registers)
+    assert id_ex.rs_val == 8
+
+
 if __name__ == "__main__":
     test_forwarding_from_mem_wb()
     print("Forwarding unit test passed!")
@@ -0,0 +1,126 @@
+# tests/test_hazard_analyzer.py
+"""Static hazard predictions checked against the simulated pipeline."""
+from tests.util import assemble, run_cycles
+from pipeline.pipeline import Pipeline
+from execute.muldiv_unit import MulDivUnit
+from analysis.hazard_analyzer import analyze, BRANCH_PENALTY
+
+
+STRAIGHT = '''
+LW $1, 0($0)
+ADD $2, $1, $1
+LW $3, 4($0)
+ADDI $4, $0, 1
+SUB $5, $3, $4
+LW $6, 8($0)
+SW $6, 12($0)
+'''
+
+LOOP = '''
+ADDI $1, $0, 5
+ADDI $2, $0, 0
+loop:
+LW $3, 64($0)
+ADD $2, $2, $3
+ADDI $1, $1, -1
+BNE $1, $0, loop
+ADDI $4, $0, 9
+'''
+
+
+def test_straight_line_stalls_and_cycles_are_exact():
+    words = assemble(STRAIGHT)
+    report = analyze(words)
+    assert [info.stall for info in report.instructions] == [0, 1, 0, 0, 0, 0, 1]
+    assert len(report.blocks) == 1
+
+    _, pipeline, retire_cycles = run_cycles(words, 30)
+    assert pipeline.stalls == report.stalls == 2
+    assert retire_cycles[len(words) - 1][0] == report.straight_line_cycles()
+
+
+def test_test_and_set_result_is_a_load_use_hazard():
+    words = assemble('ADDI $1, $0, 256\nTAS $2, 0($1)\nADD $3, $2, $2')
+    report = analyze(words)
+    assert [info.stall for info in report.instructions] == [0, 0, 1]
+
+    _, pipeline, retire_cycles = run_cycles(words, 30)
+    assert pipeline.stalls == report.stalls
+    assert retire_cycles[len(words) - 1][0] == report.straight_line_cycles()
+
+
+def test_def_use_chains_within_block():
+    report = analyze(assemble(STRAIGHT))
+    lw, add = report.instructions[0], report.instructions[1]
+    assert add.sources == {1: 0}
+    assert lw.uses == [1]
+    assert lw.sources == {}  # $0 is never a dependence
+
+
+def test_loop_blocks_and_cycles_per_iteration():
+    words = assemble(LOOP)
+    report = analyze(words)
+    assert [(b.start, b.end) for b in report.blocks] == [(0, 2), (2, 6), (6, 7)]
+    assert report.blocks[1].successors == [2, 1]
+    assert report.instructions[5].flush == BRANCH_PENALTY
+
+    loop, = report.loops
+    assert loop.single_path and loop.header == loop.latch == 1
+    assert loop.cycles_per_iteration == 4 + 1 + BRANCH_PENALTY
+
+    _, pipeline, retire_cycles = run_cycles(words, 60)
+    branch_retires = [cycle for cycle, pc in retire_cycles if pc == 5 * 4]
+    assert len(branch_retires) == 5
+    gaps = {b - a for a, b in zip(branch_retires, branch_retires[1:])}
+    assert gaps == {loop.cycles_per_iteration}
+    assert pipeline.flushes == 4
+
+
+def test_rotated_loop_entered_at_its_test():
+    src = '''
+ADDI $1, $0, 4
+J test
+body:
+LW $3, 64($0)
+ADD $2, $2, $3
+ADDI $1, $1, -1
+test:
+BNE $1, $0, body
+ADDI $4, $0, 9
+'''
+    words = assemble(src)
+    report = analyze(words)
+    loop, = report.loops
+    assert report.blocks[loop.header].start == 5  # the test block
+    assert loop.single_path
+    assert loop.cycles_per_iteration == 4 + 1 + BRANCH_PENALTY
+
+    _, _, retire_cycles = run_cycles(words, 60)
+    branch_retires = [cycle for cycle, pc in retire_cycles if pc == 5 * 4]
+    gaps = {b - a for a, b in zip(branch_retires, branch_retires[1:])}
+    assert gaps == {loop.cycles_per_iteration}
+
+
+def test_multiply_divide_latency_and_hi_lo_dependences():
+    cases = [
+        ('MULT $1, $2\nMFLO $3', [0, 3]),
+        ('MUL $1, $2, $3\nADD $4, $1, $1', [0, 3]),
+        ('MULT $1, $2\nADDI $5, $0, 1\nMFHI $3', [0, 0, 2]),
+        ('DIV $1, $2\nDIV $3, $4\nMFLO $5', [0, 11, 11]),
+        ('ADDI $1, $0, 3\nLW $2, 0($0)\nMUL $3, $2, $1\nSUB $4, $3, $2', [0, 0, 1, 3]),
+    ]
+    for pipelined in (True, False):
+        for src, stalls in cases + [('MUL $1, $2, $3\nMUL $4, $5, $6', [0, 0 if pipelined else 3])]:
+            words = assemble(src)
+            report = analyze(words, muldiv=MulDivUnit(pipelined=pipelined))
+            assert [info.stall for info in report.instructions] == stalls, src
+
+            _, pipeline, retire_cycles = run_cycles(words, 40, Pipeline(muldiv=MulDivUnit(pipelined=pipelined)))
+            assert pipeline.stalls == report.stalls
+            assert retire_cycles[len(words) - 1][0] == report.straight_line_cycles()
+
+
+def test_loop_with_multiply_is_not_predicted():
+    src = LOOP.replace('ADD $2, $2, $3', 'MUL $2, $2, $3')
+    loop, = analyze(assemble(src)).loops
+    assert loop.single_path and loop.cycles_per_iteration == 0
@@ -0,0 +1,73 @@
+# tests/test_instruction_memory.py
+"""Tests for the predecoded (Harvard-style) instruction store."""
+from tests.util import assemble, run_pipeline
+from state.cpu_state import CPUstate
+from state.instruction_memory import InstructionMemory
+
+
+def test_load_program_builds_instruction_store():
+    words = assemble('ADDI $1, $0, 5\nADD $2, $1, $1')
+    cpu = CPUstate()
+    cpu.load_program(words, base=8)
+    assert cpu.imem.base == 8 and cpu.imem.end == 16
+    assert cpu.imem.words[8 >> 2] == words[0]
+    assert cpu.imem.decoded[12 >> 2].op == 'ADD'
+    # Data memory still holds the program
+    assert cpu.memory.load_word(12) == words[1]
+
+    cpu.load_program(words, predecode=False)
+    assert cpu.imem is None
+
+
+def test_predecoded_fetch_matches_unified_fetch():
+    src = '''
+    ADDI $1, $0, 3
+    ADDI $2, $0, 0
+    loop:
+    ADD $2, $2, $1
+    ADDI $1, $1, -1
+    BNE $1, $0, loop
+    SW $2, 128($0)
+    LW $3, 128($0)
+    ADD $4, $3, $3
+    '''
+    fast, _ = run_pipeline(src, until_retired=2 + 3 * 3 + 3)
+    slow, _ = run_pipeline(src, until_retired=2 + 3 * 3 + 3, predecode=False)
+    assert fast.registers.regs == slow.registers.regs
+    assert fast.registers.read(4) == 12
+
+
+def test_store_into_text_keeps_instruction_store_coherent():
+    """Self-modifying code: overwrite a later instruction before it is fetched."""
+    patched = assemble('ADDI $5, $0, 77')[0]
+    src = '''
+    LW $1, 256($0)
+    SW $1, 32($0)
+    ADDI $6, $0, 1
+    ADDI $6, $0, 2
+    ADDI $6, $0, 3
+    ADDI $6, $0, 4
+    ADDI $6, $0, 5
+    ADDI $6, $0, 6
+    ADDI $5, $0, 11
+    '''
+    for predecode in (True, False):
+        cpu, _ = run_pipeline(src, memory={256: patched}, predecode=predecode)
+        assert cpu.registers.read(5) == 77
+        if predecode:
+            assert cpu.imem.words[32 >> 2] == patched
+
+
+def test_byte_and_half_stores_reach_memory():
+    cpu, _ = run_pipeline('ADDI $1, $0, 0x7F\nADDI $2, $0, 0x1234\nSB $1, 64($0)\nSH $2, 66($0)')
+    assert cpu.memory.load_byte(64) == 0x7F
+    assert cpu.memory.load_half(66) == 0x1234
+    # Stores write nothing back to the register file
+    assert cpu.registers.read(1) == 0x7F
+    assert cpu.registers.read(2) == 0x1234
+
+
+def test_illegal_words_are_left_for_id_to_reject():
+    imem = InstructionMemory([0xFC000000])
+    assert imem.words[0] == 0xFC000000
+    assert imem.decoded[0] is None
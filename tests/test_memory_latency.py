@@ -0,0 +1,73 @@
+# tests/test_memory_latency.py
+"""Tests for per-region data memory latency."""
+import pytest
+
+from tests.util import run_pipeline
+from state.cache import Cache
+from state.memory_latency import MemoryLatency
+from state.store_buffer import StoreBuffer
+from state.memory_system import MemorySystem
+from pipeline.pipeline import Pipeline
+
+# One scratchpad load (below 1024) and one DRAM load and store (1024 and up)
+PROGRAM = 'LW $1, 256($0)\nLW $2, 1024($0)\nADD $3, $1, $2\nSW $3, 1028($0)\nADDI $4, $0, 1'
+
+
+class CountingPipeline(Pipeline):
+    """`Pipeline` that counts its `step()` calls."""
+    steps = 0
+
+    def step(self, cpu):
+        self.steps += 1
+        super().step(cpu)
+
+
+def run(**options):
+    """Run PROGRAM to completion; return (cycles, steps, cpu, pipeline)."""
+    cpu, pipeline = run_pipeline(PROGRAM, CountingPipeline(memory_system=MemorySystem(**options)), {256: 5, 1024: 7})
+    pipeline.drain_stores(cpu)
+    return pipeline.cycle, pipeline.steps, cpu, pipeline
+
+
+def dram(latency=20, default=1):
+    memory_latency = MemoryLatency(default)
+    memory_latency.add_region(1024, 4096, latency, name='dram')
+    return memory_latency
+
+
+def test_regions_are_looked_up_by_address():
+    memory_latency = MemoryLatency(default=2)
+    memory_latency.add_region(1024, 2048, 30, write_latency=10)
+    memory_latency.add_region(0, 256, 1)
+    assert [r.start for r in memory_latency.regions] == [0, 1024]
+    assert memory_latency.access(100) == 1
+    assert memory_latency.access(512) == 2
+    assert memory_latency.access(2044) == 30 and memory_latency.access(2044, write=True) == 10
+    assert memory_latency.latency(2048) == 2
+    assert memory_latency.regions[1].wait_cycles == 29 + 9
+    with pytest.raises(ValueError):
+        memory_latency.add_region(2000, 3000, 5)
+
+
+def test_slow_region_holds_mem_without_extra_steps():
+    base_cycles, base_steps, _, _ = run()
+    cycles, steps, cpu, pipeline = run(memory_latency=dram(20))
+    # The DRAM load and store each wait 19 extra cycles; the scratchpad load none
+    assert cycles == base_cycles + 2 * 19 and pipeline.memory_stalls == 38
+    assert steps == base_steps
+    assert cpu.registers.read(3) == 12 and cpu.memory.load_word(1028) == 12
+    assert pipeline.memory_system.memory_latency.regions[0].accesses == 2
+
+
+def test_store_buffer_and_cache_absorb_slow_memory():
+    slow_cycles, _, _, _ = run(memory_latency=dram(20))
+    # A buffered store drains to DRAM in the background
+    cycles, _, cpu, pipeline = run(memory_latency=dram(20), store_buffer=StoreBuffer(2))
+    assert pipeline.memory_stalls == 19 and cpu.memory.load_word(1028) == 12
+    assert cycles < slow_cycles
+
+    # With a D-cache the region latency is the miss penalty (1 + 20 for the
+    # two loads) and the store hits the line the DRAM load filled
+    cycles, _, cpu, pipeline = run(memory_latency=dram(20), dcache=Cache(miss_latency=3))
+    assert pipeline.memory_stalls == 1 + 20 and pipeline.memory_system.dcache.misses == 2
+    assert pipeline.memory_system.memory_latency.regions[0].accesses == 1
@@ -0,0 +1,66 @@
+# tests/test_muldiv.py
+"""Tests for MULT/DIV/MUL with HI/LO and the multi-cycle multiply/divide unit."""
+import pytest
+
+from tests.util import assemble_and_decode, run_pipeline
+from decoder.decoder import HI, LO, reg_mask
+from execute.alu import alu, muldiv
+from execute.muldiv_unit import MulDivUnit
+from pipeline.pipeline import Pipeline
+
+
+def run(src, **unit):
+    """Run `src` to completion on a pipeline with MulDivUnit(**unit); return (cpu, pipeline)."""
+    return run_pipeline(src, Pipeline(muldiv=MulDivUnit(**unit)))
+
+
+def test_muldiv_arithmetic():
+    assert muldiv('MULT', -3, 5) == (-1, -15)
+    assert muldiv('MULTU', -1, 2) == (1, -2)          # 0xFFFFFFFF * 2
+    assert muldiv('MULT', 0x40000000, 4) == (1, 0)
+    assert muldiv('DIV', -7, 2) == (-1, -3)           # truncates toward zero
+    assert muldiv('DIVU', -1, 16) == (15, 0x0FFFFFFF)
+    assert muldiv('DIV', -0x80000000, -1) == (0, -0x80000000)
+    assert muldiv('DIV', 9, 0) == (9, -1)
+    assert alu('MUL', 0x10000, 0x10001) == 0x10000
+    with pytest.raises(ValueError):
+        MulDivUnit(mul_latency=0)
+
+
+def test_assemble_and_decode():
+    mult, mfhi, mflo, mul = assemble_and_decode('MULT $1, $2\nMFHI $3\nMFLO $4\nMUL $5, $6, $7')
+    assert mult.op == 'MULT' and mult.reads == reg_mask(1, 2) and mult.writes == reg_mask(HI, LO)
+    assert mfhi.op == 'MFHI' and mfhi.rs == HI and mfhi.rd == 3 and mfhi.writes == reg_mask(3)
+    assert mflo.rs == LO and mflo.reads == reg_mask(LO)
+    assert (mul.op, mul.rd, mul.rs, mul.rt) == ('MUL', 5, 6, 7)
+
+
+def test_dependent_instructions_wait_for_the_unit():
+    src = 'ADDI $1, $0, -6\nADDI $2, $0, 7\nMULT $1, $2\nMFLO $3\nMFHI $4\nMUL $5, $3, $2\nADD $6, $5, $0'
+    cpu, base = run(src, mul_latency=1)
+    assert base.stalls == 0
+    cpu, pipeline = run(src, mul_latency=4)
+    assert [cpu.registers.read(r) for r in (3, 4, 5, 6)] == [-42, -1, -294, -294]
+    assert cpu.registers.read(LO) == -42 and cpu.registers.read(HI) == -1
+    # MFLO waits 3 cycles for MULT, ADD another 3 for MUL
+    assert pipeline.stalls == 6 and pipeline.cycle == base.cycle + 6
+    assert pipeline.muldiv.multiplies == 2
+
+
+def test_independent_instructions_overlap_the_multiply():
+    src = 'ADDI $1, $0, 3\nMULT $1, $1\nADDI $2, $0, 1\nADDI $3, $0, 2\nADDI $4, $0, 3\nMFLO $5'
+    cpu, pipeline = run(src, mul_latency=4)
+    assert pipeline.stalls == 0 and cpu.registers.read(5) == 9
+
+
+def test_iterative_divider_is_a_structural_hazard():
+    src = 'ADDI $1, $0, 100\nADDI $2, $0, 7\nDIV $1, $2\nDIV $2, $1\nMFHI $3\nMFLO $4'
+    cpu, pipeline = run(src, div_latency=8)
+    assert cpu.registers.read(3) == 7 and cpu.registers.read(4) == 0
+    # The second DIV waits 7 cycles for the divider, MFHI 7 more for its result
+    assert pipeline.muldiv.busy_stalls == 7 and pipeline.stalls == 14
+
+    # Multiplies pipeline unless told otherwise
+    src = 'MULT $1, $2\nMULT $3, $4\nMULT $5, $6'
+    assert run(src, mul_latency=3)[1].stalls == 0
+    assert run(src, mul_latency=3, pipelined=False)[1].muldiv.busy_stalls == 4
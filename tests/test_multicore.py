@@ -0,0 +1,82 @@
+# tests/test_multicore.py
+"""Tests for TAS, MSI-coherent caches and the multicore model."""
+from tests.util import assemble, assemble_and_decode, run_pipeline
+from decoder.decoder import reg_mask
+from state.coherence import SnoopingBus, CoherentCache
+from pipeline.multicore import Multicore
+
+# Every core adds 1 to the counter at 516 five times under the TAS lock at 512
+LOCKED_COUNTER = """ADDI $5, $0, 5
+loop:
+TAS $1, 512($0)
+BNE $1, $0, loop
+LW $2, 516($0)
+ADDI $2, $2, 1
+SW $2, 516($0)
+SW $0, 512($0)
+ADDI $5, $5, -1
+BGTZ $5, loop"""
+
+L1D = dict(size=256, line_size=16, assoc=2, miss_latency=10)
+
+
+def run_cores(src, cores, dcache=None, **options):
+    """Run `src` on `cores` cores until all finished; return the system."""
+    words = assemble(src)
+    system = Multicore(cores, dcache=dcache, end_pc=len(words) * 4, **options)
+    system.load_program(words)
+    while system.step() is not None:
+        pass
+    return system
+
+
+def test_tas_reads_old_value_and_sets_one():
+    tas, = assemble_and_decode('TAS $3, 8($4)')
+    assert (tas.op, tas.rt, tas.rs, tas.imm) == ('TAS', 3, 4, 8)
+    assert tas.reads == reg_mask(4) and tas.writes == reg_mask(3)
+
+    # The second TAS sees the first one's 1; the ADD waits for TAS like for a load
+    cpu, pipeline = run_pipeline('ADDI $1, $0, 64\nTAS $2, 0($1)\nADD $3, $2, $2\nTAS $4, 0($1)')
+    assert [cpu.registers.read(r) for r in (2, 3, 4)] == [0, 0, 1]
+    assert cpu.memory.load_word(64) == 1 and pipeline.stalls == 1
+
+
+def test_msi_states_and_traffic():
+    bus = SnoopingBus()
+    a, b = (CoherentCache(bus, size=64, line_size=16) for _ in range(2))
+    a.access(0x40)
+    b.access(0x44)
+    assert a.state(0x40) == b.state(0x40) == 'S'
+    assert a.access(0x40, write=True) == 1            # upgrade: B invalidated
+    assert (a.state(0x40), b.state(0x40)) == ('M', 'I') and b.invalidations == 1
+    b.access(0x48)                                    # A flushes its Modified copy
+    assert a.state(0x40) == b.state(0x40) == 'S' and bus.flushes == 1
+    b.access(0x40, write=True)
+    a.access(0x40, write=True)                        # write miss takes it back
+    assert (a.state(0x40), b.state(0x40)) == ('M', 'I')
+    assert bus.transactions == {'BusRd': 3, 'BusRdX': 1, 'BusUpgr': 2}
+    assert bus.invalidations == 3 and bus.flushes == 2
+
+
+def test_lock_protects_the_shared_counter():
+    for cores, dcache in ((1, None), (2, None), (2, L1D), (3, L1D)):
+        system = run_cores(LOCKED_COUNTER, cores, dcache)
+        assert system.memory.load_word(516) == 5 * cores
+        assert system.memory.load_word(512) == 0
+        assert all(core.cpi > 1 for core in system.cores)
+    # The contended lock line bounces between the caches
+    assert system.bus.transactions['BusRdX'] > 5 * 3 and system.bus.invalidations > 0
+    assert sum(core.pipeline.memory_system.dcache.invalidations for core in system.cores) == system.bus.invalidations
+
+
+def test_cores_are_deterministic_and_can_split_work():
+    # Core i stores 10 + i at 256 + 4 * i using its id in $26
+    src = 'ADD $2, $26, $26\nADD $2, $2, $2\nADDI $3, $26, 10\nSW $3, 256($2)'
+    system = run_cores(src, 4, L1D, id_register=26)
+    assert [system.memory.load_word(256 + 4 * i) for i in range(4)] == [10, 11, 12, 13]
+
+    first = run_cores(LOCKED_COUNTER, 3, L1D, predictor='2bit')
+    second = run_cores(LOCKED_COUNTER, 3, L1D, predictor='2bit')
+    assert [core.pipeline.cycle for core in first.cores] == [core.pipeline.cycle for core in second.cores]
+    assert first.bus.transactions == second.bus.transactions
+    assert first.cores[0].pipeline.predictor is not first.cores[1].pipeline.predictor
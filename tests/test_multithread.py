@@ -0,0 +1,80 @@
+# tests/test_multithread.py
+"""Tests for the fine-grained multithreaded pipeline."""
+from tests.util import assemble, load_cpu, run_pipeline
+from pipeline.pipeline import Pipeline
+from pipeline.multithread import MultithreadedPipeline, make_threads
+from pipeline.branch_predictor import make_predictor
+
+# Sums and triples a 16-word array: a load-use and a multiply stall per iteration
+KERNEL = """ADDI $1, $0, 16
+ADDI $5, $0, 256
+ADDI $9, $0, 3
+loop:
+LW $2, 0($5)
+ADD $3, $3, $2
+MUL $4, $2, $9
+ADD $6, $6, $4
+ADDI $5, $5, 4
+ADDI $1, $1, -1
+BGTZ $1, loop
+ADDI $7, $0, 7"""
+
+
+def run_threads(src, threads, predictor=None, memory=()):
+    """Run `src` in `threads` threads until all finished; return (cpus, pipeline)."""
+    cpus = make_threads(load_cpu(src, memory), threads)
+    pipeline = MultithreadedPipeline(threads, predictor=make_predictor(predictor) if predictor else None,
+                                     end_pc=4 * len(assemble(src)))
+    while not all(pipeline.finished(context, cpus[context.tid]) for context in pipeline.contexts):
+        pipeline.step(cpus)
+    return cpus, pipeline
+
+
+def run_scalar(src, count, predictor=None, memory=()):
+    """Step the scalar pipeline until `count` instructions retired."""
+    pipeline = Pipeline(predictor=make_predictor(predictor) if predictor else None)
+    return run_pipeline(src, pipeline, memory, count)
+
+
+def test_threads_share_memory_not_registers():
+    cpu = load_cpu('ADDI $1, $0, 1')
+    cpus = make_threads(cpu, 2)
+    assert cpus[0] is cpu and cpus[1].memory is cpu.memory and cpus[1].imem is cpu.imem
+    cpus[1].registers.write(1, 5)
+    assert cpu.registers.read(1) == 0
+
+    # Thread 1 spins until thread 0's store reaches the shared memory
+    src = ('ADDI $9, $0, 1\nBEQ $9, $9, wait\nADDI $1, $0, 42\nSW $1, 128($0)\nJ end\n'
+           'wait:\nLW $2, 128($0)\nBEQ $2, $0, wait\nend:\nADDI $3, $0, 3')
+    cpus = make_threads(load_cpu(src), 2)
+    cpus[0].pc = 8      # thread 0 skips the branch to the wait loop
+    pipeline = MultithreadedPipeline(2, end_pc=4 * len(assemble(src)))
+    while not all(pipeline.finished(context, cpus[context.tid]) for context in pipeline.contexts):
+        pipeline.step(cpus)
+    assert cpus[0].registers.read(1) == 42 and cpus[0].registers.read(2) == 0
+    assert cpus[1].registers.read(2) == 42 and cpus[1].registers.read(1) == 0
+    assert cpus[1].registers.read(3) == 3 and pipeline.contexts[1].flushes >= 1
+
+
+def test_one_thread_matches_the_scalar_pipeline():
+    array = [(256 + 4 * i, i + 1) for i in range(16)]
+    for predictor in (None, '2bit'):
+        cpus, threaded = run_threads(KERNEL, 1, predictor, array)
+        cpu, scalar = run_scalar(KERNEL, threaded.retired, predictor, array)
+        assert cpus[0].registers.snapshot() == cpu.registers.snapshot()
+        assert threaded.cycle == scalar.cycle and threaded.stalls == scalar.stalls
+        assert threaded.flushes == scalar.flushes
+
+
+def test_second_thread_fills_stall_cycles():
+    array = [(256 + 4 * i, i + 1) for i in range(16)]
+    for predictor in (None, '2bit'):
+        _, single = run_threads(KERNEL, 1, predictor, array)
+        cpus, pipeline = run_threads(KERNEL, 2, predictor, array)
+        for cpu in cpus:
+            assert cpu.registers.read(3) == 136 and cpu.registers.read(6) == 408
+        assert [context.retired for context in pipeline.contexts] == [single.retired] * 2
+        assert pipeline.thread_ipc(0) == pipeline.thread_ipc(1)
+        # Two threads' work in well under twice the cycles of one
+        assert pipeline.ipc > 1.3 * single.ipc
+        assert pipeline.hidden_stalls > 0 and pipeline.stalls < single.stalls
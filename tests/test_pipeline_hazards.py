@@ -1,7 +1,7 @@
 # tests/test_pipeline_hazards.py
 """Test pipeline hazard detection, stalling, and forwarding."""
 import pytest
-from tests.util import assemble
+from tests.util import assemble, run_cycles
 from state.cpu_state import CPUstate
 from pipeline.pipeline import Pipeline
 from pipeline.hazards import detect_load_use_hazard
@@ -143,3 +143,59 @@ def test_pipeline_forwarding_without_stall():
     assert cpu.registers.read(1) == 10
     assert cpu.registers.read(2) == 10
     assert cpu.registers.read(3) == 5
+
+
+def test_load_value_forwarded_two_instructions_later():
+    """A consumer two slots behind a load gets the loaded value, not a stale register."""
+    src = 'LW $1, 256($0)\nADDI $5, $0, 1\nADD $2, $1, $0'
+    cpu, _, _ = run_cycles(src, 20, memory={256: 42})
+    assert cpu.registers.read(2) == 42
+
+
+def test_stalled_instruction_keeps_register_file_operand():
+    """The operand not involved in the load-use stall survives the stall cycle."""
+    src = 'ADDI $3, $0, 7\nADDI $5, $0, 0\nADDI $6, $0, 0\nLW $1, 256($0)\nADD $2, $3, $1'
+    cpu, _, _ = run_cycles(src, 20, memory={256: 35})
+    assert cpu.registers.read(2) == 42
+
+
+def test_scoreboard_ready_cycles():
+    from pipeline.hazards import Scoreboard
+    sb = Scoreboard()
+    id_ex = ID_EX(op='ADD', rs=1, rt=2, reads=0b110)
+
+    sb.reserve(1, seq=1)
+    assert sb.must_stall(id_ex, cycle=5)
+    sb.produce(1, seq=1, value=9, cycle=5)
+    assert sb.must_stall(id_ex, cycle=5)
+    assert not sb.must_stall(id_ex, cycle=6)
+
+    # An older producer finishing late must not replace a younger one
+    sb.produce(1, seq=2, value=11, cycle=6)
+    sb.produce(1, seq=1, value=9, cycle=7)
+    assert sb.read(1, None) == 11
+
+    sb.retire(1, seq=1)
+    assert sb.owner[1] == 2
+    sb.retire(1, seq=2)
+    assert sb.owner[1] == 0
+
+
+def test_store_source_is_not_treated_as_destination():
+    """A store's rt is an operand: later readers must see the register, not the address."""
+    src = 'ADDI $1, $0, 7\nSW $1, 256($0)\nADD $3, $1, $0'
+    cpu, pipeline, _ = run_cycles(src, 20)
+    assert cpu.memory.load_word(256) == 7
+    assert cpu.registers.read(3) == 7
+    assert pipeline.scoreboard.inflight == 0
+
+
+def test_forwarded_operands_match_register_file_reads():
+    """Unsigned ALU and load results are forwarded with the register file's sign."""
+    spacer = '\nADDI $9, $0, 0' * 3
+    for producer in ('ADDI $1, $0, -1\nADDU $2, $1, $0', 'LW $2, 256($0)'):
+        results = []
+        for gap in ('', spacer):
+            cpu, _, _ = run_cycles(producer + gap + '\nSLT $3, $2, $0', 30, memory={256: 0xFFFFFFF0})
+            results.append(cpu.registers.read(3))
+        assert results == [1, 1]
@@ -0,0 +1,81 @@
+# tests/test_prefetcher.py
+"""Tests for the per-PC stride prefetcher on the data cache."""
+import pytest
+
+from tests.util import run_pipeline
+from state.cache import Cache
+from state.prefetcher import StridePrefetcher
+from state.memory_system import MemorySystem
+from state.memory_latency import MemoryLatency
+from pipeline.pipeline import Pipeline
+
+# Sums 48 consecutive words: one 16-byte line every 4 loads
+WALK = """ADDI $1, $0, 48
+ADDI $5, $0, 1024
+loop:
+LW $2, 0($5)
+ADD $3, $3, $2
+ADDI $5, $5, 4
+ADDI $1, $1, -1
+BGTZ $1, loop"""
+
+
+def walk(memory_latency=None, **prefetch):
+    dcache = Cache(size=256, line_size=16, assoc=2, miss_latency=10)
+    prefetcher = StridePrefetcher(dcache, **prefetch) if prefetch else None
+    pipeline = Pipeline(memory_system=MemorySystem(dcache=dcache, prefetcher=prefetcher,
+                                                   memory_latency=memory_latency))
+    run_pipeline(WALK, pipeline, until_retired=2 + 48 * 5)
+    return pipeline
+
+
+def test_stride_prefetch_removes_mem_stalls():
+    base = walk()
+    assert base.memory_system.dcache.misses == 12 and base.memory_stalls == 120
+
+    pipeline = walk(degree=1, distance=1)
+    prefetcher = pipeline.memory_system.prefetcher
+    # The stride is confirmed within the first line, so only that line misses;
+    # the last prefetch runs past the end of the array
+    assert pipeline.memory_system.dcache.misses == 1 and prefetcher.useful == 11 and prefetcher.issued == 12
+    assert prefetcher.coverage == pytest.approx(11 / 12)
+    assert prefetcher.accuracy == pytest.approx(11 / 12)
+    assert base.memory_stalls - pipeline.memory_stalls == prefetcher.cycles_saved
+    assert pipeline.cycle < base.cycle
+
+
+def test_prefetch_distance_turns_late_prefetches_timely():
+    near = walk(degree=1, distance=1).memory_system.prefetcher
+    far = walk(degree=1, distance=4).memory_system.prefetcher
+    # One stride ahead is one loop iteration (8 cycles) of lead time; the miss takes 10
+    assert near.late == near.useful and near.timeliness == 0.0
+    assert far.late == 0 and far.timeliness == 1.0
+    assert far.cycles_saved > near.cycles_saved
+
+
+def test_prefetches_into_a_slow_region_arrive_after_its_latency():
+    def slow():
+        memory_latency = MemoryLatency()
+        memory_latency.add_region(1024, 1024 + 48 * 4, 20)
+        return memory_latency
+
+    # Two strides ahead is 16 cycles of lead time: enough for the cache's
+    # 10-cycle miss, but not for the array's 20-cycle region
+    assert walk(degree=1, distance=2).memory_system.prefetcher.late == 0
+    base = walk(slow())
+    pipeline = walk(slow(), degree=1, distance=2)
+    prefetcher = pipeline.memory_system.prefetcher
+    assert prefetcher.useful == 11 and prefetcher.late == prefetcher.useful
+    assert base.memory_stalls - pipeline.memory_stalls == prefetcher.cycles_saved
+
+
+def test_irregular_and_store_streams_do_not_prefetch():
+    cache = Cache(size=256, line_size=16, assoc=2)
+    prefetcher = StridePrefetcher(cache, degree=2)
+    for address in (0, 64, 80, 200, 8, 300):
+        prefetcher.access(address, False, pc=0x20, cycle=0)
+    for address in range(512, 640, 16):
+        prefetcher.access(address, True, pc=0x24, cycle=0)
+    assert prefetcher.issued == 0
+    with pytest.raises(ValueError):
+        MemorySystem(dcache=Cache(), prefetcher=prefetcher)
@@ -0,0 +1,89 @@
+# tests/test_scheduler.py
+"""Tests for the load-use scheduling pass."""
+from parser.lexer import Lexer
+from parser.asm_parser import Parser
+from parser.assembler import Assembler
+from parser.scheduler import schedule
+from tests.util import run_cycles
+
+
+def parse(src):
+    return Parser(Lexer(src).tokenize()).parse()
+
+
+ARRAY = {1024: 3, 1028: 4, 1032: 5}
+
+KERNEL = '''
+ADDI $9, $0, 2
+loop:
+LW $1, 1024($0)
+ADD $2, $1, $1
+LW $3, 1028($0)
+SUB $4, $3, $1
+LW $5, 1032($0)
+SW $5, 1100($0)
+ADDI $6, $0, 7
+ADDI $7, $0, 8
+ADDI $9, $9, -1
+BNE $9, $0, loop
+ADD $8, $4, $2
+'''
+
+
+def test_schedule_removes_stalls_and_preserves_results():
+    original = parse(KERNEL)
+    scheduled, blocks = schedule(original)
+
+    loop_block = blocks[1]
+    assert (loop_block.start, loop_block.end) == (1, 11)
+    assert loop_block.stalls_before == 3 and loop_block.stalls_after == 0
+    assert loop_block.stalls_removed == 3
+
+    # The label moved to the new block leader and the branch stayed last
+    assert scheduled[1].label == 'loop'
+    assert [i.label for i in scheduled].count('loop') == 1
+    assert scheduled[10].mnemonic == 'BNE'
+
+    cpu_a, pipe_a, _ = run_cycles(Assembler(original).assemble(), 80, memory=ARRAY)
+    cpu_b, pipe_b, _ = run_cycles(Assembler(scheduled).assemble(), 80, memory=ARRAY)
+    assert cpu_b.registers.snapshot() == cpu_a.registers.snapshot()
+    assert cpu_b.memory.load_word(1100) == cpu_a.memory.load_word(1100) == 5
+    assert pipe_b.stalls == pipe_a.stalls - 2 * 3
+
+
+def test_memory_order_and_dependences_are_kept():
+    src = 'SW $2, 0($3)\nLW $1, 0($3)\nADD $4, $1, $0\nADDI $5, $0, 1'
+    scheduled, blocks = schedule(parse(src))
+    order = [i.mnemonic for i in scheduled]
+    assert order.index('SW') < order.index('LW') < order.index('ADD')
+    assert blocks[0].stalls_after == 0
+
+
+def test_block_without_gain_keeps_original_order():
+    original = parse('ADDI $1, $0, 1\nADD $2, $1, $1\nHALT')
+    scheduled, blocks = schedule(original)
+    assert [i.mnemonic for i in scheduled] == ['ADDI', 'ADD', 'HALT']
+    assert blocks[0].stalls_removed == 0
+
+
+def test_fill_delay_slots_moves_independent_instruction():
+    from parser.scheduler import fill_delay_slots
+    src = 'ADDI $1, $0, 3\nloop: ADDI $2, $2, 5\nADDI $1, $1, -1\nBNE $1, $0, loop\nADDI $3, $0, 1'
+    filled, slots = fill_delay_slots(parse(src))
+    # ADDI $2 is labelled, ADDI $1 feeds the branch: only a NOP fits
+    assert slots[0].filler is None
+    assert [i.mnemonic for i in filled] == ['ADDI', 'ADDI', 'ADDI', 'BNE', 'SLL', 'ADDI']
+
+    src = 'ADDI $1, $0, 3\nloop: ADDI $1, $1, -1\nADDI $2, $2, 5\nSW $2, 1100($0)\nBNE $1, $0, loop\nADDI $3, $0, 1'
+    filled, slots = fill_delay_slots(parse(src))
+    # SW is the closest independent instruction; ADDI $2 feeds it and stays
+    assert slots[0].filler == 3
+    assert [i.mnemonic for i in filled] == ['ADDI', 'ADDI', 'ADDI', 'BNE', 'SW', 'ADDI']
+    assert filled[1].label == 'loop'
+
+
+def test_calls_do_not_take_instructions_using_the_link_register():
+    from parser.scheduler import fill_delay_slots
+    src = 'ADDI $31, $0, 4\nJAL f\nADDI $3, $0, 1\nf: ADDI $4, $0, 2'
+    _, slots = fill_delay_slots(parse(src))
+    assert slots[0].filler is None
@@ -0,0 +1,62 @@
+# tests/test_stack_distance.py
+"""Tests for single-pass stack-distance cache sweeps."""
+import random
+
+import pytest
+
+from tests.util import run_pipeline
+from state.cache import Cache
+from state.memory_system import MemorySystem
+from pipeline.pipeline import Pipeline
+from analysis.stack_distance import AccessTrace, miss_curve, sweep
+
+# Walks 64 words with a 40-byte stride (wrapping in 512 bytes), loading and storing each
+STRIDED = """ADDI $1, $0, 64
+ADDI $5, $0, 0
+loop:
+LW $2, 1024($5)
+ADD $3, $3, $2
+SW $3, 1028($5)
+ADDI $5, $5, 40
+ANDI $5, $5, 511
+ADDI $1, $1, -1
+BGTZ $1, loop"""
+
+
+def record(**caches):
+    """Run the complete STRIDED walk with an access trace attached."""
+    pipeline = Pipeline(trace=AccessTrace(), memory_system=MemorySystem(**caches))
+    run_pipeline(STRIDED, pipeline, until_retired=2 + 64 * 7)  # every dynamic instruction of STRIDED
+    return pipeline
+
+
+def test_histogram_counts_distinct_lines_since_last_use():
+    # Lines (16 B) in one set: A B A C B A -> distances cold, cold, 1, cold, 2, 2
+    curve = miss_curve([0, 16, 4, 32, 20, 8], line_size=16, num_sets=1, max_assoc=4)
+    assert curve.histogram == [0, 1, 2, 0, 3]
+    assert curve.compulsory == 3
+    assert [curve.misses(a) for a in (1, 2, 3, 4)] == [6, 5, 3, 3]
+    with pytest.raises(ValueError):
+        curve.misses(5)
+
+
+def test_sweep_matches_lru_cache_simulation():
+    rng = random.Random(7)
+    addresses = [rng.randrange(0, 4096) & ~3 for _ in range(3000)]
+    points = sweep(addresses, line_sizes=(8, 32), sizes=(128, 512), assocs=(1, 2, 4))
+    assert len(points) == 12
+    for point in points:
+        cache = Cache(size=point.size, line_size=point.line_size, assoc=point.assoc)
+        for address in addresses:
+            cache.access(address)
+        assert point.misses == cache.misses, point
+
+
+def test_recorded_data_trace_predicts_dcache_misses():
+    """One traced run predicts the misses of every D-cache the pipeline could have used."""
+    trace = record().trace
+    assert len(trace.data) == 128 and trace.fetches[:3].tolist() == [0, 4, 8]
+    for point in sweep(trace.data, line_sizes=(16,), sizes=(128, 256), assocs=(1, 2)):
+        dcache = Cache(size=point.size, line_size=16, assoc=point.assoc)
+        record(dcache=dcache)
+        assert point.misses == dcache.misses, point
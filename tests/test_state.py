@@ -37,4 +37,32 @@ def test_pc_stepping():
 
     # Step with custom offset
     cpu.step_pc(8)
-    assert cpu.pc == 12
\ No newline at end of file
+    assert cpu.pc == 12
+
+def test_register_writes_wrap_to_32_bits():
+    cpu = CPUstate()
+    cpu.registers.write(1, 0x7FFFFFFF + 1)
+    cpu.registers.write(2, 0xFFFFFFFF)
+    cpu.registers.write(3, -5)
+    cpu.registers.write(4, 1 << 40)
+
+    assert cpu.registers.read(1) == -0x80000000
+    assert cpu.registers.read(2) == -1
+    assert cpu.registers.read(3) == -5
+    assert cpu.registers.read(4) == 0
+
+
+def test_register_snapshot_restore_and_view():
+    cpu = CPUstate()
+    view = cpu.registers.view()
+    cpu.registers.write(5, 123)
+    snap = cpu.registers.snapshot()
+
+    cpu.registers.write(5, 456)
+    assert view[5] == 456  # live, zero-copy view
+    assert snap[5] == 123  # snapshot is an independent copy
+
+    cpu.registers.restore(snap)
+    assert cpu.registers.read(5) == 123
+    assert view[5] == 123
+    assert view.itemsize == 4 and len(view) == 32
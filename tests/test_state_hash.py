@@ -0,0 +1,92 @@
+# tests/test_state_hash.py
+"""Tests for the incrementally maintained architectural state hash."""
+from tests.util import load_cpu
+from state.cpu_state import CPUstate
+from state.state_hash import StateHash, mix
+from state.watchpoints import Watchpoints
+from pipeline.pipeline import Pipeline
+
+
+PROGRAM = '''
+ADDI $1, $0, 4
+ADDI $2, $0, 0
+loop:
+ADD $2, $2, $1
+SLL $7, $1, 2
+SW $2, 256($7)
+SB $1, 301($0)
+ADDI $5, $0, 0
+SH $2, 302($0)
+ADDI $5, $0, 1
+ADDI $6, $0, 2
+ADDI $1, $1, -1
+BNE $1, $0, loop
+ADDI $3, $0, 42
+'''
+
+
+def test_incremental_hash_matches_full_recompute_every_cycle():
+    cpu = load_cpu(PROGRAM)
+    state_hash = StateHash(cpu)
+    pipeline = Pipeline()
+    assert state_hash.digest() == state_hash.recompute()
+    for _ in range(100):
+        pipeline.step(cpu)
+        assert state_hash.digest() == state_hash.recompute()
+    assert cpu.registers.read(2) == 10 and cpu.registers.read(3) == 42
+
+
+def test_identical_runs_hash_equal_and_diverging_runs_differ():
+    a, b = load_cpu(PROGRAM), load_cpu(PROGRAM)
+    hash_a, hash_b = StateHash(a), StateHash(b)
+    pipe_a, pipe_b = Pipeline(), Pipeline()
+    for _ in range(100):
+        pipe_a.step(a)
+        pipe_b.step(b)
+    assert hash_a.digest() == hash_b.digest()
+
+    b.memory.store_word(1024, 1)
+    assert hash_a.digest() != hash_b.digest()
+    b.memory.store_word(1024, 0)
+    assert hash_a.digest() == hash_b.digest()
+
+
+def test_zero_state_and_detach():
+    cpu = CPUstate()
+    state_hash = StateHash(cpu)
+    assert state_hash.digest() == 0
+    assert mix(7, 0) == 0
+
+    cpu.registers.write(3, 5)
+    assert state_hash.digest() != 0
+
+    state_hash.detach()
+    assert 'write' not in cpu.registers.__dict__
+    assert 'store_word' not in cpu.memory.__dict__
+
+
+def test_resync_after_bulk_restore():
+    cpu = CPUstate()
+    state_hash = StateHash(cpu)
+    snap = cpu.registers.snapshot()
+    cpu.registers.write(9, 99)
+    cpu.registers.restore(snap)  # bypasses write()
+    state_hash.resync()
+    assert state_hash.digest() == state_hash.recompute() == 0
+
+
+def test_watchpoints_and_hash_hooks_are_independent():
+    cpu = CPUstate()
+    watchpoints = Watchpoints(cpu.memory)
+    wp = watchpoints.add(64, 68, kind='w')
+    state_hash = StateHash(cpu)
+    watchpoints.remove(wp)             # must not take the hash's store hook with it
+    cpu.memory.store_word(64, 3)
+    assert state_hash.digest() == state_hash.recompute() != 0
+
+    watchpoints.add(64, 68, kind='w')
+    state_hash.detach()                # nor the other way round
+    cpu.memory.store_word(64, 4)
+    assert len(watchpoints.hits) == 1
+    watchpoints.clear()
+    assert '_hooks' not in cpu.memory.__dict__ and 'store_word' not in cpu.memory.__dict__
@@ -0,0 +1,82 @@
+# tests/test_store_buffer.py
+"""Tests for the store buffer between MEM and memory."""
+import pytest
+
+from tests.util import run_pipeline
+from state.memory import Memory
+from state.cache import Cache
+from state.store_buffer import StoreBuffer
+from state.memory_system import MemorySystem
+from pipeline.pipeline import Pipeline
+
+# Stores 32 words on separate 16-byte lines, then reads the last one back
+STORES = """ADDI $1, $0, 32
+ADDI $5, $0, 1024
+loop:
+SW $1, 0($5)
+ADDI $5, $5, 16
+ADDI $1, $1, -1
+BGTZ $1, loop
+LW $6, 1520($0)"""
+
+
+def run(entries=0):
+    pipeline = Pipeline(memory_system=MemorySystem(dcache=Cache(size=256, line_size=16, miss_latency=10),
+                                                   store_buffer=StoreBuffer(entries) if entries else None))
+    cpu, _ = run_pipeline(STORES, pipeline, until_retired=2 + 32 * 4 + 1)
+    pipeline.drain_stores(cpu)
+    return cpu, pipeline
+
+
+def test_loads_merge_buffered_bytes_newest_first():
+    memory = Memory(size=128)
+    memory.store_word(64, 0x01020304)
+    buffer = StoreBuffer(entries=4)
+    buffer.push('SW', 64, 0x11223344)
+    buffer.push('SB', 65, 0xAA)
+    buffer.push('SH', 70, 0xFFEE)
+
+    assert buffer.load('LW', memory, 64) == 0x11AA3344
+    assert buffer.load('LB', memory, 66) == 0x33
+    assert buffer.load('LH', memory, 70) == -18      # 0xFFEE sign-extended
+    assert buffer.load('LHU', memory, 68) == 0       # untouched bytes come from memory
+    assert buffer.forwarded == 3 and buffer.loads_searched == 4
+    assert memory.load_word(64) == 0x01020304        # nothing written yet
+
+
+def test_stores_drain_in_order_after_their_latency():
+    memory = Memory(size=128)
+    buffer = StoreBuffer(entries=2, drain_latency=3)
+    buffer.push('SW', 0, 7)
+    buffer.push('SW', 0, 9)
+    buffer.drain(2, memory)
+    assert memory.load_word(0) == 0 and buffer.full
+    buffer.drain(3, memory)
+    assert memory.load_word(0) == 7 and len(buffer) == 1
+    assert buffer.flush(memory) == 6 and memory.load_word(0) == 9
+    assert buffer.average_occupancy == pytest.approx((2 * 3 + 1 * 3) / 6)
+    with pytest.raises(ValueError):
+        StoreBuffer(entries=0)
+    # Bad addresses fault when pushed, not when they drain
+    with pytest.raises(ValueError):
+        buffer.push('SW', 2, 1)
+    with pytest.raises(ValueError):
+        buffer.push('SB', 128, 1, memory=memory)
+    assert len(buffer) == 0
+
+
+def test_store_buffer_hides_store_misses_until_it_fills():
+    cpu, base = run()
+    assert base.memory_stalls == 32 * 10
+
+    for entries in (1, 4):
+        buffered_cpu, pipeline = run(entries)
+        buffer = pipeline.memory_system.store_buffer
+        # Same results; store misses are now paid while draining, and the
+        # loop only waits when it outruns the buffer
+        assert buffered_cpu.memory.load_word(1520) == cpu.memory.load_word(1520) == 1
+        assert buffered_cpu.registers.read(6) == 1 and buffer.forwarded == 1
+        assert pipeline.memory_stalls == 0 and buffer.full_stalls > 0
+        assert pipeline.cycle < base.cycle
+        assert buffer.max_occupancy == entries and not len(buffer)
+    assert run(4)[1].cycle <= run(1)[1].cycle
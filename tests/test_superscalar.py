@@ -0,0 +1,60 @@
+# tests/test_superscalar.py
+"""Tests for the dual-issue in-order pipeline."""
+from tests.util import run_pipeline
+from pipeline.pipeline import Pipeline
+from pipeline.superscalar import DualIssuePipeline
+from pipeline.branch_predictor import make_predictor
+
+# Sums 1..10 into $2 while storing and reloading every partial sum
+KERNEL = """ADDI $1, $0, 10
+ADDI $2, $0, 0
+ADDI $5, $0, 256
+loop:
+ADD $2, $2, $1
+ADDI $1, $1, -1
+SW $2, 0($5)
+ADDI $5, $5, 4
+LW $6, -4($5)
+BGTZ $1, loop
+ADDI $7, $0, 7"""
+
+
+def test_independent_instructions_issue_in_pairs():
+    src = '\n'.join(f'ADDI ${r}, $0, {r}' for r in range(1, 9))
+    scalar = Pipeline()
+    run_pipeline(src, scalar)
+    dual = DualIssuePipeline()
+    cpu, _ = run_pipeline(src, dual)
+    assert [cpu.registers.read(r) for r in range(1, 9)] == list(range(1, 9))
+    assert dual.dual_issues >= 4 and dual.pairing_rate == 1.0
+    # Same fill latency, half the issue cycles
+    assert dual.cycle == scalar.cycle - 4
+
+
+def test_pairing_rules():
+    dual = DualIssuePipeline()
+    cpu, _ = run_pipeline('ADDI $1, $0, 1\nADD $2, $1, $1\nADDI $7, $0, 7\nLW $3, 0($0)\nLW $4, 4($0)\n'
+                          'ADDI $5, $0, 5\nJ end\nend:\nADDI $6, $0, 6', dual)
+    assert cpu.registers.read(2) == 2 and cpu.registers.read(6) == 6
+    assert dual.pair_failures['dependency'] == 1
+    assert dual.pair_failures['memory port'] == 1 and dual.pair_failures['branch'] == 1
+
+    # A second memory port lets the two loads pair
+    one, two = DualIssuePipeline(), DualIssuePipeline(memory_ports=2)
+    run_pipeline('LW $3, 0($0)\nLW $4, 4($0)', one)
+    run_pipeline('LW $3, 0($0)\nLW $4, 4($0)', two)
+    assert not two.pair_failures['memory port'] and two.cycle == one.cycle - 1
+
+
+def test_kernel_matches_scalar_with_higher_ipc():
+    count = 3 + 10 * 6 + 1
+    scalar = Pipeline()
+    expected, _ = run_pipeline(KERNEL, scalar, until_retired=count)
+    for predictor in (None, '2bit'):
+        dual = DualIssuePipeline(predictor=make_predictor(predictor) if predictor else None)
+        cpu, _ = run_pipeline(KERNEL, dual, until_retired=count)
+        assert cpu.registers.snapshot() == expected.registers.snapshot()
+        assert cpu.memory.load_word(256 + 36) == 55
+        assert dual.ipc > scalar.ipc
+        # Static not-taken: each taken BGTZ squashes the fetched instructions behind it
+        assert dual.flushes == (scalar.flushes if predictor is None else 2)
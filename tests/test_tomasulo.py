@@ -0,0 +1,112 @@
+# tests/test_tomasulo.py
+"""Tests for the out-of-order Tomasulo model with a reorder buffer."""
+import random
+
+from tests.util import run_pipeline
+from execute.muldiv_unit import MulDivUnit
+from pipeline.pipeline import Pipeline
+from pipeline.tomasulo import TomasuloPipeline
+from pipeline.branch_predictor import make_predictor
+
+# Sums an array and 3x each element; load-use and multiply latencies stall in order
+KERNEL = """ADDI $1, $0, 16
+ADDI $5, $0, 256
+ADDI $9, $0, 3
+loop:
+LW $2, 0($5)
+ADD $3, $3, $2
+MUL $4, $2, $9
+ADD $6, $6, $4
+ADDI $5, $5, 4
+ADDI $1, $1, -1
+BGTZ $1, loop
+ADDI $7, $0, 7"""
+
+
+def test_kernel_matches_in_order_and_hides_stalls():
+    array = [(256 + 4 * i, i + 1) for i in range(16)]
+    ooo = TomasuloPipeline(predictor=make_predictor('2bit'))
+    count = 3 + 16 * 7 + 1
+    cpu, _ = run_pipeline(KERNEL, ooo, array, count)
+    inorder = Pipeline(predictor=make_predictor('2bit'))
+    expected, _ = run_pipeline(KERNEL, inorder, array, count)
+    assert cpu.registers.snapshot() == expected.registers.snapshot()
+    assert cpu.registers.read(3) == 136 and cpu.registers.read(6) == 408
+    # The in-order pipeline stalls once per load and three times per multiply
+    assert inorder.stalls == 16 * 4
+    assert inorder.cycle - ooo.cycle >= 0.9 * inorder.stalls
+    assert ooo.ipc > inorder.ipc and 1 < ooo.average_occupancy <= ooo.max_occupancy <= 16
+
+
+def test_mispredicted_path_leaves_no_trace():
+    # The branch waits for a load, so the wrong path (including a misaligned
+    # load that would fault) executes before it resolves
+    src = ('ADDI $1, $0, 5\nLW $4, 128($0)\nBEQ $4, $0, skip\nADDI $2, $0, 9\nLW $5, 2($1)\n'
+           'SW $1, 0($0)\nskip:\nADDI $3, $1, 1')
+    ooo = TomasuloPipeline()
+    cpu, _ = run_pipeline(src, ooo, until_retired=4)
+    assert cpu.registers.read(2) == 0 and cpu.memory.load_word(0) != 5
+    assert cpu.registers.read(3) == 6
+    assert ooo.flushes == 1 and ooo.squashed >= 1 and ooo.retired == 4
+
+
+def test_loads_respect_older_stores():
+    src = ('ADDI $1, $0, 7\nSW $1, 64($0)\nLW $2, 64($0)\n'
+           'SB $1, 67($0)\nLW $3, 64($0)\nLBU $4, 67($0)')
+    ooo = TomasuloPipeline()
+    cpu, _ = run_pipeline(src, ooo)
+    assert cpu.registers.read(2) == 7     # forwarded from the matching SW
+    assert cpu.registers.read(3) == 7 and cpu.registers.read(4) == 7
+    assert ooo.memory_order_waits > 0     # the overlapping SB blocked the loads
+
+
+def test_window_sizes_limit_lookahead():
+    # A chain of dependent loads (independent of the divide) queued behind it
+    src = 'ADDI $1, $0, 100\nADDI $2, $0, 7\nDIV $1, $2\nMFLO $3\n' + \
+          'LW $4, 52($0)\n' + '\n'.join(f'LW ${r}, 52(${r - 1})' for r in range(5, 14))
+    cycles = []
+    for rob_size in (4, 16):
+        ooo = TomasuloPipeline(rob_size=rob_size, rs_size=8, muldiv=MulDivUnit(div_latency=12))
+        cpu, _ = run_pipeline(src, ooo, [(52, 0)])
+        assert cpu.registers.read(3) == 14 and cpu.registers.read(13) == 0
+        cycles.append(ooo.cycle)
+        assert ooo.max_occupancy <= rob_size
+    small = TomasuloPipeline(rob_size=4, rs_size=8)
+    run_pipeline(src, small, [(52, 0)])
+    assert small.dispatch_stalls['rob full'] > 0 and small.commit_stalls['muldiv'] > 0
+    assert cycles[1] < cycles[0]
+
+
+def random_program(rng):
+    """A counted loop of random ALU, load/store and multiply instructions over $2-$8.
+
+    Returns the source and its dynamic instruction count.
+    """
+    ops = ('ADD', 'ADDU', 'SUB', 'SUBU', 'AND', 'OR', 'XOR', 'SLT', 'SLTU', 'MUL')
+    reg = lambda: f'${rng.randint(2, 8)}'
+    body = []
+    for _ in range(rng.randint(4, 12)):
+        kind = rng.random()
+        if kind < 0.25:
+            body.append(f'LW {reg()}, {4 * rng.randint(0, 7)}($10)')
+        elif kind < 0.35:
+            body.append(f'SW {reg()}, {4 * rng.randint(0, 7)}($10)')
+        elif kind < 0.5:
+            body.append(f'ADDI {reg()}, {reg()}, {rng.randint(-20, 20)}')
+        else:
+            body.append(f'{rng.choice(ops)} {reg()}, {reg()}, {reg()}')
+    src = '\n'.join(['ADDI $1, $0, 3', 'ADDI $10, $0, 256', 'loop:', *body,
+                     'ADDI $1, $1, -1', 'BGTZ $1, loop', 'ADDI $9, $0, 9'])
+    return src, 2 + 3 * (len(body) + 2) + 1
+
+
+def test_random_programs_match_in_order_pipeline():
+    memory = [(256 + 4 * i, value) for i, value in enumerate((-16, 5, -1, 0x7FFFFFFF, 3, -300, 0, 1))]
+    for seed in range(60):
+        src, count = random_program(random.Random(seed))
+        for width in (1, 4):
+            ooo = TomasuloPipeline(width=width, rob_size=32, predictor=make_predictor('2bit'))
+            cpu, _ = run_pipeline(src, ooo, memory, count)
+            expected, _ = run_pipeline(src, Pipeline(), memory, count)
+            assert cpu.registers.snapshot() == expected.registers.snapshot(), (seed, width)
+            assert cpu.memory.mem[256:288] == expected.memory.mem[256:288], (seed, width)
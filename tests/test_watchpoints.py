@@ -0,0 +1,80 @@
+# tests/test_watchpoints.py
+"""Tests for page-indexed memory watchpoints."""
+import pytest
+from tests.util import load_cpu
+from execute.load_store_unit import load_store
+from state.memory import Memory, PAGE_SIZE
+from state.watchpoints import Watchpoints
+from state.store_buffer import StoreBuffer
+from state.memory_system import MemorySystem
+from pipeline.pipeline import Pipeline
+
+
+def test_no_wrappers_without_watchpoints():
+    mem = Memory(size=1024)
+    wps = Watchpoints(mem)
+    assert 'load_word' not in mem.__dict__
+
+    wp = wps.add(16, 20)
+    assert 'load_word' in mem.__dict__ and 'store_byte' in mem.__dict__
+
+    wps.remove(wp)
+    assert 'load_word' not in mem.__dict__ and 'store_byte' not in mem.__dict__
+
+
+def test_read_write_kinds_and_overlap():
+    mem = Memory(size=2 * PAGE_SIZE)
+    wps = Watchpoints(mem)
+    seen = []
+    wps.add(18, 19, kind='w', callback=seen.append)
+
+    load_store('SW', mem, 16, 0x01020304)   # word covers byte 18 -> hit
+    load_store('SB', mem, 19, 5)            # outside the range
+    assert load_store('LW', mem, 16) == 0x01020305  # reads are not watched
+    load_store('SW', mem, PAGE_SIZE, 1)     # other page: never inspected
+
+    assert [(h.kind, h.address, h.size, h.value) for h in seen] == [('w', 16, 4, 0x01020304)]
+    assert wps.hits == seen and wps.triggered is None
+
+
+def test_invalid_watch_ranges_rejected():
+    wps = Watchpoints(Memory(size=64))
+    with pytest.raises(ValueError):
+        wps.add(8, 8)
+    with pytest.raises(ValueError):
+        wps.add(0, 4, kind='x')
+
+
+def test_pipeline_hit_reports_cycle_and_pc_and_stops():
+    src = 'ADDI $1, $0, 9\nSW $1, 128($0)\nLW $2, 128($0)\nADDI $3, $0, 1'
+    cpu = load_cpu(src, predecode=False)
+    pipeline = Pipeline()
+    wps = Watchpoints(cpu.memory, pipeline)
+    wps.add(128, 132, kind='r', stop=True)
+
+    for _ in range(20):
+        pipeline.step(cpu)
+        if wps.triggered is not None:
+            break
+
+    hit = wps.triggered
+    # Unified fetch of the program text must not count as a data read
+    assert [h.kind for h in wps.hits] == ['r']
+    assert hit.pc == 8 and hit.value == 9
+    # LW is fetched in cycle 3 and reaches MEM in cycle 6
+    assert hit.cycle == pipeline.cycle == 6
+
+
+def test_buffered_store_hit_reports_the_store_pc():
+    src = 'ADDI $1, $0, 9\nSW $1, 128($0)\nADDI $2, $0, 1\nADDI $3, $0, 2\nADDI $4, $0, 3\nADDI $5, $0, 4'
+    cpu = load_cpu(src)
+    pipeline = Pipeline(memory_system=MemorySystem(store_buffer=StoreBuffer(4, drain_latency=3)))
+    wps = Watchpoints(cpu.memory, pipeline)
+    wps.add(128, 132, kind='w')
+    while pipeline.retired < 6:
+        pipeline.step(cpu)
+
+    hit, = wps.hits
+    assert hit.pc == 4 and hit.value == 9
+    # SW is in MEM in cycle 5 and drains three cycles later
+    assert hit.cycle == 8
@@ -7,6 +7,7 @@ from parser.assembler import Assembler
 from decoder.decoder import decode as decode_word
 from state.cpu_state import CPUstate
 from state.memory import Memory
+from pipeline.pipeline import Pipeline
 
 
 def require_field(dec: Any, name: str):
@@ -62,6 +63,53 @@ def make_cpu(registers: Optional[Dict[int, int]] = None, memory_words: Optional[
     return cpu
 
 
+def load_cpu(src, memory=None, predecode: bool = True) -> CPUstate:
+    """Return a CPUstate with `src` loaded at 0 and `memory` words stored.
+
+    `src` is assembly source or a list of machine words; `memory` is a
+    {address: value} mapping or a sequence of (address, value) pairs.
+    """
+    cpu = CPUstate()
+    cpu.load_program(assemble(src) if isinstance(src, str) else src, predecode=predecode)
+    for addr, val in dict(memory or {}).items():
+        cpu.memory.store_word(addr, val)
+    return cpu
+
+
+def run_pipeline(src, pipeline=None, memory=None, until_retired: Optional[int] = None,
+                 predecode: bool = True):
+    """Run `src` (as for `load_cpu`) on `pipeline` (default: a plain `Pipeline`); return (cpu, pipeline).
+
+    Steps until `until_retired` instructions have written back, by default one
+    per instruction of `src` (a straight-line program run to completion).
+    """
+    cpu = load_cpu(src, memory, predecode)
+    if pipeline is None:
+        pipeline = Pipeline()
+    if until_retired is None:
+        until_retired = len(assemble(src) if isinstance(src, str) else src)
+    while pipeline.retired < until_retired:
+        pipeline.step(cpu)
+    return cpu, pipeline
+
+
+def run_cycles(src, cycles: int, pipeline=None, memory=None):
+    """Step `src` (as for `load_cpu`) on `pipeline` for `cycles` steps; return (cpu, pipeline, writebacks).
+
+    `writebacks` lists (cycle, pc) for each instruction reaching MEM/WB, with
+    the cycle in which it writes back (the step after it enters MEM/WB).
+    """
+    cpu = load_cpu(src, memory)
+    if pipeline is None:
+        pipeline = Pipeline()
+    writebacks = []
+    for _ in range(cycles):
+        pipeline.step(cpu)
+        if pipeline.mem_wb.seq:
+            writebacks.append((pipeline.cycle + 1, pipeline.mem_wb.pc))
+    return cpu, pipeline, writebacks
+
+
 def assert_registers(cpu: CPUstate, expected: Dict[int, int]):
     """Assert multiple registers equal expected values with helpful messages."""
     for r, v in expected.items():
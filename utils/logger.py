@@ -178,7 +178,7 @@ def print_pipeline_state(pipeline, cpu, cycle, prev_cpu_state=None, detailed=Fal
         else:
             value = 0
         
-        print(f"  WB:  Write $({wb_rd}) = 0x{value:08x}")
+        print(f"  WB:  Write $({wb_rd}) = 0x{value & 0xFFFFFFFF:08x}")
     else:
         print(f"  WB:  (empty)")
     
@@ -192,7 +192,7 @@ def print_pipeline_state(pipeline, cpu, cycle, prev_cpu_state=None, detailed=Fal
             old_val = prev_cpu_state.registers.read(i)
             new_val = cpu.registers.read(i)
             if old_val != new_val:
-                reg_changes.append(f"${i}: 0x{old_val:08x} -> 0x{new_val:08x}")
+                reg_changes.append(f"${i}: 0x{old_val & 0xFFFFFFFF:08x} -> 0x{new_val & 0xFFFFFFFF:08x}")
         
         if reg_changes:
             print(f"  Registers: {', '.join(reg_changes)}")